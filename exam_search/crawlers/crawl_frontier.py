@@ -0,0 +1,396 @@
+"""
+クロールフロンティア
+
+クロール対象URLをDB（CrawlFrontierモデル）に保持し、リース方式で取り出します。
+- プロセスが途中で停止しても、リース期限切れのURLは次回の実行で再取得されます
+- URLは優先度（TARGET_UNIVERSITIESのpriority）順に処理されます
+- 現在のサイクル内でクロール済みのURLは再取得されません
+- 複数のワーカープロセスはハートビートを送り、途絶えたワーカーのリースは回収されます
+"""
+
+import os
+import socket
+import logging
+import threading
+from datetime import timedelta
+from urllib.parse import urlparse
+
+from django.db import close_old_connections, connection
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from exams.models import CrawlFrontier, CrawlWorker
+from crawler_config import FRONTIER_CONFIG, ERROR_HANDLING
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id():
+    """ワーカー識別子（ホスト名:プロセスID）"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class CrawlFrontierQueue:
+    """
+    クローラー単位のURL待ち行列
+    """
+
+    def __init__(self, crawler_id, worker_id=None):
+        """
+        Args:
+            crawler_id (str): CRAWLER_CONFIGSのキー（例: toshin）
+            worker_id (str): リースを保持するワーカーの識別子
+        """
+        self.crawler_id = crawler_id
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = FRONTIER_CONFIG['lease_seconds']
+        self.lease_batch = FRONTIER_CONFIG['lease_batch']
+        self.cycle_length = timedelta(days=FRONTIER_CONFIG['cycle_days'])
+        self.max_attempts = ERROR_HANDLING['max_retries']
+        self.retry_delay = ERROR_HANDLING['retry_delay']
+
+    @property
+    def entries(self):
+        return CrawlFrontier.objects.filter(crawler=self.crawler_id)
+
+    def _leasable(self, now):
+        """リース可能な条件（待機中で実行可能、またはリース期限切れ）"""
+        return (
+            Q(state='pending', next_eligible_at__lte=now) |
+            Q(state='leased', leased_until__lt=now)
+        )
+
+    def seed(self, items):
+        """
+        URLを登録（登録済みのURLは優先度のみ更新）
+
+        Args:
+            items (list): {'url', 'label', 'priority'} の辞書リスト
+
+        Returns:
+            int: 新規登録されたURL数
+        """
+        items = list(items)
+        before = self.entries.count()
+
+        CrawlFrontier.objects.bulk_create(
+            [
+                CrawlFrontier(
+                    crawler=self.crawler_id,
+                    url=item['url'],
+                    host=urlparse(item['url']).netloc,
+                    label=item.get('label', ''),
+                    priority=item.get('priority', 5),
+                )
+                for item in items
+            ],
+            ignore_conflicts=True,
+        )
+
+        # 設定ファイルで優先度が変更された場合に追従する
+        by_priority = {}
+        for item in items:
+            by_priority.setdefault(item.get('priority', 5), []).append(item['url'])
+        for priority, urls in by_priority.items():
+            self.entries.filter(url__in=urls).exclude(priority=priority).update(
+                priority=priority, updated_at=timezone.now()
+            )
+
+        created = self.entries.count() - before
+        logger.info(f"Frontier[{self.crawler_id}]: seeded {created} new URLs")
+        return created
+
+    def start_cycle(self):
+        """
+        サイクルを更新
+
+        前回のサイクルで完了・失敗したURLを待機中に戻します。
+        現在のサイクル内でクロール済みのURLはそのまま（スキップ対象）です。
+
+        Returns:
+            int: 待機中に戻したURL数
+        """
+        now = timezone.now()
+        cycle_start = now - self.cycle_length
+
+        # QuerySet.update() では auto_now が働かないため、このモジュールの更新ではすべて updated_at を設定する
+        reset = self.entries.filter(
+            Q(state='done', last_crawled_at__lt=cycle_start) |
+            Q(state='failed', updated_at__lt=cycle_start)
+        ).update(
+            state='pending',
+            attempts=0,
+            next_eligible_at=now,
+            last_error='',
+            updated_at=now,
+        )
+
+        if reset:
+            logger.info(f"Frontier[{self.crawler_id}]: {reset} URLs re-queued for a new cycle")
+        return reset
+
+    def lease(self, limit=None, label_filter=None, exclude_ids=None):
+        """
+        処理するURLをリース
+
+        候補ごとに条件付きUPDATEで確保するため、複数のプロセスから同時に
+        呼び出しても同じURLが二重にリースされることはありません。
+
+        Args:
+            limit (int): 取得する最大件数
+            label_filter (str): ラベルの部分一致フィルター
+            exclude_ids (set): リース対象から除外するID
+
+        Returns:
+            list: リースしたCrawlFrontierのリスト（優先度順）
+        """
+        limit = limit or self.lease_batch
+        now = timezone.now()
+
+        # リース期限切れのまま試行回数を使い切ったURLは失敗扱いにする
+        self.entries.filter(
+            state='leased', leased_until__lt=now, attempts__gte=self.max_attempts
+        ).update(state='failed', last_error='lease expired', updated_at=now)
+
+        candidates = self.entries.filter(self._leasable(now))
+        if label_filter:
+            candidates = candidates.filter(label__contains=label_filter)
+        if exclude_ids:
+            candidates = candidates.exclude(pk__in=exclude_ids)
+        # 他のワーカーに先に確保される分を見込んで、多めに候補を取得する
+        candidate_ids = list(
+            candidates.order_by('priority', 'next_eligible_at', 'id')
+            .values_list('id', flat=True)[:max(limit, self.lease_batch)]
+        )
+
+        leased_ids = []
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+
+        for entry_id in candidate_ids:
+            claimed = self.entries.filter(pk=entry_id).filter(self._leasable(now)).update(
+                state='leased',
+                leased_by=self.worker_id,
+                leased_until=lease_until,
+                attempts=F('attempts') + 1,
+                updated_at=now,
+            )
+            if claimed:
+                leased_ids.append(entry_id)
+                if len(leased_ids) >= limit:
+                    break
+
+        return list(
+            self.entries.filter(pk__in=leased_ids).order_by('priority', 'next_eligible_at', 'id')
+        )
+
+    def iter_leased(self, label_filter=None, limit=None):
+        """
+        待ち行列が空になるまでURLをリースし続けるジェネレーター
+
+        Args:
+            label_filter (str): ラベルの部分一致フィルター
+            limit (int): 1回のリースで取得する件数（複数ワーカーで分け合う場合は1）
+
+        Yields:
+            CrawlFrontier: リースしたURL
+        """
+        # 同じ実行内で返却・再投入されたURLを再度処理しない
+        seen_ids = set()
+
+        while True:
+            batch = self.lease(limit=limit, label_filter=label_filter, exclude_ids=seen_ids)
+            if not batch:
+                return
+            for entry in batch:
+                seen_ids.add(entry.pk)
+                yield entry
+
+    def complete(self, entry):
+        """URLの処理完了を記録"""
+        now = timezone.now()
+        self.entries.filter(pk=entry.pk, leased_by=self.worker_id).update(
+            state='done',
+            leased_until=None,
+            last_crawled_at=now,
+            last_error='',
+            updated_at=now,
+        )
+
+    def release(self, entry):
+        """
+        リースを返却して待機中に戻す（DRY RUNなど、処理済みにしない場合）
+        """
+        self.entries.filter(pk=entry.pk, leased_by=self.worker_id).update(
+            state='pending',
+            leased_until=None,
+            attempts=F('attempts') - 1,
+            updated_at=timezone.now(),
+        )
+
+    def fail(self, entry, error):
+        """
+        URLの処理失敗を記録
+
+        試行回数が上限未満なら指数的に待ち時間を延ばして待機中に戻します。
+        """
+        now = timezone.now()
+        if entry.attempts >= self.max_attempts:
+            updates = {'state': 'failed'}
+        else:
+            backoff = self.retry_delay * (2 ** (entry.attempts - 1))
+            updates = {
+                'state': 'pending',
+                'next_eligible_at': now + timedelta(seconds=backoff),
+            }
+
+        # 失敗したURLは updated_at から1サイクル経過するまで待機中に戻さない（start_cycle）
+        self.entries.filter(pk=entry.pk, leased_by=self.worker_id).update(
+            leased_until=None,
+            last_error=str(error)[:1000],
+            updated_at=now,
+            **updates
+        )
+
+    def stats(self):
+        """
+        状態ごとの件数
+
+        Returns:
+            dict: {'pending': int, 'leased': int, 'done': int, 'failed': int}
+        """
+        counts = {state: 0 for state, _ in CrawlFrontier.STATE_CHOICES}
+        for row in self.entries.order_by().values('state').annotate(count=Count('id')):
+            counts[row['state']] = row['count']
+        return counts
+
+
+class WorkerHeartbeat:
+    """
+    ワーカーの生存をCrawlWorkerに記録するバックグラウンドスレッド
+
+    ハートビートのたびに、このワーカーが保持しているリースの期限も延長します。
+    処理に lease_seconds 以上かかるURLが、他のワーカーに二重に取得されるのを防ぐためです。
+    """
+
+    def __init__(self, worker_id, crawlers=(), interval=None):
+        """
+        Args:
+            worker_id (str): ワーカーの識別子
+            crawlers (list): 担当するクローラーID
+            interval (int): ハートビート間隔（秒）
+        """
+        self.worker_id = worker_id
+        self.crawlers = ','.join(crawlers)
+        self.interval = interval or FRONTIER_CONFIG['heartbeat_interval']
+        self.lease_seconds = FRONTIER_CONFIG['lease_seconds']
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """ワーカーを登録してハートビートを開始"""
+        now = timezone.now()
+        fields = {
+            'crawlers': self.crawlers,
+            'status': 'running',
+            'jobs_done': 0,
+            'jobs_failed': 0,
+            'started_at': now,
+            'last_heartbeat_at': now,
+            'stopped_at': None,
+        }
+        # update_or_create は読み取り後に書き込むトランザクションになり、
+        # SQLiteでは他のワーカーの書き込み中に即座にロックエラーとなるため、単発のUPDATE/INSERTで登録する
+        if not CrawlWorker.objects.filter(worker_id=self.worker_id).update(**fields):
+            CrawlWorker.objects.create(worker_id=self.worker_id, **fields)
+        self._thread = threading.Thread(
+            target=self._run, name=f'heartbeat-{self.worker_id}', daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                # DBのロックなどで失敗しても、スレッドを止めずに次の間隔で再試行する
+                # （止めると、処理中のワーカーが応答なしとみなされてリースを回収される）
+                try:
+                    self.beat()
+                except Exception as e:
+                    logger.warning(f"Heartbeat failed for worker {self.worker_id}: {e}")
+        finally:
+            connection.close()
+
+    def beat(self):
+        """ハートビートを記録し、保持しているリースを延長"""
+        close_old_connections()
+        now = timezone.now()
+        CrawlWorker.objects.filter(worker_id=self.worker_id).update(last_heartbeat_at=now)
+        CrawlFrontier.objects.filter(leased_by=self.worker_id, state='leased').update(
+            leased_until=now + timedelta(seconds=self.lease_seconds), updated_at=now
+        )
+
+    def record(self, success):
+        """ジョブの結果を数える"""
+        field = 'jobs_done' if success else 'jobs_failed'
+        CrawlWorker.objects.filter(worker_id=self.worker_id).update(**{field: F(field) + 1})
+
+    def stop(self):
+        """ハートビートを止めて停止を記録"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        CrawlWorker.objects.filter(worker_id=self.worker_id).update(
+            status='stopped', stopped_at=timezone.now()
+        )
+
+
+def reclaim_dead_workers(timeout=None):
+    """
+    ハートビートが途絶えたワーカーを応答なしとし、そのリースを待機中に戻す
+
+    Args:
+        timeout (int): 応答なしとみなすまでの時間（秒）
+
+    Returns:
+        int: 待機中に戻したURL数
+    """
+    timeout = timeout or FRONTIER_CONFIG['worker_timeout']
+    deadline = timezone.now() - timedelta(seconds=timeout)
+
+    dead_ids = list(
+        CrawlWorker.objects.filter(status='running', last_heartbeat_at__lt=deadline)
+        .values_list('worker_id', flat=True)
+    )
+    if not dead_ids:
+        return 0
+
+    return release_worker_leases(dead_ids, status='dead')
+
+
+def release_worker_leases(worker_ids, status='stopped'):
+    """
+    指定したワーカーのリースを待機中に戻す
+
+    Args:
+        worker_ids (list): ワーカーの識別子
+        status (str): ワーカーに記録する状態
+
+    Returns:
+        int: 待機中に戻したURL数
+    """
+    now = timezone.now()
+    CrawlWorker.objects.filter(worker_id__in=worker_ids, status='running').update(
+        status=status, stopped_at=now
+    )
+    reclaimed = CrawlFrontier.objects.filter(
+        leased_by__in=worker_ids, state='leased'
+    ).update(
+        state='pending',
+        leased_until=None,
+        leased_by='',
+        next_eligible_at=now,
+        updated_at=now,
+    )
+
+    if reclaimed:
+        logger.warning(f"Reclaimed {reclaimed} leases from workers: {', '.join(worker_ids)}")
+    return reclaimed
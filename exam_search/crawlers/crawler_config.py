@@ -176,17 +176,47 @@ SCHEDULE_CONFIG = {
 # エラー処理設定
 ERROR_HANDLING = {
     'max_retries': 3,  # 最大リトライ回数
-    'retry_delay': 5,  # リトライ間隔（秒）
+    'retry_delay': 5,  # リトライ間隔（秒）。指数バックオフの基準
+    'max_retry_delay': 60,  # リトライ間隔の上限（秒）
+    'retry_statuses': (429, 500, 502, 503, 504),  # リトライするステータスコード
     'timeout': 15,     # タイムアウト（秒）
+    'circuit_failure_threshold': 5,  # ホストへのリクエストを止めるまでの連続失敗回数
+    'circuit_reset_timeout': 300,    # 止めたホストへのリクエストを再開するまでの時間（秒）
+    'max_request_delay': 60,  # 429/503 や応答の遅延で伸ばすリクエスト間隔の上限（秒）
+    'latency_factor': 2.0,    # リクエスト間隔を応答時間の何倍以上にするか
     'log_file': 'crawler_errors.log',
 }
 
+# クロールフロンティア設定（DBに保持するURL待ち行列）
+FRONTIER_CONFIG = {
+    'lease_seconds': 600,  # リース期間（秒）。期限切れのURLはクラッシュとみなして再取得
+    'lease_batch': 10,     # 1回のリースで取得するURL数
+    'cycle_days': 7,       # 1サイクルの長さ（日）。サイクル内でクロール済みのURLは再取得しない
+    'heartbeat_interval': 30,  # ワーカーのハートビート間隔（秒）
+    'worker_timeout': 120,     # ハートビートが途絶えてからリースを回収するまでの時間（秒）
+}
+
 # データベース設定
 DATABASE_CONFIG = {
     'batch_size': 100,  # バッチ処理のサイズ
     'commit_interval': 50,  # コミット間隔
 }
 
+# 重複データの判定設定
+DUPLICATE_CONFIG = {
+    # 重複とみなすキー（大学・年度・科目・試験種別）に学部を含めるか
+    # Falseの場合、学部だけが異なる過去問も重複として扱う
+    'include_department': False,
+}
+
+# 公式サイトの過去問掲載チェック設定（manage.py check_official_pastpapers）
+PASTPAPER_CHECK_CONFIG = {
+    'workers': 8,         # 同時にチェックする大学数（同じホストへのリクエスト間隔は delay 以上）
+    'delay': 2.0,         # 同じホストへのリクエスト間隔（秒）
+    'max_depth': 2,       # トップページからたどるリンクの深さ
+    'max_pages': 30,      # 1大学あたりの最大取得ページ数
+}
+
 # ロギング設定
 LOGGING_CONFIG = {
     'level': 'INFO',
@@ -196,6 +226,21 @@ LOGGING_CONFIG = {
     'backup_count': 5,
 }
 
+# メトリクス設定（実行終了時に書き出す）
+METRICS_CONFIG = {
+    'json_file': 'crawler_metrics.json',
+    # node_exporter の --collector.textfile.directory に置くと収集される（空文字で出力しない）
+    'prometheus_file': 'crawler_metrics.prom',
+    'buckets': (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),  # 秒
+}
+
+# ページストア設定（取得したページを保存し、再クロールせずに再抽出する）
+PAGE_STORE_CONFIG = {
+    'enabled': True,
+    'directory': 'page_store',  # 相対パスはプロジェクトディレクトリ（manage.py の場所）基準
+    'compression_level': 6,  # gzipの圧縮レベル（1〜9）
+}
+
 # 除外パターン（クロールしないURLパターン）
 EXCLUDE_PATTERNS = [
     r'.*login.*',
@@ -215,6 +260,13 @@ USER_AGENTS = [
 # robots.txtの遵守
 RESPECT_ROBOTS_TXT = True
 
+# robots.txtキャッシュ設定（ホストごとに1日1回だけ取得）
+ROBOTS_TXT_CONFIG = {
+    'ttl': 86400,       # 取得成功時の有効期間（秒）
+    'error_ttl': 3600,  # 取得失敗時に再取得するまでの期間（秒）
+    'timeout': 10,      # robots.txt取得のタイムアウト（秒）
+}
+
 # 同時接続数の制限
 MAX_CONCURRENT_REQUESTS = 1  # 1つずつ順番に処理（サーバー負荷軽減）
 
@@ -0,0 +1,315 @@
+"""
+クローラーのメトリクス
+
+プロセス内でカウンターとレイテンシのヒストグラムを集計し、実行終了時に
+- JSON形式のサマリー
+- Prometheus テキスト形式（node_exporter の textfile collector 用）
+として書き出します。
+
+記録する主なメトリクス:
+    crawler_requests_total{host, status}        レスポンス数（ステータスコード別）
+    crawler_response_bytes_total{host}          受信バイト数
+    crawler_retries_total{host}                 リトライ回数
+    crawler_errors_total{host, stage}           エラー数
+    crawler_stage_seconds{host, stage}          処理時間（fetch / parse / db_write など）
+
+使用例:
+    metrics = get_metrics()
+    with metrics.timer('parse', host):
+        ...
+    export_metrics()
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+# ヒストグラムのバケット境界（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    'crawler_requests_total': 'Responses received, by host and HTTP status.',
+    'crawler_response_bytes_total': 'Response body bytes received, by host.',
+    'crawler_retries_total': 'Request retries, by host.',
+    'crawler_errors_total': 'Errors, by host and stage.',
+    'crawler_stage_seconds': 'Time spent per stage (fetch, parse, db_write, ...), by host.',
+}
+
+
+def host_of(url):
+    """URLからホスト名を取得（メトリクスのラベル用）"""
+    return urlparse(url).netloc or 'unknown'
+
+
+class Histogram:
+    """
+    固定バケットのヒストグラム
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最後は +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        分位点の推定値（該当するバケットの上限）
+
+        Args:
+            q (float): 0〜1
+
+        Returns:
+            float: 推定値、観測値がなければNone
+        """
+        if not self.count:
+            return None
+
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'avg': round(self.sum / self.count, 3) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': round(self.max, 3),
+        }
+
+
+class MetricsRegistry:
+    """
+    ラベル付きのカウンターとヒストグラムを保持するレジストリ（スレッドセーフ）
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started_at = datetime.now()
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name, amount=1, **labels):
+        """
+        カウンターを加算
+
+        Args:
+            name (str): メトリクス名
+            amount (int): 加算値
+            **labels: ラベル（host, status など）
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """
+        ヒストグラムに値を記録
+
+        Args:
+            name (str): メトリクス名
+            value (float): 観測値（秒）
+            **labels: ラベル（host, stage など）
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage, host):
+        """
+        処理時間を crawler_stage_seconds に記録するコンテキストマネージャー
+
+        例外が発生した場合は crawler_errors_total にも記録します。
+
+        Args:
+            stage (str): 処理段階（fetch / parse / db_write など）
+            host (str): ホスト名
+        """
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.inc('crawler_errors_total', host=host, stage=stage)
+            raise
+        finally:
+            self.observe('crawler_stage_seconds', time.monotonic() - started, host=host, stage=stage)
+
+    def record_response(self, host, status, nbytes=0):
+        """
+        レスポンスを記録
+
+        Args:
+            host (str): ホスト名
+            status (int): HTTPステータスコード
+            nbytes (int): 受信バイト数
+        """
+        self.inc('crawler_requests_total', host=host, status=str(status))
+        if nbytes:
+            self.inc('crawler_response_bytes_total', nbytes, host=host)
+
+    def reset(self):
+        """集計をリセット"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = datetime.now()
+
+    def summary(self):
+        """
+        JSONサマリー
+
+        Returns:
+            dict: {'started_at', 'finished_at', 'counters': [...], 'histograms': [...]}
+        """
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                dict({'name': name, 'labels': dict(labels)}, **histogram.summary())
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    def to_prometheus(self):
+        """
+        Prometheus テキスト形式に変換
+
+        Returns:
+            str: エクスポジション形式のテキスト
+        """
+        def format_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + '}'
+
+        lines = []
+        emitted = set()
+
+        def header(name, metric_type):
+            if name not in emitted:
+                emitted.add(name)
+                lines.append(f'# HELP {name} {METRIC_HELP.get(name, name)}')
+                lines.append(f'# TYPE {name} {metric_type}')
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                header(name, 'counter')
+                lines.append(f'{name}{format_labels(labels)} {value}')
+
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                header(name, 'histogram')
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_bucket{format_labels(labels, [("le", "+Inf")])} {histogram.count}')
+                lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum}')
+                lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+
+        lines.append(f'crawler_last_run_timestamp_seconds {time.time():.0f}')
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path):
+        """JSONサマリーをファイルに書き出す"""
+        _atomic_write(path, json.dumps(self.summary(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path):
+        """Prometheus テキスト形式でファイルに書き出す"""
+        # textfile collector が書き込み途中のファイルを読まないよう、一時ファイルから置き換える
+        _atomic_write(path, self.to_prometheus())
+
+
+def _escape_label(value):
+    """Prometheus のラベル値をエスケープ"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _atomic_write(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    プロセス共通のメトリクスレジストリを取得
+
+    Returns:
+        MetricsRegistry: crawler_config.METRICS_CONFIG で設定されたレジストリ
+    """
+    global _default_registry
+
+    with _default_registry_lock:
+        if _default_registry is None:
+            from crawler_config import METRICS_CONFIG
+            _default_registry = MetricsRegistry(buckets=METRICS_CONFIG['buckets'])
+
+    return _default_registry
+
+
+def export_metrics(json_path=None, prometheus_path=None):
+    """
+    プロセス共通のレジストリを METRICS_CONFIG の出力先に書き出す
+
+    Args:
+        json_path (str): JSONサマリーの出力先（省略時は設定値）
+        prometheus_path (str): Prometheus テキストの出力先（省略時は設定値、空文字で出力しない）
+
+    Returns:
+        dict: JSONサマリー
+    """
+    from crawler_config import METRICS_CONFIG
+
+    metrics = get_metrics()
+    json_path = json_path or METRICS_CONFIG['json_file']
+    prometheus_path = METRICS_CONFIG['prometheus_file'] if prometheus_path is None else prometheus_path
+
+    if json_path:
+        metrics.write_json(json_path)
+    if prometheus_path:
+        metrics.write_prometheus(prometheus_path)
+
+    return metrics.summary()
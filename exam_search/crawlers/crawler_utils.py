@@ -15,17 +15,25 @@ import logging
 
 # Django設定の読み込み（管理コマンドから呼ばれる場合は不要）
 try:
-    from exams.models import University, Exam, AnswerSource
-    from django.db.models import Count
+    from exams.models import University, Exam, AnswerSource, DataQualitySnapshot
+    from django.db import transaction
+    from django.db.models import Count, F, Q, Window
+    from django.db.models.functions import RowNumber
     from django.utils import timezone
 except:
     import django
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'exam_search.settings')
     django.setup()
-    from exams.models import University, Exam, AnswerSource
-    from django.db.models import Count
+    from exams.models import University, Exam, AnswerSource, DataQualitySnapshot
+    from django.db import transaction
+    from django.db.models import Count, F, Q, Window
+    from django.db.models.functions import RowNumber
     from django.utils import timezone
 
+from crawler_config import DATABASE_CONFIG, DUPLICATE_CONFIG
+from crawler_metrics import get_metrics, host_of
+from http_policy import RetryPolicy, CircuitOpenError
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,6 +48,8 @@ class LinkValidator:
             timeout (int): リクエストタイムアウト（秒）
         """
         self.timeout = timeout
+        self.metrics = get_metrics()
+        self.retry_policy = RetryPolicy(timeout=timeout)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (compatible; LinkChecker/1.0)'
@@ -56,16 +66,30 @@ class LinkValidator:
             dict: {
                 'is_valid': bool,
                 'status_code': int,
-                'error': str or None
+                'error': str or None,
+                'skipped': bool（ホストへのリクエストが停止中でチェックしなかった場合True）
             }
         """
         try:
-            response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+            response = self.retry_policy.request(
+                self.session, 'HEAD', url, stage='link_check', allow_redirects=True
+            )
             
             return {
                 'is_valid': response.status_code == 200,
                 'status_code': response.status_code,
-                'error': None
+                'error': None,
+                'skipped': False
+            }
+        
+        except CircuitOpenError as e:
+            # ホスト全体の障害はリンク切れとは限らないため、有効・無効を判定しない
+            logger.warning(str(e))
+            return {
+                'is_valid': False,
+                'status_code': None,
+                'error': str(e),
+                'skipped': True
             }
         
         except requests.RequestException as e:
@@ -73,7 +97,8 @@ class LinkValidator:
             return {
                 'is_valid': False,
                 'status_code': None,
-                'error': str(e)
+                'error': str(e),
+                'skipped': False
             }
     
     def validate_exams(self, batch_size=50):
@@ -93,15 +118,19 @@ class LinkValidator:
         
         valid_count = 0
         invalid_count = 0
+        skipped_count = 0
         invalid_exams = []
         
         for i, exam in enumerate(exams, 1):
             result = self.check_url(exam.problem_url)
             
-            if result['is_valid']:
+            if result['skipped']:
+                skipped_count += 1
+            elif result['is_valid']:
                 valid_count += 1
                 exam.is_verified = True
-                exam.save(update_fields=['is_verified'])
+                with self.metrics.timer('db_write', host_of(exam.problem_url)):
+                    exam.save(update_fields=['is_verified'])
             else:
                 invalid_count += 1
                 invalid_exams.append({
@@ -110,17 +139,21 @@ class LinkValidator:
                     'status_code': result['status_code']
                 })
                 exam.is_verified = False
-                exam.save(update_fields=['is_verified'])
+                with self.metrics.timer('db_write', host_of(exam.problem_url)):
+                    exam.save(update_fields=['is_verified'])
             
             if i % 10 == 0:
                 logger.info(f"Progress: {i}/{total} ({i/total*100:.1f}%)")
         
-        logger.info(f"Validation complete: {valid_count} valid, {invalid_count} invalid")
+        logger.info(
+            f"Validation complete: {valid_count} valid, {invalid_count} invalid, {skipped_count} skipped"
+        )
         
         return {
             'total': total,
             'valid': valid_count,
             'invalid': invalid_count,
+            'skipped': skipped_count,
             'invalid_exams': invalid_exams
         }
     
@@ -135,30 +168,37 @@ class LinkValidator:
         
         active_count = 0
         inactive_count = 0
+        skipped_count = 0
         
         for i, source in enumerate(sources, 1):
             result = self.check_url(source.answer_url)
             
-            if result['is_valid']:
-                active_count += 1
-                source.is_active = True
-                source.last_checked_at = timezone.now()
+            if result['skipped']:
+                skipped_count += 1
             else:
-                inactive_count += 1
-                source.is_active = False
+                if result['is_valid']:
+                    active_count += 1
+                    source.is_active = True
+                else:
+                    inactive_count += 1
+                    source.is_active = False
                 source.last_checked_at = timezone.now()
-            
-            source.save(update_fields=['is_active', 'last_checked_at'])
+                
+                with self.metrics.timer('db_write', host_of(source.answer_url)):
+                    source.save(update_fields=['is_active', 'last_checked_at'])
             
             if i % 10 == 0:
                 logger.info(f"Progress: {i}/{total} ({i/total*100:.1f}%)")
         
-        logger.info(f"Validation complete: {active_count} active, {inactive_count} inactive")
+        logger.info(
+            f"Validation complete: {active_count} active, {inactive_count} inactive, {skipped_count} skipped"
+        )
         
         return {
             'total': total,
             'active': active_count,
-            'inactive': inactive_count
+            'inactive': inactive_count,
+            'skipped': skipped_count
         }
 
 
@@ -167,203 +207,297 @@ class DuplicateDetector:
     重複データの検出と削除
     """
     
-    @staticmethod
-    def find_duplicate_exams():
+    # 重複とみなすキー（DUPLICATE_CONFIG['include_department'] がTrueなら学部を追加）
+    KEY_FIELDS = ('university', 'year', 'subject', 'exam_type')
+    
+    @classmethod
+    def key_fields(cls, include_department=None):
+        """
+        重複判定のキーを取得
+        
+        Args:
+            include_department (bool): 学部をキーに含めるか（省略時は設定値）
+            
+        Returns:
+            tuple: Examのフィールド名
+        """
+        if include_department is None:
+            include_department = DUPLICATE_CONFIG['include_department']
+        return cls.KEY_FIELDS + ('department',) if include_department else cls.KEY_FIELDS
+    
+    @classmethod
+    def iter_duplicate_groups(cls, include_department=None):
+        """
+        重複している過去問をグループごとに順次取得
+        
+        ROW_NUMBER() とグループの件数をウィンドウ関数で求める1回のクエリで、
+        重複しているExamだけをキー順に読み込みます。
+        
+        Args:
+            include_department (bool): 学部をキーに含めるか（省略時は設定値）
+            
+        Yields:
+            list: 1グループのExamのリスト（作成日時の古い順）
+        """
+        key_fields = cls.key_fields(include_department)
+        partition = [F(field) for field in key_fields]
+        # 外部キーで並べると University.Meta.ordering（かな表記・学校名）順になり、
+        # 同名の大学のExamが交互に並んでグループの境界がずれるため、IDで並べる
+        ordering = [f'{field}_id' if field == 'university' else field for field in key_fields]
+        
+        exams = Exam.objects.select_related('university').annotate(
+            duplicate_rank=Window(RowNumber(), partition_by=partition, order_by=[F('created_at'), F('id')]),
+            group_size=Window(Count('id'), partition_by=partition),
+        ).filter(group_size__gt=1).order_by(*ordering, 'duplicate_rank')
+        
+        group = []
+        for exam in exams.iterator(chunk_size=DATABASE_CONFIG['batch_size']):
+            # 各グループの先頭（ROW_NUMBER = 1）で前のグループを確定する
+            if exam.duplicate_rank == 1 and group:
+                yield group
+                group = []
+            group.append(exam)
+        
+        if group:
+            yield group
+    
+    @classmethod
+    def find_duplicate_exams(cls, include_department=None):
         """
         重複している過去問を検出
         
+        Args:
+            include_department (bool): 学部をキーに含めるか（省略時は設定値）
+            
         Returns:
             list: 重複しているExamのリスト
         """
         logger.info("Detecting duplicate exams...")
         
-        # 同じ大学・年度・科目・試験種別の組み合わせでグループ化
-        duplicates = Exam.objects.values(
-            'university', 'year', 'subject', 'exam_type'
-        ).annotate(
-            count=Count('id')
-        ).filter(count__gt=1)
-        
         duplicate_groups = []
         
-        for dup in duplicates:
-            exams = Exam.objects.filter(
-                university_id=dup['university'],
-                year=dup['year'],
-                subject=dup['subject'],
-                exam_type=dup['exam_type']
-            ).order_by('created_at')
-            
-            duplicate_groups.append(list(exams))
-            logger.warning(f"Found {dup['count']} duplicates: {exams.first()}")
+        for group in cls.iter_duplicate_groups(include_department):
+            duplicate_groups.append(group)
+            logger.warning(f"Found {len(group)} duplicates: {group[0]}")
         
         logger.info(f"Found {len(duplicate_groups)} duplicate groups")
         return duplicate_groups
     
-    @staticmethod
-    def remove_duplicates(dry_run=True):
+    @classmethod
+    def remove_duplicates(cls, dry_run=True, include_department=None):
         """
         重複データを削除（最も古いものを残す）
         
         Args:
             dry_run (bool): Trueの場合は実際には削除しない
+            include_department (bool): 学部をキーに含めるか（省略時は設定値）
             
         Returns:
-            int: 削除された件数
+            int: 削除された件数（DRY RUNの場合は削除対象の件数）
         """
-        duplicate_groups = DuplicateDetector.find_duplicate_exams()
-        
-        deleted_count = 0
+        delete_ids = []
         
-        for group in duplicate_groups:
+        for group in cls.iter_duplicate_groups(include_department):
             # 最初（最も古い）のものを残して、残りを削除
             to_keep = group[0]
-            to_delete = group[1:]
-            
             logger.info(f"Keeping: {to_keep} (created: {to_keep.created_at})")
             
-            for exam in to_delete:
+            for exam in group[1:]:
                 logger.info(f"  Deleting: {exam} (created: {exam.created_at})")
-                
-                if not dry_run:
-                    exam.delete()
-                    deleted_count += 1
+                delete_ids.append(exam.id)
         
         if dry_run:
-            logger.info(f"DRY RUN: Would delete {len(to_delete)} duplicates")
-        else:
-            logger.info(f"Deleted {deleted_count} duplicates")
+            logger.info(f"DRY RUN: Would delete {len(delete_ids)} duplicates")
+            return len(delete_ids)
         
-        return deleted_count
+        # IDを指定してまとめて削除（解答ソース・お気に入りはCASCADEで削除）
+        batch_size = DATABASE_CONFIG['batch_size']
+        with transaction.atomic():
+            for i in range(0, len(delete_ids), batch_size):
+                Exam.objects.filter(id__in=delete_ids[i:i + batch_size]).delete()
+        
+        logger.info(f"Deleted {len(delete_ids)} duplicates")
+        return len(delete_ids)
 
 
 class DataQualityReporter:
     """
     データ品質レポートを生成
+    
+    集計は GROUP BY と条件付き集計（Count(filter=Q(...))）による数回のクエリで行い、
+    生成したレポートは DataQualitySnapshot にJSONで保存します。
     """
     
     @staticmethod
-    def generate_report():
+    def generate_report(save=True):
         """
         データ品質レポートを生成
         
+        Args:
+            save (bool): スナップショットとして保存するか
+            
         Returns:
-            dict: レポートデータ
+            dict: レポートデータ（JSONに変換できる値のみ）
         """
         logger.info("Generating data quality report...")
         
+        generated_at = timezone.now()
         report = {
-            'timestamp': datetime.now(),
+            'timestamp': timezone.localtime(generated_at).strftime('%Y-%m-%d %H:%M:%S'),
             'universities': {},
             'exams': {},
             'answer_sources': {},
         }
         
-        # 大学の統計
-        universities = University.objects.all()
-        report['universities'] = {
-            'total': universities.count(),
-            'with_exams': universities.annotate(
-                exam_count=Count('exams')
-            ).filter(exam_count__gt=0).count(),
-        }
+        # 大学の統計（過去問との結合で行が増えるため、大学IDの重複を除いて数える）
+        report['universities'] = University.objects.aggregate(
+            total=Count('id', distinct=True),
+            with_exams=Count('id', filter=Q(exams__isnull=False), distinct=True),
+        )
         
         # 過去問の統計
-        exams = Exam.objects.all()
-        report['exams'] = {
-            'total': exams.count(),
-            'verified': exams.filter(is_verified=True).count(),
-            'with_pdf': exams.exclude(problem_url='').count(),
-            'with_answers': exams.annotate(
-                answer_count=Count('answer_sources')
-            ).filter(answer_count__gt=0).count(),
-            'by_year': {},
-            'by_subject': {},
-        }
+        report['exams'] = Exam.objects.aggregate(
+            total=Count('id', distinct=True),
+            verified=Count('id', filter=Q(is_verified=True), distinct=True),
+            with_pdf=Count('id', filter=~Q(problem_url=''), distinct=True),
+            with_answers=Count('id', filter=Q(answer_sources__isnull=False), distinct=True),
+        )
         
         # 年度別統計
-        for year in range(2020, 2026):
-            count = exams.filter(year=year).count()
-            if count > 0:
-                report['exams']['by_year'][year] = count
+        report['exams']['by_year'] = {
+            row['year']: row['count']
+            for row in Exam.objects.values('year').annotate(count=Count('id')).order_by('year')
+        }
         
         # 科目別統計
-        for subject_code, subject_name in Exam.SUBJECT_CHOICES:
-            count = exams.filter(subject=subject_code).count()
-            if count > 0:
-                report['exams']['by_subject'][subject_name] = count
+        subject_names = dict(Exam.SUBJECT_CHOICES)
+        report['exams']['by_subject'] = {
+            subject_names.get(row['subject'], row['subject']): row['count']
+            for row in Exam.objects.values('subject').annotate(count=Count('id')).order_by('subject')
+        }
         
         # 解答ソースの統計
-        answer_sources = AnswerSource.objects.all()
-        report['answer_sources'] = {
-            'total': answer_sources.count(),
-            'active': answer_sources.filter(is_active=True).count(),
-            'with_detailed_explanation': answer_sources.filter(
-                has_detailed_explanation=True
-            ).count(),
-            'with_video': answer_sources.filter(
-                has_video_explanation=True
-            ).count(),
-            'by_provider': {},
-        }
+        report['answer_sources'] = AnswerSource.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            with_detailed_explanation=Count('id', filter=Q(has_detailed_explanation=True)),
+        )
         
         # 予備校別統計
-        for provider in answer_sources.values('provider_name').distinct():
-            count = answer_sources.filter(
-                provider_name=provider['provider_name']
-            ).count()
-            report['answer_sources']['by_provider'][provider['provider_name']] = count
+        report['answer_sources']['by_provider'] = {
+            row['provider_name']: row['count']
+            for row in AnswerSource.objects.values('provider_name').annotate(
+                count=Count('id')
+            ).order_by('provider_name')
+        }
+        
+        if save:
+            DataQualitySnapshot.objects.create(generated_at=generated_at, report=report)
         
         return report
     
     @staticmethod
-    def print_report(report):
+    def latest_snapshot(before=None):
         """
-        レポートをコンソールに出力
+        保存済みの最新のレポートを取得
         
         Args:
-            report (dict): generate_report()の戻り値
+            before (datetime): この日時より前に生成したものに限る
+            
+        Returns:
+            dict: レポートデータ、保存済みのものがなければNone
         """
-        print("\n" + "=" * 80)
-        print("データ品質レポート")
-        print("=" * 80)
-        print(f"生成日時: {report['timestamp']}")
-        print()
-        
-        print("【大学】")
-        print(f"  総数: {report['universities']['total']}")
-        print(f"  過去問あり: {report['universities']['with_exams']}")
-        print()
-        
-        print("【過去問】")
-        print(f"  総数: {report['exams']['total']}")
-        print(f"  検証済み: {report['exams']['verified']}")
-        print(f"  PDF有り: {report['exams']['with_pdf']}")
-        print(f"  解答有り: {report['exams']['with_answers']}")
-        print()
-        
-        print("  年度別:")
-        for year, count in sorted(report['exams']['by_year'].items()):
-            print(f"    {year}年: {count}件")
-        print()
+        snapshots = DataQualitySnapshot.objects.all()
+        if before:
+            snapshots = snapshots.filter(generated_at__lt=before)
+        snapshot = snapshots.order_by('-generated_at').first()
+        return snapshot.report if snapshot else None
+    
+    @staticmethod
+    def format_report(report, previous=None):
+        """
+        レポートを表示用の行に変換
         
-        print("  科目別:")
-        for subject, count in sorted(report['exams']['by_subject'].items()):
-            print(f"    {subject}: {count}件")
-        print()
+        Args:
+            report (dict): generate_report()の戻り値
+            previous (dict): 比較対象のレポート（指定すると前回からの増減を表示）
+            
+        Returns:
+            list: 行のリスト
+        """
+        def count(section, key, sub=None, unit=''):
+            value = report[section][key] if sub is None else report[section][sub][key]
+            if previous is None:
+                return f"{value}{unit}"
+            
+            # スナップショットはJSONのため、年度などのキーは文字列になっている
+            old = previous.get(section, {})
+            if sub is not None:
+                old = old.get(sub, {})
+            old_value = old.get(key, old.get(str(key), 0))
+            diff = value - old_value
+            return f"{value}{unit} ({diff:+d})" if diff else f"{value}{unit}"
+        
+        lines = [
+            "=" * 80,
+            "データ品質レポート",
+            "=" * 80,
+            f"生成日時: {report['timestamp']}",
+        ]
+        if previous is not None:
+            lines.append(f"比較対象: {previous['timestamp']}")
+        lines.append("")
+        
+        lines.append("【大学】")
+        lines.append(f"  総数: {count('universities', 'total')}")
+        lines.append(f"  過去問あり: {count('universities', 'with_exams')}")
+        lines.append("")
+        
+        lines.append("【過去問】")
+        lines.append(f"  総数: {count('exams', 'total')}")
+        lines.append(f"  検証済み: {count('exams', 'verified')}")
+        lines.append(f"  PDF有り: {count('exams', 'with_pdf')}")
+        lines.append(f"  解答有り: {count('exams', 'with_answers')}")
+        lines.append("")
+        
+        if report['exams']['by_year']:
+            lines.append("  年度別:")
+            for year in sorted(report['exams']['by_year']):
+                lines.append(f"    {year}年: {count('exams', year, 'by_year', '件')}")
+            lines.append("")
+        
+        if report['exams']['by_subject']:
+            lines.append("  科目別:")
+            for subject in sorted(report['exams']['by_subject']):
+                lines.append(f"    {subject}: {count('exams', subject, 'by_subject', '件')}")
+            lines.append("")
+        
+        lines.append("【解答ソース】")
+        lines.append(f"  総数: {count('answer_sources', 'total')}")
+        lines.append(f"  有効: {count('answer_sources', 'active')}")
+        lines.append(f"  詳細解説あり: {count('answer_sources', 'with_detailed_explanation')}")
+        lines.append("")
+        
+        if report['answer_sources']['by_provider']:
+            lines.append("  予備校別:")
+            for provider in sorted(report['answer_sources']['by_provider']):
+                lines.append(f"    {provider}: {count('answer_sources', provider, 'by_provider', '件')}")
+        
+        lines.append("=" * 80)
+        return lines
+    
+    @staticmethod
+    def print_report(report, previous=None):
+        """
+        レポートをコンソールに出力
         
-        print("【解答ソース】")
-        print(f"  総数: {report['answer_sources']['total']}")
-        print(f"  有効: {report['answer_sources']['active']}")
-        print(f"  詳細解説あり: {report['answer_sources']['with_detailed_explanation']}")
-        print(f"  動画解説あり: {report['answer_sources']['with_video']}")
+        Args:
+            report (dict): generate_report()の戻り値
+            previous (dict): 比較対象のレポート（指定すると前回からの増減を表示）
+        """
         print()
-        
-        print("  予備校別:")
-        for provider, count in sorted(report['answer_sources']['by_provider'].items()):
-            print(f"    {provider}: {count}件")
-        
-        print("=" * 80)
+        for line in DataQualityReporter.format_report(report, previous):
+            print(line)
 
 
 def main():
@@ -392,11 +526,11 @@ def main():
         
         print("\n過去問PDFリンクを検証中...")
         exam_result = validator.validate_exams()
-        print(f"結果: {exam_result['valid']}件有効, {exam_result['invalid']}件無効")
+        print(f"結果: {exam_result['valid']}件有効, {exam_result['invalid']}件無効, {exam_result['skipped']}件未確認")
         
         print("\n解答ソースリンクを検証中...")
         answer_result = validator.validate_answer_sources()
-        print(f"結果: {answer_result['active']}件有効, {answer_result['inactive']}件無効")
+        print(f"結果: {answer_result['active']}件有効, {answer_result['inactive']}件無効, {answer_result['skipped']}件未確認")
     
     elif choice == "2":
         # 重複検出
@@ -416,8 +550,9 @@ def main():
     elif choice == "4":
         # データ品質レポート
         reporter = DataQualityReporter()
+        previous = reporter.latest_snapshot()
         report = reporter.generate_report()
-        reporter.print_report(report)
+        reporter.print_report(report, previous)
     
     else:
         print("終了します")
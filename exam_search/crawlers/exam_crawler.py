@@ -25,7 +25,16 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'exam_search.settings')
 django.setup()
 
-from exams.models import University, Exam, AnswerSource
+from exams.models import Exam, AnswerSource
+from exams.subject_classifier import classify_subject
+from exams.canonical import canonicalize
+from exams.university_index import get_university_index
+from crawler_config import RESPECT_ROBOTS_TXT, DATABASE_CONFIG
+from robots_cache import get_robots_cache
+from link_extractor import extract_links, href_contains
+from crawler_metrics import get_metrics, host_of
+from http_policy import RetryPolicy
+from ingest_pipeline import Pipeline, BatchSink
 
 # ロギング設定
 logging.basicConfig(
@@ -44,41 +53,113 @@ class BaseCrawler:
     クローラーの基底クラス
     """
     
-    def __init__(self, delay=2.0):
+    def __init__(self, delay=2.0, respect_robots=RESPECT_ROBOTS_TXT):
         """
         Args:
             delay (float): リクエスト間の遅延時間（秒）
+            respect_robots (bool): robots.txtを遵守するか
         """
         self.delay = delay
+        self.respect_robots = respect_robots
+        self.robots = get_robots_cache() if respect_robots else None
+        self.metrics = get_metrics()
+        self.retry_policy = RetryPolicy()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+
+    def _request_delay(self, url):
+        """
+        リクエスト間隔を決定（robots.txtのCrawl-delayが長ければそちらを優先）
+        """
+        if not self.robots:
+            return self.delay
+
+        crawl_delay = self.robots.crawl_delay(url)
+        if crawl_delay is not None and crawl_delay > self.delay:
+            return crawl_delay
+        return self.delay
     
-    def fetch_page(self, url):
+    def fetch_response(self, url):
         """
-        URLからHTMLを取得
+        URLにリクエストを送信してレスポンスを取得
         
         Args:
             url (str): 取得するURL
             
         Returns:
-            BeautifulSoup: パースされたHTML、失敗時はNone
+            requests.Response: レスポンス、失敗時はNone
         """
+        if self.robots and not self.robots.is_allowed(url):
+            logger.warning(f"Crawling not allowed by robots.txt: {url}")
+            return None
+
         try:
             logger.info(f"Fetching: {url}")
-            response = self.session.get(url, timeout=10)
+            # リトライ・ホストごとの停止・リクエスト間隔の調整は RetryPolicy が行う
+            response = self.retry_policy.request(
+                self.session, 'GET', url, min_delay=self._request_delay(url)
+            )
             response.raise_for_status()
             
-            # リクエスト間隔を空ける
-            time.sleep(self.delay)
-            
-            return BeautifulSoup(response.content, 'html.parser')
+            return response
         
         except requests.RequestException as e:
             logger.error(f"Failed to fetch {url}: {e}")
             return None
     
+    def fetch_page(self, url):
+        """
+        URLからHTMLを取得
+        
+        Args:
+            url (str): 取得するURL
+            
+        Returns:
+            BeautifulSoup: パースされたHTML、失敗時はNone
+        """
+        response = self.fetch_response(url)
+        if response is None:
+            return None
+        
+        with self.metrics.timer('parse', host_of(url)):
+            return BeautifulSoup(response.content, 'lxml')
+    
+    def fetch_links(self, url, href_filter=None, with_context=False):
+        """
+        URLからリンクのみを抽出（文書全体のツリーは構築しない）
+        
+        Args:
+            url (str): 取得するURL
+            href_filter (callable): hrefを受け取り、対象ならTrueを返す関数
+            with_context (bool): 親要素・テーブル行のテキストも取得するか
+            
+        Returns:
+            list: LinkRecordのリスト、失敗時は空リスト
+        """
+        response = self.fetch_response(url)
+        if response is None:
+            return []
+        
+        with self.metrics.timer('parse', host_of(url)):
+            return extract_links(
+                response.content, response.url,
+                href_filter=href_filter, with_context=with_context,
+                encoding=self.response_encoding(response)
+            )
+    
+    @staticmethod
+    def response_encoding(response):
+        """
+        HTTPヘッダーで指定された文字コードを取得
+        
+        未指定時の requests の既定値（ISO-8859-1）は使わず、
+        文書内の宣言に任せるためにNoneを返します。
+        """
+        content_type = response.headers.get('Content-Type', '').lower()
+        return response.encoding if 'charset' in content_type else None
+    
     def save_to_db(self, data):
         """
         データをデータベースに保存（サブクラスで実装）
@@ -101,16 +182,20 @@ class UniversityExamCrawler(BaseCrawler):
             delay (float): リクエスト間隔
         """
         super().__init__(delay)
-        self.university_name = university_name
+        self.university_name = canonicalize('university', university_name)
         self.base_url = base_url
-        self.university = self._get_or_create_university()
+        self.university_id = self._get_or_create_university()
     
     def _get_or_create_university(self):
         """
-        Universityモデルの取得または作成
+        Universityモデルの取得または作成（旧名称や公式サイトのドメインからも解決）
+
+        Returns:
+            int: University ID
         """
-        university, created = University.objects.get_or_create(
-            name=self.university_name,
+        university_id, created = get_university_index().get_or_create(
+            self.university_name,
+            url=self.base_url,
             defaults={
                 'school_type': 'university',
                 'official_url': self.base_url
@@ -122,7 +207,7 @@ class UniversityExamCrawler(BaseCrawler):
         else:
             logger.info(f"Found existing university: {self.university_name}")
         
-        return university
+        return university_id
     
     def crawl_exam_list(self):
         """
@@ -130,46 +215,49 @@ class UniversityExamCrawler(BaseCrawler):
         
         注意: 実際のHTML構造に合わせてセレクターを調整する必要があります
         """
-        soup = self.fetch_page(self.base_url)
-        if not soup:
-            return []
+        exams_data = list(self.iter_exams())
         
-        exams_data = []
+        logger.info(f"Found {len(exams_data)} exams for {self.university_name}")
+        return exams_data
+    
+    def iter_exams(self):
+        """
+        過去問データを1件ずつ生成するジェネレーター（ingest_pipeline のソースとして使う）
         
+        Yields:
+            dict: 過去問データ
+        """
         # 例: 過去問リンクを含む要素を探す
         # 実際のHTMLに合わせて調整してください
-        exam_links = soup.select('a[href*="kakomon"], a[href*="past"], a[href*=".pdf"]')
+        exam_links = self.fetch_links(
+            self.base_url,
+            href_filter=href_contains('kakomon', 'past', '.pdf')
+        )
         
         for link in exam_links:
             try:
                 exam_data = self._parse_exam_link(link)
-                if exam_data:
-                    exams_data.append(exam_data)
             except Exception as e:
                 logger.error(f"Error parsing exam link: {e}")
-        
-        logger.info(f"Found {len(exams_data)} exams for {self.university_name}")
-        return exams_data
+                continue
+            if exam_data:
+                yield exam_data
     
-    def _parse_exam_link(self, link_element):
+    def _parse_exam_link(self, link):
         """
-        リンク要素から過去問情報を抽出
+        リンクから過去問情報を抽出
         
         Args:
-            link_element: BeautifulSoupのリンク要素
+            link (LinkRecord): 抽出済みのリンク
             
         Returns:
             dict: 過去問データ、抽出失敗時はNone
         """
-        href = link_element.get('href')
-        if not href:
-            return None
-        
-        # 相対URLを絶対URLに変換
-        problem_url = urljoin(self.base_url, href)
+        # 相対URLは抽出時に絶対URLへ変換済み
+        problem_url = link.url
         
         # リンクテキストから情報を抽出
-        text = link_element.get_text(strip=True)
+        text = link.text
         
         # 年度を抽出（例: "2024年度"などから）
         year = self._extract_year(text)
@@ -177,10 +265,10 @@ class UniversityExamCrawler(BaseCrawler):
             return None
         
         # 科目を推測
-        subject = self._guess_subject(text)
+        subject = classify_subject(text).subject
         
         return {
-            'university': self.university,
+            'university_id': self.university_id,
             'year': year,
             'subject': subject,
             'problem_url': problem_url,
@@ -214,52 +302,26 @@ class UniversityExamCrawler(BaseCrawler):
         
         return None
     
-    def _guess_subject(self, text):
-        """
-        テキストから科目を推測
-        
-        Args:
-            text (str): 抽出元テキスト
-            
-        Returns:
-            str: 科目コード
-        """
-        text_lower = text.lower()
-        
-        subject_keywords = {
-            'math': ['数学', 'mathematics', 'math'],
-            'english': ['英語', 'english'],
-            'japanese': ['国語', 'japanese', '現代文', '古文', '漢文'],
-            'physics': ['物理', 'physics'],
-            'chemistry': ['化学', 'chemistry'],
-            'biology': ['生物', 'biology'],
-            'history': ['日本史', '世界史', 'history'],
-            'geography': ['地理', 'geography'],
-        }
-        
-        for subject_code, keywords in subject_keywords.items():
-            for keyword in keywords:
-                if keyword in text or keyword.lower() in text_lower:
-                    return subject_code
-        
-        return 'other'
-    
     def save_to_db(self, exams_data):
         """
         抽出した過去問データをデータベースに保存
         
         Args:
             exams_data (list): 過去問データのリスト
+            
+        Returns:
+            int: 新規作成した件数
         """
         saved_count = 0
+        started = time.monotonic()
         
         for exam_data in exams_data:
             try:
                 exam, created = Exam.objects.update_or_create(
-                    university=exam_data['university'],
+                    university_id=exam_data['university_id'],
                     year=exam_data['year'],
                     subject=exam_data['subject'],
-                    exam_type='一般入試',
+                    exam_type=canonicalize('exam_type', exam_data.get('exam_type')),
                     defaults={
                         'problem_url': exam_data['problem_url'],
                         'description': exam_data['description'],
@@ -277,7 +339,12 @@ class UniversityExamCrawler(BaseCrawler):
             except Exception as e:
                 logger.error(f"Error saving exam: {e}")
         
+        self.metrics.observe(
+            'crawler_stage_seconds', time.monotonic() - started,
+            host=host_of(self.base_url), stage='db_write'
+        )
         logger.info(f"Saved {saved_count} new exams to database")
+        return saved_count
 
 
 class YobiSchoolAnswerCrawler(BaseCrawler):
@@ -309,42 +376,49 @@ class YobiSchoolAnswerCrawler(BaseCrawler):
         Returns:
             list: 解答データのリスト
         """
-        # 検索URLを構築（予備校サイトの構造に合わせて調整）
-        search_url = f"{self.base_url}?university={university_name}&year={year}"
+        answers_data = list(self.iter_answers(university_name, year))
         
-        soup = self.fetch_page(search_url)
-        if not soup:
-            return []
+        logger.info(f"Found {len(answers_data)} answers for {university_name} ({year})")
+        return answers_data
+    
+    def iter_answers(self, university_name, year):
+        """
+        解答データを1件ずつ生成するジェネレーター（ingest_pipeline のソースとして使う）
         
-        answers_data = []
+        Args:
+            university_name (str): 大学名
+            year (int): 年度
+            
+        Yields:
+            dict: 解答データ
+        """
+        # 検索URLを構築（予備校サイトの構造に合わせて調整）
+        search_url = f"{self.base_url}?university={university_name}&year={year}"
         
         # 解答リンクを抽出（実際のHTMLに合わせて調整）
-        answer_links = soup.select('a[href*="answer"], a[href*="kaisetsu"]')
+        answer_links = self.fetch_links(
+            search_url,
+            href_filter=href_contains('answer', 'kaisetsu')
+        )
         
         for link in answer_links:
             try:
                 answer_data = self._parse_answer_link(link, university_name, year)
-                if answer_data:
-                    answers_data.append(answer_data)
             except Exception as e:
                 logger.error(f"Error parsing answer link: {e}")
-        
-        logger.info(f"Found {len(answers_data)} answers for {university_name} ({year})")
-        return answers_data
+                continue
+            if answer_data:
+                yield answer_data
     
-    def _parse_answer_link(self, link_element, university_name, year):
+    def _parse_answer_link(self, link, university_name, year):
         """
-        解答リンクから情報を抽出
+        解答リンク（LinkRecord）から情報を抽出
         """
-        href = link_element.get('href')
-        if not href:
-            return None
-        
-        answer_url = urljoin(self.base_url, href)
-        text = link_element.get_text(strip=True)
+        answer_url = link.url
+        text = link.text
         
         # 科目を推測
-        subject = self._guess_subject(text)
+        subject = classify_subject(text).subject
         
         # 詳細解説・動画の有無をチェック
         has_detailed = '解説' in text or 'detailed' in text.lower()
@@ -361,27 +435,19 @@ class YobiSchoolAnswerCrawler(BaseCrawler):
             'reliability_score': 8,  # デフォルト値
         }
     
-    def _guess_subject(self, text):
-        """科目を推測（UniversityExamCrawlerと同じロジック）"""
-        # 簡略化のため省略（実際は上記と同じ実装）
-        if '数学' in text or 'math' in text.lower():
-            return 'math'
-        elif '英語' in text or 'english' in text.lower():
-            return 'english'
-        # ... 他の科目も同様
-        return 'other'
-    
     def save_to_db(self, answers_data):
         """
         解答データをデータベースに保存
         """
         saved_count = 0
+        started = time.monotonic()
+        university_index = get_university_index()
         
         for answer_data in answers_data:
             try:
-                # 対応するExamを検索
+                # 対応するExamを検索（大学は別名の索引から解決）
                 exam = Exam.objects.filter(
-                    university__name=answer_data['university_name'],
+                    university_id=university_index.resolve(name=answer_data['university_name']),
                     year=answer_data['year'],
                     subject=answer_data['subject']
                 ).first()
@@ -397,7 +463,6 @@ class YobiSchoolAnswerCrawler(BaseCrawler):
                     defaults={
                         'answer_url': answer_data['answer_url'],
                         'has_detailed_explanation': answer_data['has_detailed_explanation'],
-                        'has_video_explanation': answer_data['has_video_explanation'],
                         'reliability_score': answer_data['reliability_score'],
                         'last_checked_at': datetime.now(),
                         'is_active': True,
@@ -413,12 +478,20 @@ class YobiSchoolAnswerCrawler(BaseCrawler):
             except Exception as e:
                 logger.error(f"Error saving answer source: {e}")
         
+        self.metrics.observe(
+            'crawler_stage_seconds', time.monotonic() - started,
+            host=host_of(self.base_url), stage='db_write'
+        )
         logger.info(f"Saved {saved_count} new answer sources to database")
+        return saved_count
 
 
 class RobotsTxtChecker:
     """
     robots.txtをチェックしてクロール可否を判定
+
+    robots.txtはホストごとにキャッシュされるため、URLごとに呼び出しても
+    取得はTTL（ROBOTS_TXT_CONFIG['ttl']）あたり1回です。
     """
     
     @staticmethod
@@ -433,17 +506,8 @@ class RobotsTxtChecker:
         Returns:
             bool: クロール可能ならTrue
         """
-        from urllib.robotparser import RobotFileParser
-        
-        parsed = urlparse(url)
-        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-        
         try:
-            rp = RobotFileParser()
-            rp.set_url(robots_url)
-            rp.read()
-            
-            is_allowed = rp.can_fetch(user_agent, url)
+            is_allowed = get_robots_cache().is_allowed(url, user_agent)
             logger.info(f"robots.txt check for {url}: {is_allowed}")
             
             return is_allowed
@@ -478,8 +542,11 @@ def main():
         delay=3.0  # 3秒間隔
     )
     
-    exams_data = tokyo_crawler.crawl_exam_list()
-    tokyo_crawler.save_to_db(exams_data)
+    # 抽出した過去問を順次まとめて保存（一覧全体の抽出完了を待たない）
+    Pipeline(
+        tokyo_crawler.iter_exams(),
+        sink=BatchSink(tokyo_crawler.save_to_db, batch_size=DATABASE_CONFIG['batch_size'])
+    ).run()
     
     # 例2: 河合塾の解答をクロール
     kawaijuku_url = "https://www.keinet.ne.jp/exam/past/"
@@ -490,8 +557,10 @@ def main():
         delay=3.0
     )
     
-    answers_data = kawaijuku_crawler.crawl_answers("東京大学", 2024)
-    kawaijuku_crawler.save_to_db(answers_data)
+    Pipeline(
+        kawaijuku_crawler.iter_answers("東京大学", 2024),
+        sink=BatchSink(kawaijuku_crawler.save_to_db, batch_size=DATABASE_CONFIG['batch_size'])
+    ).run()
     
     logger.info("=" * 60)
     logger.info("クローラー終了")
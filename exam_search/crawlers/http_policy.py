@@ -0,0 +1,344 @@
+"""
+HTTPリクエストの共通方針（リトライ・サーキットブレーカー・ペース調整）
+
+crawler_config.ERROR_HANDLING の設定で、すべてのクローラーが同じ方針でリクエストします。
+
+- リトライ: 接続エラー・タイムアウト・429/5xx をジッター付き指数バックオフで再試行
+  （Retry-After ヘッダーがあればそれ以上待つ）
+- サーキットブレーカー: ホストごとに連続失敗が閾値に達したら一定時間リクエストを止め、
+  停止中のホストへのリクエストは即座に CircuitOpenError にする
+- ペース調整: ホストごとの応答時間（指数移動平均）と 429/503 に応じてリクエスト間隔を伸縮
+
+サーキットブレーカーとペース調整の状態はホストごとにプロセス内で共有されます。
+
+使用例:
+    policy = RetryPolicy()
+    response = policy.request(session, 'GET', url, min_delay=2.0)
+"""
+
+import logging
+import random
+import threading
+import time
+
+import requests
+
+from crawler_config import ERROR_HANDLING
+from crawler_metrics import get_metrics, host_of
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(requests.RequestException):
+    """サーキットブレーカーが開いている（停止中の）ホストへのリクエスト"""
+
+
+class CircuitBreaker:
+    """
+    ホスト単位のサーキットブレーカー
+
+    closed（通常）→ 連続失敗が閾値に達すると open（停止）→ reset_timeout 経過後に
+    half_open（1件だけ試行）→ 成功すれば closed、失敗すれば再び open
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        """
+        Args:
+            failure_threshold (int): 停止するまでの連続失敗回数
+            reset_timeout (float): 停止してから試行を再開するまでの時間（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        リクエストしてよいか判定
+
+        Returns:
+            bool: リクエストしてよければTrue
+        """
+        with self._lock:
+            if self.state == 'closed':
+                return True
+
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = 'half_open'
+                self._probing = False
+
+            # half_open: 同時に試行するのは1件だけ
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def retry_after(self):
+        """試行を再開するまでの残り時間（秒）"""
+        if self.state != 'open':
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """
+        失敗を記録
+
+        Returns:
+            bool: この失敗で停止状態になった場合True
+        """
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == 'half_open' or (
+                self.state == 'closed' and self.failures >= self.failure_threshold
+            ):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class AdaptivePacer:
+    """
+    ホスト単位のリクエスト間隔の調整
+
+    間隔 = max(最小間隔, 応答時間の平均 × latency_factor) × slowdown
+    slowdown は 429/503 を受けると2倍になり、それ以外の応答ごとに少しずつ1に戻ります。
+    """
+
+    def __init__(self, max_delay, latency_factor, smoothing=0.3, recovery=0.9):
+        """
+        Args:
+            max_delay (float): 間隔の上限（秒）
+            latency_factor (float): 応答時間に対する間隔の倍率
+            smoothing (float): 応答時間の指数移動平均の係数
+            recovery (float): 正常な応答ごとに slowdown に掛ける係数
+        """
+        self.max_delay = max_delay
+        self.latency_factor = latency_factor
+        self.smoothing = smoothing
+        self.recovery = recovery
+        self.latency = None
+        self.slowdown = 1.0
+        self._next_start = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self, min_delay=0.0):
+        """現在のリクエスト間隔（秒）"""
+        base = min_delay
+        if self.latency is not None:
+            base = max(base, self.latency * self.latency_factor)
+        return min(self.max_delay, base * self.slowdown)
+
+    def wait(self, min_delay=0.0):
+        """
+        前回のリクエストから間隔を空ける
+
+        複数のスレッドから呼ばれた場合も、開始時刻を順番に予約して間隔を守ります。
+
+        Args:
+            min_delay (float): 最小間隔（設定値やrobots.txtのCrawl-delay）
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start, self._blocked_until)
+            self._next_start = start + self.delay(min_delay)
+
+        if start > now:
+            time.sleep(start - now)
+
+    def observe(self, latency, status_code):
+        """
+        応答を記録して間隔を調整
+
+        Args:
+            latency (float): 応答時間（秒）
+            status_code (int): ステータスコード
+        """
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency = self.smoothing * latency + (1 - self.smoothing) * self.latency
+
+            if status_code in (429, 503):
+                self.slowdown = min(self.slowdown * 2, self.max_delay)
+            else:
+                self.slowdown = max(1.0, self.slowdown * self.recovery)
+
+    def block_for(self, seconds):
+        """指定時間リクエストを止める（Retry-After ヘッダー用）"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+_breakers = {}
+_pacers = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(host):
+    """ホストのサーキットブレーカーを取得（プロセス内で共有）"""
+    with _registry_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(
+                ERROR_HANDLING['circuit_failure_threshold'],
+                ERROR_HANDLING['circuit_reset_timeout'],
+            )
+        return _breakers[host]
+
+
+def get_pacer(host):
+    """ホストのペース調整を取得（プロセス内で共有）"""
+    with _registry_lock:
+        if host not in _pacers:
+            _pacers[host] = AdaptivePacer(
+                ERROR_HANDLING['max_request_delay'],
+                ERROR_HANDLING['latency_factor'],
+            )
+        return _pacers[host]
+
+
+def parse_retry_after(response):
+    """
+    Retry-After ヘッダーの秒数を取得
+
+    Returns:
+        float: 秒数、指定がない（または日時形式の）場合はNone
+    """
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After', '').strip()
+    if value.isdigit():
+        return float(value)
+    return None
+
+
+class RetryPolicy:
+    """
+    リトライの方針（設定値は ERROR_HANDLING）
+    """
+
+    def __init__(self, max_retries=None, retry_delay=None, max_retry_delay=None,
+                 timeout=None, retry_statuses=None):
+        """
+        Args:
+            max_retries (int): 最大リトライ回数（初回を含まない）
+            retry_delay (float): バックオフの基準時間（秒）
+            max_retry_delay (float): バックオフの上限（秒）
+            timeout (float): 1回のリクエストのタイムアウト（秒）
+            retry_statuses (tuple): リトライするステータスコード
+        """
+        self.max_retries = ERROR_HANDLING['max_retries'] if max_retries is None else max_retries
+        self.retry_delay = retry_delay or ERROR_HANDLING['retry_delay']
+        self.max_retry_delay = max_retry_delay or ERROR_HANDLING['max_retry_delay']
+        self.timeout = timeout or ERROR_HANDLING['timeout']
+        self.retry_statuses = tuple(retry_statuses or ERROR_HANDLING['retry_statuses'])
+        self.metrics = get_metrics()
+
+    def backoff(self, attempt):
+        """
+        リトライまでの待ち時間（ジッター付き指数バックオフ）
+
+        Args:
+            attempt (int): リトライ回数（1から）
+
+        Returns:
+            float: 秒数（上限の半分〜上限の範囲でランダム）
+        """
+        cap = min(self.max_retry_delay, self.retry_delay * (2 ** (attempt - 1)))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def request(self, session, method, url, min_delay=0.0, stage='fetch', max_retries=None, **kwargs):
+        """
+        リトライ・サーキットブレーカー・ペース調整を適用してリクエスト
+
+        リトライしても失敗した場合、接続エラーはそのまま送出し、
+        ステータスコードによる失敗は最後のレスポンスを返します（raise_for_status は呼び出し側）。
+
+        Args:
+            session (requests.Session): セッション
+            method (str): HTTPメソッド
+            url (str): URL
+            min_delay (float): ホストへのリクエストの最小間隔（秒）
+            stage (str): メトリクスの処理段階（fetch / link_check など）
+            max_retries (int): 最大リトライ回数（省略時は設定値）
+            **kwargs: session.request に渡す引数
+
+        Returns:
+            requests.Response: レスポンス
+
+        Raises:
+            CircuitOpenError: ホストへのリクエストが停止中の場合
+            requests.RequestException: リトライしても接続できなかった場合
+        """
+        host = host_of(url)
+        breaker = get_breaker(host)
+        pacer = get_pacer(host)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(
+                    f"Circuit open for {host}, skipping {url} (retry in {breaker.retry_after():.0f}s)"
+                )
+
+            pacer.wait(min_delay)
+
+            response = None
+            error = None
+            started = time.monotonic()
+            try:
+                with self.metrics.timer(stage, host):
+                    response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except requests.RequestException:
+                # URL不正などはホストの障害ではないため、そのまま送出する
+                breaker.record_success()
+                raise
+
+            if response is not None:
+                pacer.observe(time.monotonic() - started, response.status_code)
+                self.metrics.record_response(host, response.status_code, len(response.content))
+
+                if response.status_code not in self.retry_statuses:
+                    breaker.record_success()
+                    return response
+
+            if breaker.record_failure():
+                logger.warning(
+                    f"Circuit opened for {host} after {breaker.failures} consecutive failures "
+                    f"(paused for {breaker.reset_timeout}s)"
+                )
+
+            attempt += 1
+            reason = error or f"HTTP {response.status_code}"
+            if attempt > max_retries or breaker.state == 'open':
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self.backoff(attempt)
+            retry_after = parse_retry_after(response)
+            if retry_after is not None:
+                pacer.block_for(retry_after)
+                delay = max(delay, retry_after)
+
+            self.metrics.inc('crawler_retries_total', host=host)
+            logger.info(f"Retrying {url} in {delay:.1f}s ({attempt}/{max_retries}): {reason}")
+            time.sleep(delay)
@@ -0,0 +1,261 @@
+"""
+ストリーミング取り込みパイプライン
+
+取得 → パース → 正規化 → 重複除去 → DB書き込み の各段階をジェネレーターとして
+つなぎ、段階の間を上限付きのキューで接続します。
+
+- 各段階は別スレッドで動き、キューが一杯になると上流が待つ（バックプレッシャー）
+- レコードは BatchSink で一定件数または一定時間ごとにまとめて書き込むため、
+  データ全体を読み終える前から順次DBに反映されます
+- メモリ使用量はキューとバッチの大きさで決まり、入力の件数には依存しません
+
+使用例:
+    pipeline = Pipeline(
+        read_rows(csv_file),
+        map_stage(normalize_row),
+        dedupe_stage(lambda record: record['pdf_url']),
+        sink=BatchSink(write_batch, batch_size=200),
+    )
+    stats = pipeline.run()
+"""
+
+import logging
+import queue
+import threading
+import time
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 100
+
+# キューの終端を示す目印
+_END = object()
+
+
+class PipelineError(Exception):
+    """パイプラインの段階で発生した例外"""
+
+
+def map_stage(func):
+    """
+    レコードを1件ずつ変換する段階（Noneを返したレコードは捨てる）
+
+    Args:
+        func (callable): レコードを受け取り、変換後のレコードまたはNoneを返す関数
+    """
+    def stage(records):
+        for record in records:
+            result = func(record)
+            if result is not None:
+                yield result
+    stage.__name__ = getattr(func, '__name__', 'map')
+    return stage
+
+
+def flat_map_stage(func):
+    """
+    1件のレコードから複数のレコードを生成する段階（例: URL → ページ内の過去問）
+
+    Args:
+        func (callable): レコードを受け取り、レコードのイテラブルを返す関数
+    """
+    def stage(records):
+        for record in records:
+            yield from func(record) or ()
+    stage.__name__ = getattr(func, '__name__', 'flat_map')
+    return stage
+
+
+def dedupe_stage(key):
+    """
+    同じキーのレコードを最初の1件だけ通す段階
+
+    Args:
+        key (callable): レコードから重複判定のキーを返す関数
+    """
+    def stage(records):
+        seen = set()
+        for record in records:
+            record_key = key(record)
+            if record_key in seen:
+                continue
+            seen.add(record_key)
+            yield record
+    stage.__name__ = 'dedupe'
+    return stage
+
+
+class BatchSink:
+    """
+    レコードをまとめてDBに書き込む終端
+
+    batch_size 件たまるか、最初のレコードから flush_interval 秒経過した時点で
+    write_batch を呼び出します。
+    """
+
+    def __init__(self, write_batch, batch_size=100, flush_interval=2.0):
+        """
+        Args:
+            write_batch (callable): レコードのリストを受け取り、書き込んだ件数を返す関数
+            batch_size (int): 1回の書き込みの最大件数
+            flush_interval (float): 書き込みを待つ最大時間（秒）
+        """
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {'records': 0, 'written': 0, 'batches': 0}
+        self._batch = []
+        self._batch_started = None
+
+    def add(self, record):
+        if not self._batch:
+            self._batch_started = time.monotonic()
+        self._batch.append(record)
+        self.stats['records'] += 1
+
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def due(self):
+        """待ち時間を過ぎたバッチがあるか"""
+        return bool(self._batch) and time.monotonic() - self._batch_started >= self.flush_interval
+
+    def flush(self):
+        """たまっているレコードを書き込む"""
+        if not self._batch:
+            return
+
+        batch, self._batch = self._batch, []
+        written = self.write_batch(batch)
+        self.stats['batches'] += 1
+        self.stats['written'] += written if written is not None else len(batch)
+
+
+class Pipeline:
+    """
+    ソースから終端までの段階を上限付きキューでつないだパイプライン
+
+    ソースと各段階はそれぞれ別スレッドで実行し、終端（BatchSink）は
+    run() を呼び出したスレッドで実行します。DB書き込みは終端でのみ行うのが前提です。
+    """
+
+    def __init__(self, source, *stages, sink, queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            source (iterable): レコードを生成するイテラブル（ジェネレーターなど）
+            *stages (callable): イテレーターを受け取りイテレーターを返す段階
+            sink (BatchSink): 終端
+            queue_size (int): 段階の間のキューの上限
+        """
+        self.source = source
+        self.stages = stages
+        self.sink = sink
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _put(self, out_queue, item):
+        # 下流が停止した場合に待ち続けないよう、停止フラグを確認しながら入れる
+        while not self._stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _iter_queue(self, in_queue):
+        while True:
+            item = in_queue.get()
+            if item is _END:
+                return
+            yield item
+
+    def _run_stage(self, name, records, out_queue):
+        try:
+            for record in records:
+                if not self._put(out_queue, record):
+                    return
+        except Exception as e:
+            logger.exception(f"Pipeline stage '{name}' failed")
+            self._errors.append((name, e))
+            self._stop.set()
+        finally:
+            # 段階内でDBを参照した場合に備えて、このスレッドの接続を閉じる
+            connection.close()
+            # 通常の終了では、レコードと同じく空きを待って終端を入れる
+            if not self._put(out_queue, _END):
+                self._put_end(out_queue)
+
+    def _put_end(self, out_queue):
+        # 停止後は下流に終端を伝えることを優先する（キューが一杯なら1件捨てて入れる）
+        while True:
+            try:
+                out_queue.put_nowait(_END)
+                return
+            except queue.Full:
+                try:
+                    out_queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def run(self):
+        """
+        パイプラインを実行
+
+        Returns:
+            dict: 終端の統計（records / written / batches）
+
+        Raises:
+            PipelineError: いずれかの段階で例外が発生した場合
+        """
+        threads = []
+        records = self.source
+        names = ['source'] + [getattr(stage, '__name__', 'stage') for stage in self.stages]
+        stages = [None] + list(self.stages)
+
+        for name, stage in zip(names, stages):
+            if stage is not None:
+                records = stage(records)
+            out_queue = queue.Queue(maxsize=self.queue_size)
+            thread = threading.Thread(
+                target=self._run_stage, args=(name, records, out_queue),
+                name=f'pipeline-{name}', daemon=True
+            )
+            threads.append(thread)
+            records = self._iter_queue(out_queue)
+            last_queue = out_queue
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                try:
+                    item = last_queue.get(timeout=0.5)
+                except queue.Empty:
+                    if self.sink.due():
+                        self.sink.flush()
+                    continue
+
+                if item is _END:
+                    break
+                self.sink.add(item)
+                if self.sink.due():
+                    self.sink.flush()
+
+            # 段階が失敗した場合も、それまでに届いたレコードは書き込む
+            self.sink.flush()
+
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            name, error = self._errors[0]
+            raise PipelineError(f"{name}: {error}") from error
+
+        return self.sink.stats
@@ -0,0 +1,135 @@
+"""
+リンク抽出ユーティリティ - lxml
+
+クローラーがページから必要とするのは <a href> とその周辺テキストだけなので、
+BeautifulSoupで文書全体のツリーを構築せず、lxmlで直接アンカーを走査します。
+"""
+
+import re
+from collections import namedtuple
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+
+# 抽出したリンク
+#   url: 絶対URL
+#   href: href属性の値（元の表記）
+#   text: リンクテキスト
+#   context: 直近の親要素（td/th/div/li/p）のテキスト（with_context=Trueの場合のみ）
+#   row_text: 所属するテーブル行（tr）のテキスト（with_context=Trueの場合のみ）
+LinkRecord = namedtuple('LinkRecord', ['url', 'href', 'text', 'context', 'row_text'])
+
+CONTEXT_TAGS = frozenset(['td', 'th', 'div', 'li', 'p'])
+
+# 文書内の文字コード宣言（<meta charset> / <meta http-equiv="Content-Type">）
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset', re.IGNORECASE)
+
+
+def _element_text(element):
+    """BeautifulSoupの get_text(strip=True) と同じ規則でテキストを連結"""
+    return ''.join(part.strip() for part in element.itertext())
+
+
+def href_contains(*needles, ignore_case=False):
+    """
+    hrefに指定文字列のいずれかを含むリンクにマッチする判定関数を作成
+
+    CSSセレクタ a[href*="..."] と同じ条件です。
+
+    Args:
+        *needles (str): 含まれるべき文字列
+        ignore_case (bool): 大文字小文字を区別しない
+
+    Returns:
+        callable: href(str)を受け取りboolを返す関数
+    """
+    if ignore_case:
+        needles = tuple(n.lower() for n in needles)
+        return lambda href: any(n in href.lower() for n in needles)
+    return lambda href: any(n in href for n in needles)
+
+
+def parse_html(content, encoding=None):
+    """
+    HTMLをlxmlでパース
+
+    Args:
+        content (bytes or str): HTML
+        encoding (str): バイト列の文字コード（HTTPヘッダーで指定されたもの）。
+            省略時は文書内の宣言に従い、宣言もなければUTF-8とみなす
+
+    Returns:
+        lxml.html.HtmlElement: ルート要素、空文書の場合はNone
+    """
+    if isinstance(content, str):
+        # str のままだと encoding 宣言付きの文書を lxml が受け付けないため、
+        # UTF-8 のバイト列として明示的にパースする
+        content = content.encode('utf-8')
+        encoding = 'utf-8'
+    elif encoding is None and not META_CHARSET_PATTERN.search(content[:2048]):
+        # 宣言がない場合 lxml は Latin-1 として扱うため、日本語が文字化けする
+        encoding = 'utf-8'
+
+    parser = lxml.html.HTMLParser(encoding=encoding) if encoding else None
+
+    if not content.strip():
+        return None
+
+    try:
+        return lxml.html.fromstring(content, parser=parser)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def extract_links(content, base_url, href_filter=None, with_context=False, encoding=None):
+    """
+    HTMLからリンクを抽出
+
+    Args:
+        content (bytes or str): HTML
+        base_url (str): 相対URLの解決に使うページURL（<base href>があればそちらを優先）
+        href_filter (callable): hrefを受け取り、対象ならTrueを返す関数
+        with_context (bool): 親要素・テーブル行のテキストも取得するか
+        encoding (str): バイト列の文字コード（parse_html を参照）
+
+    Returns:
+        list: LinkRecordのリスト（文書内の出現順）
+    """
+    root = parse_html(content, encoding=encoding)
+    if root is None:
+        return []
+
+    base = root.find('.//base[@href]')
+    if base is not None:
+        base_url = urljoin(base_url, base.get('href').strip())
+
+    links = []
+
+    for anchor in root.iter('a'):
+        href = anchor.get('href')
+        if not href:
+            continue
+        href = href.strip()
+        if not href or (href_filter and not href_filter(href)):
+            continue
+
+        context = None
+        row_text = ''
+        if with_context:
+            for ancestor in anchor.iterancestors():
+                if context is None and ancestor.tag in CONTEXT_TAGS:
+                    context = _element_text(ancestor)
+                if ancestor.tag == 'tr':
+                    row_text = _element_text(ancestor)
+                    break
+
+        links.append(LinkRecord(
+            url=urljoin(base_url, href),
+            href=href,
+            text=_element_text(anchor),
+            context=context or '',
+            row_text=row_text,
+        ))
+
+    return links
@@ -0,0 +1,188 @@
+"""
+ページ指紋
+
+ページごとに「正規化したHTMLのハッシュ」と「抽出したレコード集合のハッシュ」を
+DB（PageFingerprintモデル）に保持し、前回のクロールから変化がなければ
+パースとDB書き込みを省略します。
+
+- HTMLが前回と同じ → パースせずにスキップ（unchanged）
+- HTMLは変わったが抽出結果が同じ → DB書き込みをスキップ（unchanged）
+- 抽出結果が変わった → 保存（changed）
+- 初めてのURL → 保存（new）
+"""
+
+import hashlib
+import json
+import logging
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+from lxml import etree
+
+from exams.models import PageFingerprint
+from link_extractor import parse_html
+
+logger = logging.getLogger(__name__)
+
+# ハッシュの対象から除く要素（広告・解析タグやCSRFトークンなど、毎回変わりうるもの）
+VOLATILE_TAGS = ('script', 'style', 'noscript', 'iframe')
+
+WHITESPACE_PATTERN = re.compile(rb'\s+')
+
+
+def content_hash(content, encoding=None):
+    """
+    ページを正規化してハッシュを計算
+
+    Args:
+        content (bytes or str): HTML
+        encoding (str): バイト列の文字コード（link_extractor.parse_html を参照）
+
+    Returns:
+        str: SHA-256（16進数）
+    """
+    root = parse_html(content, encoding=encoding)
+    if root is None:
+        return hashlib.sha256(b'').hexdigest()
+
+    etree.strip_elements(root, etree.Comment, *VOLATILE_TAGS, with_tail=False)
+    for hidden in root.xpath('//input[@type="hidden"]'):
+        hidden.drop_tree()
+
+    normalized = etree.tostring(root, method='html', encoding='utf-8')
+    normalized = WHITESPACE_PATTERN.sub(b' ', normalized)
+    return hashlib.sha256(normalized).hexdigest()
+
+
+def records_hash(records):
+    """
+    抽出したレコード集合のハッシュを計算（レコードの順序には依存しない）
+
+    Args:
+        records (list): レコードの辞書リスト
+
+    Returns:
+        str: SHA-256（16進数）
+    """
+    serialized = sorted(
+        json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+        for record in records
+    )
+    return hashlib.sha256('\n'.join(serialized).encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """
+    クローラー単位のページ指紋
+
+    判定結果は commit() を呼ぶまでDBに書き込みません。
+    保存に失敗した場合や DRY RUN の場合に、次回のクロールでスキップされないようにするためです。
+    """
+
+    def __init__(self, crawler_id):
+        """
+        Args:
+            crawler_id (str): CRAWLER_CONFIGSのキー（例: toshin）
+        """
+        self.crawler_id = crawler_id
+        self.counts = Counter(new=0, changed=0, unchanged=0)
+        self._pending = {}
+
+    def _get(self, url):
+        return PageFingerprint.objects.filter(crawler=self.crawler_id, url=url).first()
+
+    def page_unchanged(self, url, page_hash):
+        """
+        ページが前回から変化していないか判定
+
+        変化していなければ unchanged として数え、最終確認日時の更新を予約します。
+
+        Args:
+            url (str): ページURL
+            page_hash (str): content_hash() の値
+
+        Returns:
+            bool: 変化していなければTrue（パース不要）
+        """
+        fingerprint = self._get(url)
+        if fingerprint is None or fingerprint.content_hash != page_hash:
+            return False
+
+        self.counts['unchanged'] += 1
+        self._pending[url] = ({'content_hash': page_hash}, False)
+        return True
+
+    def records_changed(self, url, page_hash, records):
+        """
+        抽出結果が前回から変化したか判定し、結果を数える
+
+        Args:
+            url (str): ページURL
+            page_hash (str): content_hash() の値
+            records (list): 抽出したレコードの辞書リスト
+
+        Returns:
+            bool: 新規または変化していればTrue（DB書き込みが必要）
+        """
+        fingerprint = self._get(url)
+        new_hash = records_hash(records)
+
+        update = {
+            'content_hash': page_hash,
+            'records_hash': new_hash,
+            'record_count': len(records),
+        }
+
+        if fingerprint is None:
+            status = 'new'
+        elif fingerprint.records_hash != new_hash:
+            status = 'changed'
+        else:
+            status = 'unchanged'
+
+        self.counts[status] += 1
+        self._pending[url] = (update, status != 'unchanged')
+        return status != 'unchanged'
+
+    def commit(self):
+        """
+        予約した指紋をDBに書き込む（保存が成功した後に呼ぶ）
+        """
+        if not self._pending:
+            return
+
+        now = timezone.now()
+
+        with transaction.atomic():
+            for url, (update, changed) in self._pending.items():
+                defaults = dict(update, last_checked_at=now)
+                if changed:
+                    defaults['last_changed_at'] = now
+
+                fingerprint, created = PageFingerprint.objects.get_or_create(
+                    crawler=self.crawler_id,
+                    url=url,
+                    defaults=dict(defaults, last_changed_at=now),
+                )
+                if not created:
+                    for field, value in defaults.items():
+                        setattr(fingerprint, field, value)
+                    fingerprint.save(update_fields=list(defaults))
+
+        logger.info(f"Fingerprints[{self.crawler_id}]: committed {len(self._pending)} pages")
+        self._pending.clear()
+
+    def discard(self):
+        """予約した指紋を破棄（DRY RUNなど、保存しない場合）"""
+        self._pending.clear()
+
+    def summary(self):
+        """
+        判定結果の件数
+
+        Returns:
+            dict: {'new': int, 'changed': int, 'unchanged': int}
+        """
+        return dict(self.counts)
@@ -0,0 +1,149 @@
+"""
+ページストア
+
+取得したページの本文をgzipで圧縮し、本文のSHA-256をファイル名として保存します
+（同じ本文は1回だけ保存）。URL・取得日時・ラベル（大学名など）はDB（StoredPageモデル）に記録します。
+
+セレクターや科目判定を修正した際は、manage.py reextract で保存済みのページから
+再抽出できるため、サイトを再クロールする必要はありません。
+
+保存先:
+    {directory}/objects/{ハッシュの先頭2文字}/{ハッシュ}.gz
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from exams.models import StoredPage
+from crawler_config import PAGE_STORE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def read_blob(path):
+    """
+    保存済みの本文を読み込む（DBにアクセスしないため、ワーカープロセスからも呼べる）
+
+    Args:
+        path (str): 本文ファイルのパス
+
+    Returns:
+        bytes: 本文
+    """
+    with gzip.open(path, 'rb') as f:
+        return f.read()
+
+
+class PageStore:
+    """
+    取得元ごとのページストア
+    """
+
+    def __init__(self, provider, directory=None, compression_level=None):
+        """
+        Args:
+            provider (str): 取得元（CRAWLER_CONFIGSのキー、例: toshin）
+            directory (str): 保存先（省略時は PAGE_STORE_CONFIG の設定値）
+            compression_level (int): gzipの圧縮レベル
+        """
+        directory = directory or PAGE_STORE_CONFIG['directory']
+        if not os.path.isabs(directory):
+            directory = os.path.join(settings.BASE_DIR, directory)
+
+        self.provider = provider
+        self.root = directory
+        self.compression_level = compression_level or PAGE_STORE_CONFIG['compression_level']
+
+    def blob_path(self, content_hash):
+        """本文ファイルのパス"""
+        return os.path.join(self.root, 'objects', content_hash[:2], f'{content_hash}.gz')
+
+    def put(self, url, content, label='', final_url='', encoding=None, status_code=200):
+        """
+        ページを保存
+
+        Args:
+            url (str): 取得したURL
+            content (bytes or str): 本文（文字列の場合はUTF-8で保存）
+            label (str): ラベル（大学名など、再抽出時に使う）
+            final_url (str): リダイレクト後のURL
+            encoding (str): HTTPヘッダーで指定された文字コード
+            status_code (int): ステータスコード
+
+        Returns:
+            StoredPage: 保存記録
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+            encoding = 'utf-8'
+
+        content_hash = hashlib.sha256(content).hexdigest()
+        path = self.blob_path(content_hash)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 書き込み途中のファイルを読まないよう、一時ファイルから置き換える
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(content, compresslevel=self.compression_level))
+            os.replace(tmp_path, path)
+
+        return StoredPage.objects.create(
+            provider=self.provider,
+            url=url,
+            final_url=final_url if final_url and final_url != url else '',
+            label=label,
+            content_hash=content_hash,
+            encoding=encoding or '',
+            status_code=status_code,
+            size=len(content),
+            fetched_at=timezone.now(),
+        )
+
+    def read(self, page):
+        """
+        保存済みの本文を読み込む
+
+        Args:
+            page (StoredPage): 保存記録
+
+        Returns:
+            bytes: 本文
+        """
+        return read_blob(self.blob_path(page.content_hash))
+
+    def history(self, url):
+        """
+        URLの保存記録（新しい順）
+
+        Returns:
+            QuerySet: StoredPage
+        """
+        return StoredPage.objects.filter(provider=self.provider, url=url).order_by('-fetched_at')
+
+    def latest(self, as_of=None, url_filter=None):
+        """
+        URLごとに最新の保存記録を取得
+
+        Args:
+            as_of (datetime): この日時以前に取得したページに限る
+            url_filter (str): URLの部分一致フィルター
+
+        Returns:
+            QuerySet: StoredPage（URL順）
+        """
+        pages = StoredPage.objects.filter(provider=self.provider)
+        if as_of:
+            pages = pages.filter(fetched_at__lte=as_of)
+        if url_filter:
+            pages = pages.filter(url__contains=url_filter)
+
+        # 保存記録は取得順に作成されるため、URLごとの最大IDが最新
+        latest_ids = pages.values('url').annotate(latest_id=Max('id')).values('latest_id')
+        return StoredPage.objects.filter(id__in=latest_ids).order_by('url')
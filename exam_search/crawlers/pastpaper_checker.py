@@ -0,0 +1,175 @@
+"""
+大学公式サイトの過去問掲載チェック
+
+トップページから同じサイト内のリンクを幅優先でたどって過去問（過去の入試問題）の
+ページを探し、掲載されている年度を取得します。
+
+- たどるのは「入試」「受験」などのリンクのみ（深さは max_depth まで）
+- 「過去問」「過去の入試問題」などのリンク先は深さによらず優先して取得
+- 1大学あたりの取得ページ数は max_pages まで
+
+リクエスト間隔・リトライ・robots.txt は BaseCrawler（RetryPolicy）に従うため、
+複数の大学を並列にチェックしても同じホストへのリクエスト間隔は守られます。
+
+使用例:
+    checker = PastpaperChecker()
+    result = checker.check('東京大学', 'https://www.u-tokyo.ac.jp/')
+    # {'name': '東京大学', 'found': True, 'url': '...', 'years': [2025, 2024, 2023], ...}
+"""
+
+import logging
+import re
+from collections import deque
+from datetime import date
+from urllib.parse import urldefrag
+
+from exam_crawler import BaseCrawler
+from exams.university_index import domain_of
+from crawler_config import PASTPAPER_CHECK_CONFIG
+from crawler_metrics import host_of
+from link_extractor import extract_links, parse_html
+
+logger = logging.getLogger(__name__)
+
+# 過去問ページへのリンク・ページタイトル
+PASTPAPER_PATTERN = re.compile(
+    r'過去問|過去の(入試|試験)?問題|入試問題(等)?の(公開|公表|掲載|閲覧)|入学試験問題'
+)
+
+# 過去問ページを探すためにたどるリンク
+NAVIGATION_PATTERN = re.compile(
+    r'入試|入学者選抜|受験|入学案内|admission', re.IGNORECASE
+)
+
+# 掲載年度（2025年度 / 令和7年度 / 令和元年度）
+YEAR_PATTERN = re.compile(r'(20\d{2})\s*年度|令和\s*(\d{1,2}|元)\s*年度')
+
+# ページとして取得しないファイル
+SKIP_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.zip', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx')
+
+
+def extract_years(text):
+    """
+    テキストから掲載年度を取得
+
+    Args:
+        text (str): ページのテキスト
+
+    Returns:
+        list: 年度（新しい順、重複なし）
+    """
+    latest = date.today().year + 1
+    years = set()
+    for western, reiwa in YEAR_PATTERN.findall(text):
+        if western:
+            year = int(western)
+        else:
+            year = 2018 + (1 if reiwa == '元' else int(reiwa))
+        if 2000 <= year <= latest:
+            years.add(year)
+    return sorted(years, reverse=True)
+
+
+def is_same_site(url, site):
+    """URLが大学のサイト（サブドメインを含む）か判定"""
+    domain = domain_of(url)
+    return domain == site or domain.endswith(f'.{site}')
+
+
+class PastpaperChecker(BaseCrawler):
+    """
+    大学公式サイトの過去問ページを探すクローラー
+    """
+
+    def __init__(self, delay=None, max_depth=None, max_pages=None):
+        """
+        Args:
+            delay (float): 同じホストへのリクエスト間隔（秒）
+            max_depth (int): トップページからたどるリンクの深さ
+            max_pages (int): 1大学あたりの最大取得ページ数
+        """
+        super().__init__(delay if delay is not None else PASTPAPER_CHECK_CONFIG['delay'])
+        self.max_depth = max_depth if max_depth is not None else PASTPAPER_CHECK_CONFIG['max_depth']
+        self.max_pages = max_pages if max_pages is not None else PASTPAPER_CHECK_CONFIG['max_pages']
+
+    def check(self, name, homepage):
+        """
+        大学の公式サイトで過去問ページを探す
+
+        Args:
+            name (str): 大学名
+            homepage (str): 公式サイトのURL
+
+        Returns:
+            dict: name, homepage, found, url（過去問ページ）, years（新しい順）,
+                  pages（取得ページ数）, error（トップページを取得できない場合）
+        """
+        result = {
+            'name': name,
+            'homepage': homepage,
+            'found': False,
+            'url': '',
+            'years': [],
+            'pages': 0,
+            'error': '',
+        }
+        site = domain_of(homepage)
+
+        # (URL, 深さ, 過去問ページの候補か)。候補は先頭に入れて優先する
+        queue = deque([(homepage, 0, False)])
+        seen = {urldefrag(homepage)[0]}
+
+        while queue and result['pages'] < self.max_pages:
+            url, depth, is_candidate = queue.popleft()
+
+            response = self.fetch_response(url)
+            result['pages'] += 1
+            if response is None:
+                if depth == 0:
+                    result['error'] = 'トップページを取得できません'
+                continue
+            if 'html' not in response.headers.get('Content-Type', 'text/html').lower():
+                continue
+
+            encoding = self.response_encoding(response)
+            with self.metrics.timer('parse', host_of(url)):
+                links = extract_links(response.content, response.url, encoding=encoding)
+
+            # 過去問のPDFが直接並んでいるページも過去問ページとみなす
+            lists_pastpapers = any(
+                PASTPAPER_PATTERN.search(link.text) and urldefrag(link.url)[0].lower().endswith('.pdf')
+                for link in links
+            )
+
+            if is_candidate or lists_pastpapers:
+                years = self._page_years(response.content, encoding)
+                if not result['found'] or (years and not result['years']):
+                    result.update(found=True, url=response.url, years=years)
+                if years:
+                    break
+
+            for link in links:
+                link_url = urldefrag(link.url)[0]
+                if link_url in seen or not link_url.startswith(('http://', 'https://')):
+                    continue
+                if not is_same_site(link_url, site) or link_url.lower().endswith(SKIP_EXTENSIONS):
+                    continue
+
+                if PASTPAPER_PATTERN.search(link.text):
+                    seen.add(link_url)
+                    queue.appendleft((link_url, depth + 1, True))
+                elif depth < self.max_depth and NAVIGATION_PATTERN.search(f'{link.text} {link_url}'):
+                    seen.add(link_url)
+                    queue.append((link_url, depth + 1, False))
+
+        if result['found']:
+            logger.info(f"Past papers found for {name}: {result['url']} {result['years']}")
+        else:
+            logger.info(f"No past paper page found for {name} ({result['pages']} pages)")
+        return result
+
+    def _page_years(self, content, encoding):
+        root = parse_html(content, encoding=encoding)
+        if root is None:
+            return []
+        return extract_years(root.text_content())
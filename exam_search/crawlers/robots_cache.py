@@ -0,0 +1,188 @@
+"""
+robots.txt キャッシュ
+
+ホストごとに robots.txt を一度だけ取得し、TTLの間は再利用します。
+あわせて Crawl-delay を読み取り、リクエスト間隔の調整に使えるようにします。
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class _RobotsEntry:
+    """
+    1ホスト分のrobots.txt解析結果
+    """
+
+    def __init__(self, parser, expires_at, error=None):
+        self.parser = parser
+        self.expires_at = expires_at
+        self.error = error
+
+    def is_expired(self, now):
+        return now >= self.expires_at
+
+
+class RobotsCache:
+    """
+    ホスト単位のrobots.txtキャッシュ
+
+    取得に失敗したホストは安全側に倒して「クロール不可」として扱い、
+    error_ttl の経過後に再取得します。
+    """
+
+    def __init__(self, ttl=86400, error_ttl=3600, timeout=10, session_factory=requests.Session):
+        """
+        Args:
+            ttl (int): 取得に成功したrobots.txtの有効期間（秒）
+            error_ttl (int): 取得に失敗した場合の再試行までの期間（秒）
+            timeout (int): robots.txt取得のタイムアウト（秒）
+            session_factory (callable): 取得に使うセッションを作成する関数（スレッドごとに呼び出す）
+        """
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        self.session_factory = session_factory
+        self._local = threading.local()
+        self._entries = {}
+        # ホストごとの取得中ロック（_lock は _entries と _origin_locks の参照・更新のみに使う）
+        self._origin_locks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """このスレッドのセッション（requests.Session はスレッド間で共有しない）"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.session_factory()
+        return session
+
+    @staticmethod
+    def _origin(url):
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def _fetch(self, origin):
+        """
+        robots.txtを取得して解析する
+
+        ステータスコードの扱いは urllib.robotparser に合わせています
+        （401/403 は全拒否、その他の4xxは全許可）。
+        """
+        robots_url = f"{origin}/robots.txt"
+        parser = RobotFileParser()
+        parser.set_url(robots_url)
+        now = time.time()
+
+        try:
+            response = self.session.get(robots_url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning(f"Failed to fetch robots.txt ({robots_url}): {e}")
+            parser.disallow_all = True
+            return _RobotsEntry(parser, now + self.error_ttl, error=str(e))
+
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif 400 <= response.status_code < 500:
+            parser.allow_all = True
+        elif response.status_code >= 500:
+            logger.warning(f"robots.txt returned {response.status_code}: {robots_url}")
+            parser.disallow_all = True
+            return _RobotsEntry(
+                parser, now + self.error_ttl,
+                error=f"HTTP {response.status_code}"
+            )
+        else:
+            parser.parse(response.text.splitlines())
+
+        parser.modified()
+        logger.info(f"Fetched robots.txt: {robots_url} ({response.status_code})")
+        return _RobotsEntry(parser, now + self.ttl)
+
+    def _get_entry(self, url):
+        origin = self._origin(url)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(origin)
+            if entry is not None and not entry.is_expired(now):
+                return entry
+            origin_lock = self._origin_locks.setdefault(origin, threading.Lock())
+
+        # 取得（ネットワークアクセス）はホストごとのロックで行い、他のホストの確認を待たせない
+        with origin_lock:
+            # 待っている間に他のスレッドが取得していれば、それを使う
+            with self._lock:
+                entry = self._entries.get(origin)
+            if entry is None or entry.is_expired(time.time()):
+                entry = self._fetch(origin)
+                with self._lock:
+                    self._entries[origin] = entry
+
+        return entry
+
+    def is_allowed(self, url, user_agent='*'):
+        """
+        URLがクロール可能かチェック
+
+        Args:
+            url (str): チェック対象のURL
+            user_agent (str): User-Agent文字列
+
+        Returns:
+            bool: クロール可能ならTrue
+        """
+        entry = self._get_entry(url)
+        return entry.parser.can_fetch(user_agent, url)
+
+    def crawl_delay(self, url, user_agent='*'):
+        """
+        ホストの Crawl-delay を取得
+
+        Args:
+            url (str): 対象ホストのURL
+            user_agent (str): User-Agent文字列
+
+        Returns:
+            float: Crawl-delay（秒）、指定がない場合はNone
+        """
+        entry = self._get_entry(url)
+        delay = entry.parser.crawl_delay(user_agent)
+        return float(delay) if delay is not None else None
+
+    def clear(self):
+        """キャッシュを破棄"""
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_robots_cache():
+    """
+    プロセス共通のrobots.txtキャッシュを取得
+
+    Returns:
+        RobotsCache: crawler_config.ROBOTS_TXT_CONFIG で設定されたキャッシュ
+    """
+    global _default_cache
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            from crawler_config import ROBOTS_TXT_CONFIG
+            _default_cache = RobotsCache(
+                ttl=ROBOTS_TXT_CONFIG['ttl'],
+                error_ttl=ROBOTS_TXT_CONFIG['error_ttl'],
+                timeout=ROBOTS_TXT_CONFIG['timeout'],
+            )
+
+    return _default_cache
@@ -0,0 +1,479 @@
+"""
+東進過去問データベース クローラー - Requests + lxml
+
+大学ページのサーバーHTMLに含まれる問題ページのURL
+（/university/{大学ID}/{年度}/{科目コード}…/question/）から
+年度・科目を読み取り、過去問データを作成します。
+
+ブラウザは起動しません。サーバーHTMLに問題リンクが含まれていない
+（JavaScriptで描画される）ページの場合のみ、Playwrightで描画して再取得します。
+"""
+
+import json
+import os
+import re
+import logging
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from exam_crawler import BaseCrawler
+from exams.models import Exam, AnswerSource
+from exams.subject_classifier import classify_subject
+from exams.canonical import canonicalize, canonicalize_exam
+from exams.university_index import get_university_index
+from crawler_config import CRAWLER_CONFIGS, DATABASE_CONFIG, PAGE_STORE_CONFIG
+from link_extractor import extract_links, href_contains
+from page_fingerprint import FingerprintStore, content_hash
+from page_store import PageStore, read_blob
+from crawler_metrics import host_of
+
+try:
+    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = 'https://www.toshin-kakomon.com'
+
+# 大学一覧ページ（大学名 → 大学ページURLの解決に使用）
+INDEX_URL = f'{BASE_URL}/new_kakomon_db/'
+
+# 問題・解答ページのURL: /university/{大学ID}/{年度}/{科目コード}{識別子}/{question|answer}/
+EXAM_URL_PATTERN = re.compile(
+    r'/university/(?P<university_id>\w+)/(?P<year>\d{4})/'
+    r'(?P<subject_code>[a-zA-Z])(?P<rest>\w*)/(?P<kind>question|answer)/'
+)
+
+SUBJECT_DISPLAY = dict(Exam.SUBJECT_CHOICES)
+
+DEPARTMENT_PATTERN = re.compile(r'[文理]科[一二三]類')
+
+# crawl_login_site が保存するログイン状態（Cookieを再利用する）
+DEFAULT_STORAGE_STATE_PATH = os.path.join(settings.BASE_DIR, '.toshin_storage_state.json')
+
+
+class ToshinExamCrawler(BaseCrawler):
+    """
+    東進過去問データベースから過去問情報をクロールするクローラー
+    """
+
+    def __init__(self, delay=3.0, use_browser_fallback=True,
+                 storage_state_path=DEFAULT_STORAGE_STATE_PATH, skip_unchanged=True,
+                 store_pages=None):
+        """
+        Args:
+            delay (float): リクエスト間隔
+            use_browser_fallback (bool): 問題リンクがサーバーHTMLにない場合にPlaywrightで描画するか
+            storage_state_path (str): crawl_login_site が保存したログイン状態のパス
+            skip_unchanged (bool): 前回から変化のないページの処理を省略するか
+                                   （Falseでもページ指紋は記録する）
+            store_pages (bool): 取得したページをページストアに保存するか（省略時は設定値）
+        """
+        super().__init__(delay)
+        self.config = CRAWLER_CONFIGS['toshin']
+        self.skip_unchanged = skip_unchanged
+        self.fingerprints = FingerprintStore('toshin')
+        if store_pages is None:
+            store_pages = PAGE_STORE_CONFIG['enabled']
+        self.page_store = PageStore('toshin') if store_pages else None
+        self.use_browser_fallback = use_browser_fallback and PLAYWRIGHT_AVAILABLE
+        self.storage_state_path = storage_state_path
+        self._university_urls = None
+        self._load_cookies()
+
+    def _load_cookies(self):
+        """
+        保存済みのログイン状態からCookieをセッションに読み込む
+        """
+        if not self.storage_state_path or not os.path.exists(self.storage_state_path):
+            return
+
+        try:
+            with open(self.storage_state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load storage state: {e}")
+            return
+
+        for cookie in state.get('cookies', []):
+            self.session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path', '/')
+            )
+        logger.info(f"Loaded {len(state.get('cookies', []))} cookies from {self.storage_state_path}")
+
+    def university_urls(self):
+        """
+        大学一覧ページから 大学名 → 大学ページURL の対応を取得（初回のみ取得）
+
+        Returns:
+            dict: {大学名: URL}
+        """
+        if self._university_urls is None:
+            links = self.fetch_links(INDEX_URL, href_filter=href_contains('/university/'))
+            self._university_urls = {}
+            for link in links:
+                if link.text and link.text not in self._university_urls:
+                    self._university_urls[link.text] = link.url
+            logger.info(f"Found {len(self._university_urls)} universities on {INDEX_URL}")
+
+        return self._university_urls
+
+    def resolve_university_url(self, url, university_name):
+        """
+        大学ページのURLを決定
+
+        フロンティアに登録されたURLが大学IDを含まない（大学名で登録された）場合は、
+        大学一覧ページから大学名で引き当てます。
+
+        Args:
+            url (str): フロンティアに登録されたURL
+            university_name (str): 大学名
+
+        Returns:
+            str: 大学ページのURL
+        """
+        path = urlparse(url).path
+        if re.search(r'/university/\w+/?$', path, re.ASCII):
+            return url
+
+        return self.university_urls().get(university_name, url)
+
+    def crawl_university_exams(self, url, university_name):
+        """
+        大学ページをクロールして過去問データを抽出
+
+        Args:
+            url (str): 大学ページのURL
+            university_name (str): 大学名
+
+        Returns:
+            list: 過去問データの辞書リスト
+        """
+        page_url = self.resolve_university_url(url, university_name)
+
+        response = self.fetch_response(page_url)
+        if response is None:
+            return []
+
+        content, content_url = response.content, response.url
+        encoding = self.response_encoding(response)
+
+        if b'/question/' not in content and self.use_browser_fallback:
+            logger.info(f"No question links in server HTML, rendering with browser: {page_url}")
+            content, content_url = self._render(page_url)
+            encoding = 'utf-8'
+
+        host = host_of(page_url)
+
+        # 再抽出用に保存（抽出処理を修正した際に再クロールしなくて済むように）
+        if self.page_store:
+            self.page_store.put(
+                page_url, content, label=university_name,
+                final_url=content_url, encoding=encoding
+            )
+
+        # 前回から変化のないページはパースしない
+        with self.metrics.timer('fingerprint', host):
+            page_hash = content_hash(content, encoding=encoding)
+        if self.skip_unchanged and self.fingerprints.page_unchanged(page_url, page_hash):
+            logger.info(f"Unchanged since last crawl, skipped: {university_name}")
+            return []
+
+        with self.metrics.timer('parse', host):
+            exams_data = extract_exams(content, content_url, university_name, encoding=encoding)
+        logger.info(f"Found {len(exams_data)} exams for {university_name}")
+
+        # 抽出結果が前回と同じならDBに書き込まない（再処理する場合も、指紋は保存後に記録する）
+        records_changed = self.fingerprints.records_changed(page_url, page_hash, exams_data)
+        if self.skip_unchanged and not records_changed:
+            logger.info(f"Extracted records unchanged, skipped: {university_name}")
+            return []
+
+        return exams_data
+
+    def _render(self, url):
+        """
+        Playwrightでページを描画してHTMLを取得（JavaScriptが必要なページ用）
+
+        Args:
+            url (str): 取得するURL
+
+        Returns:
+            tuple: (描画後のHTML, 最終的なURL)
+        """
+        storage_state = self.storage_state_path
+        if not storage_state or not os.path.exists(storage_state):
+            storage_state = None
+
+        with self.metrics.timer('render', host_of(url)), sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            try:
+                context = browser.new_context(storage_state=storage_state)
+                page = context.new_page()
+                response = page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                if response is not None:
+                    self.metrics.record_response(host_of(url), response.status)
+                try:
+                    page.wait_for_selector('a[href*="/question/"]', timeout=10000)
+                except PlaywrightTimeoutError:
+                    logger.warning(f"Question links did not appear: {url}")
+                content = page.content()
+                page_url = page.url
+            finally:
+                browser.close()
+
+        return content, page_url
+
+    @staticmethod
+    def parse_exam_links(links, university_name):
+        """
+        問題・解答リンクから過去問データを作成
+
+        同じ 年度・科目コード の問題リンクと解答リンクは1件の過去問にまとめます。
+
+        Args:
+            links (list): LinkRecordのリスト
+            university_name (str): 大学名
+
+        Returns:
+            list: 過去問データの辞書リスト
+        """
+        exams = {}
+        answer_urls = {}
+
+        for link in links:
+            match = EXAM_URL_PATTERN.search(link.url)
+            if not match:
+                continue
+
+            year = int(match.group('year'))
+            if not 2000 <= year <= 2030:
+                continue
+
+            url_key = (match.group('university_id'), year, match.group('subject_code'), match.group('rest'))
+
+            if match.group('kind') == 'answer':
+                answer_urls.setdefault(url_key, link.url)
+                continue
+
+            if url_key in exams:
+                continue
+
+            row_text = link.row_text or link.context
+            exam_type = '一般入試'
+            if '前期' in row_text:
+                exam_type = '前期'
+            elif '後期' in row_text:
+                exam_type = '後期'
+            exam_type = canonicalize('exam_type', exam_type)
+
+            department_match = DEPARTMENT_PATTERN.search(row_text)
+            department = canonicalize('department', department_match.group(0) if department_match else '')
+
+            subject = classify_subject(
+                link.text, provider='toshin', code=match.group('subject_code')
+            ).subject
+            description = ' '.join(filter(None, [
+                university_name, f'{year}年度', SUBJECT_DISPLAY.get(subject, subject),
+                department, exam_type
+            ]))
+
+            exams[url_key] = {
+                'year': year,
+                'subject': subject,
+                'exam_type': exam_type,
+                'department': department,
+                'problem_url': link.url,
+                'description': description,
+                'source_type': 'yobi_school',
+                'university_name': university_name,
+            }
+
+        for url_key, exam_data in exams.items():
+            exam_data['answer_url'] = answer_urls.get(url_key, exam_data['problem_url'])
+
+        # 重複削除（同じ 年度・科目・試験種別・学部 の組み合わせ）
+        unique = {}
+        for exam_data in exams.values():
+            key = (exam_data['year'], exam_data['subject'], exam_data['exam_type'], exam_data['department'])
+            unique.setdefault(key, exam_data)
+
+        return list(unique.values())
+
+    def save_exams_to_db(self, exams_data):
+        """
+        過去問データをまとめてデータベースに保存
+
+        既存の過去問を一括で読み込み、新規分は bulk_create、
+        既存分は bulk_update で書き込みます（1件ずつの問い合わせはしません）。
+        保存に成功した後、クロール時に判定したページ指紋を記録します。
+
+        Args:
+            exams_data (list): 過去問データの辞書リスト
+
+        Returns:
+            int: 作成・更新した過去問の件数
+        """
+        if not exams_data:
+            self.fingerprints.commit()
+            return 0
+
+        batch_size = DATABASE_CONFIG['batch_size']
+        now = timezone.now()
+
+        # 表記の揺れで別の過去問として登録しないよう、保存前に正規化する
+        for exam_data in exams_data:
+            canonicalize_exam(exam_data)
+
+        with self.metrics.timer('db_write', host_of(BASE_URL)), transaction.atomic():
+            # 大学名 → University ID（旧名称などの別名も索引から解決）
+            university_index = get_university_index()
+            universities = {}
+            for name in {exam_data['university_name'] for exam_data in exams_data}:
+                universities[name], _ = university_index.get_or_create(
+                    name,
+                    defaults={'school_type': 'university'}
+                )
+
+            def exam_key(university_id, data):
+                return (university_id, data['year'], data['subject'], data['exam_type'], data['department'])
+
+            existing = {}
+            for exam in Exam.objects.filter(
+                university_id__in=universities.values(),
+                year__in={exam_data['year'] for exam_data in exams_data},
+            ):
+                existing.setdefault(
+                    (exam.university_id, exam.year, exam.subject, exam.exam_type, exam.department),
+                    exam
+                )
+
+            # 同じキーのデータは最初の1件のみ保存
+            exams_by_key = {}
+            for exam_data in exams_data:
+                key = exam_key(universities[exam_data['university_name']], exam_data)
+                exams_by_key.setdefault(key, exam_data)
+
+            to_create = []
+            to_update = []
+            for key, exam_data in exams_by_key.items():
+                exam = existing.get(key)
+
+                if exam is None:
+                    exam = Exam(
+                        university_id=universities[exam_data['university_name']],
+                        year=exam_data['year'],
+                        subject=exam_data['subject'],
+                        exam_type=exam_data['exam_type'],
+                        department=exam_data['department'],
+                    )
+                    to_create.append(exam)
+                    existing[key] = exam
+                else:
+                    to_update.append(exam)
+
+                exam.problem_url = exam_data['problem_url']
+                exam.description = exam_data['description']
+                exam.source_type = exam_data['source_type']
+                exam.scraped_at = now
+                # bulk_update では auto_now が働かないため明示的に設定
+                exam.updated_at = now
+
+            Exam.objects.bulk_create(to_create, batch_size=batch_size)
+            Exam.objects.bulk_update(
+                to_update,
+                ['problem_url', 'description', 'source_type', 'scraped_at', 'updated_at'],
+                batch_size=batch_size
+            )
+
+            # 東進の解答ソースを追加（既存のものはURLと確認日時を更新）
+            saved_exams = [existing[key] for key in exams_by_key]
+            provider_name = self.config['name']
+
+            sources = {
+                source.exam_id: source
+                for source in AnswerSource.objects.filter(
+                    exam__in=saved_exams, provider_name=provider_name
+                )
+            }
+
+            sources_to_create = []
+            sources_to_update = []
+            for key, exam_data in exams_by_key.items():
+                exam = existing[key]
+                source = sources.get(exam.pk)
+                if source is None:
+                    sources_to_create.append(AnswerSource(
+                        exam=exam,
+                        provider_name=provider_name,
+                        answer_url=exam_data['answer_url'],
+                        has_detailed_explanation=self.config['has_detailed_explanation'],
+                        reliability_score=self.config['reliability_score'],
+                        notes='東進過去問データベースから取得',
+                        last_checked_at=now,
+                        is_active=True,
+                    ))
+                else:
+                    source.answer_url = exam_data['answer_url']
+                    source.last_checked_at = now
+                    source.is_active = True
+                    source.updated_at = now
+                    sources_to_update.append(source)
+
+            AnswerSource.objects.bulk_create(sources_to_create, batch_size=batch_size)
+            AnswerSource.objects.bulk_update(
+                sources_to_update,
+                ['answer_url', 'last_checked_at', 'is_active', 'updated_at'],
+                batch_size=batch_size
+            )
+
+        self.fingerprints.commit()
+
+        logger.info(
+            f"Saved exams: {len(to_create)} created, {len(to_update)} updated, "
+            f"{len(sources_to_create)} answer sources created"
+        )
+        return len(to_create) + len(to_update)
+
+
+def extract_exams(content, url, university_name, encoding=None):
+    """
+    大学ページのHTMLから過去問データを抽出
+
+    Args:
+        content (bytes or str): HTML
+        url (str): ページのURL（相対リンクの解決に使う）
+        university_name (str): 大学名
+        encoding (str): バイト列の文字コード
+
+    Returns:
+        list: 過去問データの辞書リスト
+    """
+    links = extract_links(
+        content, url,
+        href_filter=href_contains('/question/', '/answer/'),
+        with_context=True, encoding=encoding
+    )
+    return ToshinExamCrawler.parse_exam_links(links, university_name)
+
+
+def extract_stored_page(task):
+    """
+    ページストアに保存したページから過去問データを抽出（manage.py reextract のワーカープロセスで実行）
+
+    DBにはアクセスしません。
+
+    Args:
+        task (dict): {'path', 'url', 'label', 'encoding'}
+
+    Returns:
+        list: 過去問データの辞書リスト
+    """
+    content = read_blob(task['path'])
+    return extract_exams(content, task['url'], task['label'], encoding=task['encoding'] or None)
@@ -0,0 +1,276 @@
+"""
+東進過去問データベース（会員サイト）の大学ページからの過去問データ抽出
+
+crawl_login_site がブラウザで描画した大学ページと、ページストアに保存したその HTML の
+両方に同じ抽出処理を適用します。
+
+- 描画中のページ: UNIVERSITY_PAGE_EXTRACT_JS を page.evaluate で実行して問題リンクを収集
+- 保存済みのHTML: collect_question_links（同じ走査をlxmlで行う）で問題リンクを収集
+- 問題リンク → 過去問データ: build_university_exam_data（共通）
+
+DBにはアクセスしないため、manage.py reextract のワーカープロセスからも呼び出せます。
+"""
+
+import re
+import traceback
+
+from exams.canonical import canonicalize
+from exams.subject_classifier import classify_subject
+from link_extractor import parse_html
+from page_store import read_blob
+
+# ページストアの取得元（ToshinExamCrawler の 'toshin' とは抽出処理が異なるため分ける）
+PAGE_STORE_PROVIDER = 'toshin_login'
+
+# 大学ページから取得する問題リンクの上限
+MAX_QUESTION_LINKS = 100
+
+# 大学ページの問題リンクを1回の評価でまとめて取得するスクリプト
+# 文書順に走査し、各リンクの直前にある「年度」を含む見出しを対応付ける
+# 戻り値: [{href, text, rowText, heading}, ...]
+# 変更した場合は collect_question_links も合わせて変更すること
+UNIVERSITY_PAGE_EXTRACT_JS = """
+(limit) => {
+    const links = [];
+    let heading = '';
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT);
+    for (let el = walker.currentNode; el && links.length < limit; el = walker.nextNode()) {
+        const tag = el.tagName;
+        if (tag === 'H1' || tag === 'H2' || tag === 'H3' || tag === 'H4') {
+            const text = el.textContent.trim();
+            if (text.includes('年度')) {
+                heading = text;
+            }
+        } else if (tag === 'A') {
+            const href = el.getAttribute('href') || '';
+            const text = el.textContent.trim();
+            if (href.includes('/question/') || text.includes('問題')) {
+                const row = el.closest('tr');
+                links.push({
+                    href: href,
+                    text: text,
+                    rowText: row ? row.textContent : '',
+                    heading: heading,
+                });
+            }
+        }
+    }
+    return links;
+}
+"""
+
+HEADING_TAGS = frozenset(['h1', 'h2', 'h3', 'h4'])
+
+# 問題ページのURL: /university/{univ_id}/{year}/{subject_code}{rest}/question/
+QUESTION_URL_PATTERN = re.compile(r'/university/\w+/(\d{4})/(\w)(\w+)/(question|answer)/')
+YEAR_PATTERN = re.compile(r'(\d{4})')
+
+BASE_URL = 'https://www.toshin-kakomon.com'
+
+# 科目名の逆引き（表示用）
+SUBJECT_DISPLAY_NAMES = {
+    'english': '英語',
+    'math': '数学',
+    'japanese': '国語',
+    'physics': '物理',
+    'chemistry': '化学',
+    'biology': '生物',
+    'history': '歴史',
+    'geography': '地理',
+    'science': '理科',
+    'social': '社会',
+    'other': 'その他'
+}
+
+
+def _no_log(message):
+    pass
+
+
+def collect_question_links(content, encoding=None, limit=MAX_QUESTION_LINKS):
+    """
+    保存済みの大学ページから問題リンクの情報を収集（UNIVERSITY_PAGE_EXTRACT_JS のlxml版）
+
+    Args:
+        content (bytes or str): 描画後のHTML
+        encoding (str): バイト列の文字コード
+        limit (int): 取得する問題リンクの上限
+
+    Returns:
+        list: {'href', 'text', 'rowText', 'heading'} の辞書リスト
+    """
+    root = parse_html(content, encoding=encoding)
+    if root is None:
+        return []
+
+    body = root.find('.//body')
+    links = []
+    heading = ''
+
+    for el in (body if body is not None else root).iter():
+        if len(links) >= limit:
+            break
+        # コメントなどの要素以外のノードは対象外
+        if not isinstance(el.tag, str):
+            continue
+
+        tag = el.tag.lower()
+        if tag in HEADING_TAGS:
+            text = el.text_content().strip()
+            if '年度' in text:
+                heading = text
+        elif tag == 'a':
+            href = el.get('href') or ''
+            text = el.text_content().strip()
+            if '/question/' in href or '問題' in text:
+                row = next(el.iterancestors('tr'), None)
+                links.append({
+                    'href': href,
+                    'text': text,
+                    'rowText': row.text_content() if row is not None else '',
+                    'heading': heading,
+                })
+
+    return links
+
+
+def build_university_exam_data(university_name, links, log=None):
+    """
+    収集した問題リンクから過去問データを組み立てる
+
+    Args:
+        university_name: 大学名
+        links (list): {'href', 'text', 'rowText', 'heading'} の辞書リスト
+        log (callable): 詳細ログを出力する関数
+
+    Returns:
+        list: 過去問データの辞書リスト
+    """
+    log = log or _no_log
+    exams_data = []
+
+    # ページ上の年度（「2025年度 入試問題」などの見出し）
+    heading_years = {}
+    for heading in {link['heading'] for link in links if link['heading']}:
+        year_match = YEAR_PATTERN.search(heading)
+        if year_match and 2000 <= int(year_match.group(1)) <= 2030:
+            heading_years[heading] = int(year_match.group(1))
+
+    years = set(heading_years.values())
+
+    # 年度見出しが見つからない場合は、URLの年度を使う
+    if not years:
+        for link in links:
+            url_match = QUESTION_URL_PATTERN.search(link['href'])
+            if url_match and 2000 <= int(url_match.group(1)) <= 2030:
+                years.add(int(url_match.group(1)))
+
+    # デフォルト年度
+    if not years:
+        years = {2025}
+
+    log(f"  検出した年度: {sorted(years, reverse=True)}")
+
+    # 各問題リンクを処理
+    for i, link in enumerate(links):
+        try:
+            href = link['href']
+
+            # デバッグ: 最初の3リンクを詳細ログ
+            if i < 3:
+                log(f"  処理中[{i+1}]: href={href}")
+
+            # 相対URLを絶対URLに変換
+            if href.startswith('/'):
+                full_url = f"{BASE_URL}{href}"
+            elif href.startswith('http'):
+                full_url = href
+            else:
+                if i < 3:
+                    log(f"    スキップ: 無効なURL形式")
+                continue
+
+            parent_text = link['rowText'] or ''
+
+            # URLから年度と科目コードを抽出
+            # URL形式: /university/0l/2025/e0l251/question/
+            # - 2025: 年度
+            # - e0l251の最初の文字 'e': 科目コード
+            # デフォルトは直前の年度見出し、なければ最新年度
+            year = heading_years.get(link['heading'], max(years))
+            subject = 'other'  # デフォルト科目
+
+            # URLパターンマッチ: /university/{univ_id}/{year}/{subject_code}{rest}/question/
+            url_match = QUESTION_URL_PATTERN.search(href)
+            if url_match:
+                potential_year = int(url_match.group(1))
+                if 2000 <= potential_year <= 2030:
+                    year = potential_year
+
+                # 科目コード（URLの3番目のパスセグメントの最初の文字）
+                subject = classify_subject(
+                    link['text'], provider='toshin', code=url_match.group(2)
+                ).subject
+
+            # 学部・試験種別を推定（表記は canonicalize でそろえる）
+            schedule_match = re.search(r'前期|中期|後期', parent_text)
+            exam_type = canonicalize('exam_type', schedule_match.group(0) if schedule_match else '')
+            department = ''
+            if '文科' in parent_text:
+                dept_match = re.search(r'文科[一二三]類', parent_text)
+                if dept_match:
+                    department = dept_match.group(0)
+            elif '理科' in parent_text:
+                dept_match = re.search(r'理科[一二三]類', parent_text)
+                if dept_match:
+                    department = dept_match.group(0)
+            department = canonicalize('department', department)
+
+            # 過去問データを追加
+            exams_data.append({
+                'year': year,
+                'subject': subject,
+                'exam_type': exam_type,
+                'department': department,
+                'problem_url': full_url,
+                'description': f'{university_name} {year}年度 {SUBJECT_DISPLAY_NAMES.get(subject, subject)} {department} {exam_type}',
+                'source_type': 'yobi_school',
+                'university_name': university_name
+            })
+
+        except Exception as e:
+            if i < 5:  # 最初の5件のエラーのみログ出力
+                log(f"  問題リンク処理エラー[{i+1}]: {e}")
+                log(f"    詳細: {traceback.format_exc()[:200]}")
+            continue
+
+    # 重複削除（同じ year + subject + exam_type の組み合わせ）
+    seen = set()
+    unique_exams = []
+    for exam in exams_data:
+        key = (exam['year'], exam['subject'], exam['exam_type'], exam['department'])
+        if key not in seen:
+            seen.add(key)
+            unique_exams.append(exam)
+
+    exams_data = unique_exams
+    log(f"  抽出した過去問データ: {len(exams_data)}件")
+
+    return exams_data
+
+
+def extract_stored_page(task):
+    """
+    ページストアに保存した大学ページから過去問データを抽出（manage.py reextract のワーカープロセスで実行）
+
+    DBにはアクセスしません。
+
+    Args:
+        task (dict): {'path', 'url', 'label'（大学名）, 'encoding'}
+
+    Returns:
+        list: 過去問データの辞書リスト
+    """
+    content = read_blob(task['path'])
+    links = collect_question_links(content, encoding=task['encoding'] or None)
+    return build_university_exam_data(task['label'], links)
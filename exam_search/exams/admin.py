@@ -1,10 +1,20 @@
 from django.contrib import admin
-from .models import University, Exam, AnswerSource, SearchHistory, Favorite
+from .models import (University, Exam, AnswerSource, SearchHistory, Favorite, CrawlFrontier,
+                     ScheduledTaskRun, PageFingerprint, CrawlWorker, StoredPage,
+                     DataQualitySnapshot, UniversityAlias)
+
+
+class UniversityAliasInline(admin.TabularInline):
+
+    model = UniversityAlias
+    extra = 1
+    fields = ('alias_type', 'provider', 'value')
 
 
 @admin.register(University)
 class UniversityAdmin(admin.ModelAdmin):
    
+    inlines = [UniversityAliasInline]
     list_display = ('name', 'name_kana', 'school_type', 'exam_count', 'created_at')
     list_filter = ('school_type', 'created_at')
     search_fields = ('name', 'name_kana')
@@ -98,3 +108,89 @@ class FavoriteAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     
     readonly_fields = ('created_at',)
+
+
+@admin.register(CrawlFrontier)
+class CrawlFrontierAdmin(admin.ModelAdmin):
+
+    list_display = ('crawler', 'label', 'priority', 'state', 'attempts',
+                    'next_eligible_at', 'last_crawled_at')
+    list_filter = ('crawler', 'state', 'priority')
+    search_fields = ('url', 'label', 'host')
+    ordering = ('priority', 'next_eligible_at')
+
+
+@admin.register(ScheduledTaskRun)
+class ScheduledTaskRunAdmin(admin.ModelAdmin):
+
+    list_display = ('schedule', 'task', 'scheduled_for', 'status',
+                    'duration_seconds', 'started_at', 'finished_at')
+    list_filter = ('schedule', 'task', 'status')
+    ordering = ('-scheduled_for',)
+    date_hierarchy = 'scheduled_for'
+
+    readonly_fields = ('schedule', 'task', 'scheduled_for', 'status', 'started_at',
+                       'finished_at', 'duration_seconds', 'error')
+
+
+@admin.register(PageFingerprint)
+class PageFingerprintAdmin(admin.ModelAdmin):
+
+    list_display = ('crawler', 'url', 'record_count', 'last_checked_at', 'last_changed_at')
+    list_filter = ('crawler',)
+    search_fields = ('url',)
+    ordering = ('crawler', 'url')
+
+    readonly_fields = ('crawler', 'url', 'content_hash', 'records_hash', 'record_count',
+                       'last_checked_at', 'last_changed_at', 'created_at')
+
+
+@admin.register(CrawlWorker)
+class CrawlWorkerAdmin(admin.ModelAdmin):
+
+    list_display = ('worker_id', 'crawlers', 'status', 'jobs_done', 'jobs_failed',
+                    'started_at', 'last_heartbeat_at')
+    list_filter = ('status',)
+    search_fields = ('worker_id',)
+    ordering = ('-started_at',)
+
+    readonly_fields = ('worker_id', 'crawlers', 'status', 'jobs_done', 'jobs_failed',
+                       'started_at', 'last_heartbeat_at', 'stopped_at')
+
+
+@admin.register(StoredPage)
+class StoredPageAdmin(admin.ModelAdmin):
+
+    list_display = ('provider', 'label', 'url', 'status_code', 'size', 'fetched_at')
+    list_filter = ('provider', 'status_code')
+    search_fields = ('url', 'label', 'content_hash')
+    ordering = ('-fetched_at',)
+
+    readonly_fields = ('provider', 'url', 'final_url', 'label', 'content_hash', 'encoding',
+                       'status_code', 'size', 'fetched_at')
+
+
+@admin.register(DataQualitySnapshot)
+class DataQualitySnapshotAdmin(admin.ModelAdmin):
+
+    list_display = ('generated_at', 'exam_total', 'answer_source_total')
+    ordering = ('-generated_at',)
+
+    readonly_fields = ('generated_at', 'report')
+
+    def exam_total(self, obj):
+        return obj.report.get('exams', {}).get('total')
+    exam_total.short_description = '過去問数'
+
+    def answer_source_total(self, obj):
+        return obj.report.get('answer_sources', {}).get('total')
+    answer_source_total.short_description = '解答ソース数'
+
+
+@admin.register(UniversityAlias)
+class UniversityAliasAdmin(admin.ModelAdmin):
+
+    list_display = ('value', 'alias_type', 'provider', 'university', 'created_at')
+    list_filter = ('alias_type', 'provider')
+    search_fields = ('value', 'university__name')
+    ordering = ('university__name', 'alias_type', 'value')
@@ -0,0 +1,125 @@
+"""
+表記の正規化（試験種別・学部・大学名）
+
+クローラーやインポートスクリプトが取得した表記の揺れ（「前期」「一般入試（前期）」
+「general」、全角・半角、空白など）を、DBに書き込む前に統一します。
+同じ過去問が表記違いで別の Exam として登録されないよう、すべての取り込み処理は
+保存前に canonicalize() を通します。
+
+- 規則は種別ごとの表（正規表現 → 正規の表記）で、モジュール読み込み時にコンパイル
+- 結果は入力ごとにメモ化
+
+使用例:
+    canonicalize('exam_type', '前期日程')           # '一般入試'
+    canonicalize('exam_type', '後期')               # '一般入試（後期）'
+    canonicalize('department', '全学部日程 (文系)')  # '全学部日程（文系）'
+    canonicalize_exam({'exam_type': 'general', 'department': ' 法学部 '})
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+DEFAULT_EXAM_TYPE = '一般入試'
+
+# 試験種別: (パターン, 正規の表記)。上から順に判定し、最初に一致したものを使う
+# 前期日程は一般入試の標準として「一般入試」に統一し、中期・後期は区別する
+EXAM_TYPE_RULES = [
+    (r'後期', '一般入試（後期）'),
+    (r'中期', '一般入試（中期）'),
+    (r'共通テスト|センター試験', '共通テスト'),
+    (r'推薦', '推薦入試'),
+    (r'総合型|ao入試|^ao$', '総合型選抜'),
+    (r'前期|一般入試|一般選抜|^一般$|^general$', DEFAULT_EXAM_TYPE),
+]
+
+# 学部: (パターン, 置換後)。すべての規則を順に適用する
+DEPARTMENT_RULES = [
+    (r'\s+', ''),
+    # 「文科1類」などの算用数字は東進の表記（文科一類）に合わせる
+    (r'([文理]科)1類', r'\1一類'),
+    (r'([文理]科)2類', r'\1二類'),
+    (r'([文理]科)3類', r'\1三類'),
+]
+
+# 大学名: (パターン, 置換後)
+UNIVERSITY_RULES = [
+    (r'\s+', ''),
+]
+
+
+def _compile(rules):
+    return [(re.compile(pattern, re.IGNORECASE), replacement) for pattern, replacement in rules]
+
+
+_EXAM_TYPE_RULES = _compile(EXAM_TYPE_RULES)
+_DEPARTMENT_RULES = _compile(DEPARTMENT_RULES)
+_UNIVERSITY_RULES = _compile(UNIVERSITY_RULES)
+
+# NFKC で半角になった括弧を、DBの表記（全角）に戻す
+_FULLWIDTH_PARENS = str.maketrans({'(': '（', ')': '）'})
+
+
+def normalize_width(value):
+    """
+    全角英数字・半角カナなどを統一し、括弧は全角にそろえる
+    """
+    return unicodedata.normalize('NFKC', value).translate(_FULLWIDTH_PARENS).strip()
+
+
+def _canonical_exam_type(value):
+    if not value:
+        return DEFAULT_EXAM_TYPE
+    for pattern, canonical in _EXAM_TYPE_RULES:
+        if pattern.search(value):
+            return canonical
+    return value
+
+
+def _apply_rules(rules, value):
+    for pattern, replacement in rules:
+        value = pattern.sub(replacement, value)
+    return value
+
+
+_CANONICALIZERS = {
+    'exam_type': _canonical_exam_type,
+    'department': lambda value: _apply_rules(_DEPARTMENT_RULES, value),
+    'university': lambda value: _apply_rules(_UNIVERSITY_RULES, value),
+}
+
+
+@lru_cache(maxsize=8192)
+def canonicalize(kind, value):
+    """
+    表記を正規化
+
+    Args:
+        kind (str): 種別（exam_type / department / university）
+        value (str): 取得した表記
+
+    Returns:
+        str: 正規の表記（試験種別が空の場合は「一般入試」）
+    """
+    if kind not in _CANONICALIZERS:
+        raise ValueError(f'Unknown canonicalization kind: {kind}')
+    return _CANONICALIZERS[kind](normalize_width(value or ''))
+
+
+def canonicalize_exam(exam_data):
+    """
+    過去問データ（dict）の試験種別・学部・大学名を正規化（元のdictを更新して返す）
+
+    Args:
+        exam_data (dict): exam_type / department / university_name を含むdict（ない項目は無視）
+
+    Returns:
+        dict: exam_data
+    """
+    if 'exam_type' in exam_data:
+        exam_data['exam_type'] = canonicalize('exam_type', exam_data['exam_type'])
+    if 'department' in exam_data:
+        exam_data['department'] = canonicalize('department', exam_data['department'])
+    if exam_data.get('university_name'):
+        exam_data['university_name'] = canonicalize('university', exam_data['university_name'])
+    return exam_data
@@ -0,0 +1,236 @@
+"""
+重複する過去問の統合
+
+同じキー（大学・年度・科目・試験種別）の Exam をグループとし、グループごとに
+マスターを1件選んで、他の Exam（統合元）の解答ソース・お気に入り・問題URLを
+マスターへ移してから統合元を削除します。
+
+処理はすべてSQLの集合演算で行い、件数によらずクエリ数は一定です。
+
+1. ウィンドウ関数（FIRST_VALUE）で各 Exam のマスターを求め、統合元 → マスターの
+   対応表を一時テーブルに作る（学部名のある Exam を優先し、同順位はIDの小さい方）
+2. マスターに同じURLがない解答ソースを UPDATE でまとめてマスターへ付け替え、
+   残った（重複する）解答ソースを DELETE する（お気に入りもユーザー単位で同様）
+3. 問題URLのないマスターに統合元の問題URLを設定する
+4. 統合元の Exam をまとめて削除する
+
+すべて1トランザクションで実行し、DRY RUNでは変更内容を取得した後にロールバックします。
+
+使用例:
+    result = merge_duplicate_exams(dry_run=True)
+    for group in result.groups:
+        ...
+"""
+
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from exams.models import Exam, AnswerSource, Favorite
+
+# 重複とみなすキー（学部は含めない）
+DEFAULT_KEY_FIELDS = ('university', 'year', 'subject', 'exam_type')
+
+MAP_TABLE = 'exam_merge_map'
+
+MergeResult = namedtuple('MergeResult', ['groups', 'stats'])
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _column(model, field_name):
+    return connection.ops.quote_name(model._meta.get_field(field_name).column)
+
+
+class ExamMerger:
+    """
+    重複する過去問の統合処理
+
+    plan() で対応表を作り、diff() で変更内容を取得、apply() で反映します。
+    いずれも同じトランザクション内で呼び出す必要があります（merge_duplicate_exams を参照）。
+    """
+
+    def __init__(self, key_fields=DEFAULT_KEY_FIELDS):
+        """
+        Args:
+            key_fields (tuple): 重複とみなすExamのフィールド
+        """
+        self.key_fields = tuple(key_fields)
+        self.t = {
+            'exam': _table(Exam),
+            'source': _table(AnswerSource),
+            'favorite': _table(Favorite),
+            'map': connection.ops.quote_name(MAP_TABLE),
+        }
+
+    def _execute(self, cursor, sql, params=()):
+        cursor.execute(sql.format(**self.t), params)
+        return cursor.rowcount
+
+    def plan(self):
+        """
+        統合元 → マスターの対応表（一時テーブル）を作成
+
+        Returns:
+            int: 統合元のExam数
+        """
+        partition = ', '.join(_column(Exam, field) for field in self.key_fields)
+
+        with connection.cursor() as cursor:
+            self._execute(cursor, 'DROP TABLE IF EXISTS {map}')
+            self._execute(cursor, f"""
+                CREATE TEMPORARY TABLE {{map}} AS
+                SELECT id AS loser_id, master_id
+                FROM (
+                    SELECT id, FIRST_VALUE(id) OVER (
+                        PARTITION BY {partition}
+                        ORDER BY CASE WHEN TRIM(department) <> '' THEN 0 ELSE 1 END, id
+                    ) AS master_id
+                    FROM {{exam}}
+                ) ranked
+                WHERE id <> master_id
+            """)
+            self._execute(cursor, f'CREATE INDEX {MAP_TABLE}_loser ON {{map}} (loser_id)')
+            self._execute(cursor, f'CREATE INDEX {MAP_TABLE}_master ON {{map}} (master_id)')
+            cursor.execute('SELECT COUNT(*) FROM {map}'.format(**self.t))
+            return cursor.fetchone()[0]
+
+    # 統合元の行のうち、マスターへ移すもの（マスターに同じ値がなく、
+    # 同じグループの他の統合元にもIDの小さい同じ値がない）を選ぶSQL
+    def _movable_sql(self, table, column):
+        return f"""
+            SELECT r.id FROM {{{table}}} r
+            JOIN {{map}} m ON r.exam_id = m.loser_id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {{{table}}} o
+                WHERE o.exam_id = m.master_id AND o.{column} = r.{column}
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM {{{table}}} o
+                JOIN {{map}} m2 ON o.exam_id = m2.loser_id
+                WHERE m2.master_id = m.master_id AND o.{column} = r.{column} AND o.id < r.id
+            )
+        """
+
+    def diff(self):
+        """
+        変更内容をグループごとに取得
+
+        Returns:
+            list: グループ（dict: master, losers）のリスト。
+                  統合元は dict: exam, sources, favorites, problem_url
+        """
+        losers = {}
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT loser_id, master_id FROM {map} ORDER BY master_id, loser_id'.format(**self.t))
+            pairs = cursor.fetchall()
+
+            cursor.execute(self._movable_sql('source', 'answer_url').format(**self.t))
+            movable_sources = {row[0] for row in cursor.fetchall()}
+            cursor.execute(self._movable_sql('favorite', 'user_id').format(**self.t))
+            movable_favorites = {row[0] for row in cursor.fetchall()}
+
+        ids = {exam_id for pair in pairs for exam_id in pair}
+        exams = Exam.objects.select_related('university').in_bulk(ids)
+
+        for loser_id, master_id in pairs:
+            losers[loser_id] = {
+                'exam': exams[loser_id],
+                'sources': [],
+                'favorites': [],
+                'problem_url': False,
+            }
+
+        for source in AnswerSource.objects.filter(exam_id__in=losers).order_by('id'):
+            losers[source.exam_id]['sources'].append((source, source.id in movable_sources))
+        for favorite in Favorite.objects.filter(exam_id__in=losers).order_by('id'):
+            losers[favorite.exam_id]['favorites'].append((favorite, favorite.id in movable_favorites))
+
+        groups = {}
+        for loser_id, master_id in pairs:
+            group = groups.setdefault(master_id, {'master': exams[master_id], 'losers': []})
+            loser = losers[loser_id]
+            master = group['master']
+            # 問題URLはIDの小さい統合元から1件だけ引き継ぐ
+            if not master.problem_url and loser['exam'].problem_url and not any(
+                other['problem_url'] for other in group['losers']
+            ):
+                loser['problem_url'] = True
+            group['losers'].append(loser)
+
+        return list(groups.values())
+
+    def apply(self):
+        """
+        対応表に従って統合を反映
+
+        Returns:
+            dict: 処理件数
+        """
+        now = timezone.now()
+        stats = {}
+
+        with connection.cursor() as cursor:
+            for table, column, prefix in (('source', 'answer_url', 'sources'), ('favorite', 'user_id', 'favorites')):
+                # 移せるものをまとめてマスターへ付け替え、残り（重複）を削除する
+                set_updated = ', updated_at = %s' if table == 'source' else ''
+                stats[f'{prefix}_moved'] = self._execute(cursor, f"""
+                    UPDATE {{{table}}}
+                    SET exam_id = (SELECT m.master_id FROM {{map}} m WHERE m.loser_id = {{{table}}}.exam_id){set_updated}
+                    WHERE id IN ({self._movable_sql(table, column)})
+                """, [now] if set_updated else [])
+                stats[f'{prefix}_dropped'] = self._execute(cursor, f"""
+                    DELETE FROM {{{table}}} WHERE exam_id IN (SELECT loser_id FROM {{map}})
+                """)
+
+            stats['problem_urls'] = self._execute(cursor, """
+                UPDATE {exam}
+                SET problem_url = (
+                    SELECT l.problem_url FROM {exam} l
+                    JOIN {map} m ON l.id = m.loser_id
+                    WHERE m.master_id = {exam}.id AND l.problem_url <> ''
+                    ORDER BY l.id LIMIT 1
+                ), updated_at = %s
+                WHERE problem_url = '' AND id IN (
+                    SELECT m.master_id FROM {map} m
+                    JOIN {exam} l ON l.id = m.loser_id
+                    WHERE l.problem_url <> ''
+                )
+            """, [now])
+
+            # 子レコードは移動・削除済みのため、Examを直接削除できる
+            stats['exams_deleted'] = self._execute(cursor, """
+                DELETE FROM {exam} WHERE id IN (SELECT loser_id FROM {map})
+            """)
+
+            self._execute(cursor, 'DROP TABLE {map}')
+
+        return stats
+
+
+def merge_duplicate_exams(key_fields=DEFAULT_KEY_FIELDS, dry_run=False):
+    """
+    重複する過去問を1トランザクションで統合
+
+    Args:
+        key_fields (tuple): 重複とみなすExamのフィールド
+        dry_run (bool): Trueなら変更内容を取得するのみで、データベースは変更しない
+
+    Returns:
+        MergeResult: groups（diff() の結果）, stats（処理件数、DRY RUNでは予定件数）
+    """
+    merger = ExamMerger(key_fields)
+
+    with transaction.atomic():
+        merger.plan()
+        groups = merger.diff()
+        stats = merger.apply()
+        stats['groups'] = len(groups)
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return MergeResult(groups, stats)
@@ -0,0 +1,113 @@
+"""
+学校名のかな表記の生成
+
+pykakasi の変換器は辞書の読み込みに時間がかかるため、プロセス内で1つだけ作成して
+使い回します。University の保存時（pre_save）にかな表記が空なら自動で設定し、
+既存データは backfill_name_kana() でまとめて補完します。
+
+pykakasi がインストールされていない場合、かな表記は生成しません（空のまま）。
+"""
+
+import threading
+from functools import lru_cache
+
+try:
+    from pykakasi import kakasi
+    KAKASI_AVAILABLE = True
+except ImportError:
+    KAKASI_AVAILABLE = False
+
+_converter_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_converter():
+    """
+    共有の変換器を取得（初回のみ作成）
+
+    Returns:
+        kakasi: 変換器、pykakasi がない場合はNone
+    """
+    if not KAKASI_AVAILABLE:
+        return None
+    return kakasi()
+
+
+@lru_cache(maxsize=4096)
+def to_kana(name):
+    """
+    学校名からかな表記（ひらがな）を生成
+
+    Args:
+        name (str): 学校名
+
+    Returns:
+        str: かな表記、変換できない場合は空文字列
+    """
+    converter = get_converter()
+    if converter is None or not name:
+        return ''
+
+    # 変換器はスレッドセーフではないため、同時に変換しない
+    with _converter_lock:
+        result = converter.convert(name)
+    return ''.join(item['hira'] for item in result)
+
+
+def fill_name_kana(sender, instance, raw=False, **kwargs):
+    """
+    University の pre_save: かな表記が空なら学校名から生成
+    """
+    if raw or instance.name_kana or not instance.name:
+        return
+    instance.name_kana = to_kana(instance.name)
+
+
+def backfill_name_kana(batch_size=500, overwrite=False, dry_run=False, on_update=None):
+    """
+    既存の学校のかな表記をまとめて生成
+
+    bulk_update で書き込むため、pre_save は呼ばれません（updated_at も更新しません）。
+
+    Args:
+        batch_size (int): 1回の bulk_update の件数
+        overwrite (bool): Trueならかな表記がある学校も生成し直す
+        dry_run (bool): Trueなら書き込まない
+        on_update (callable): 変換した学校ごとに (university, 変換前のかな) を受け取る関数
+
+    Returns:
+        dict: updated（更新件数）, skipped（既存または変換できず）
+    """
+    # 関数内でインポート（models から本モジュールを参照するため）
+    from exams.models import University
+
+    universities = University.objects.only('id', 'name', 'name_kana').order_by('id')
+    if not overwrite:
+        universities = universities.filter(name_kana='')
+
+    stats = {'updated': 0, 'skipped': 0}
+    batch = []
+
+    def flush():
+        if batch and not dry_run:
+            University.objects.bulk_update(batch, ['name_kana'], batch_size=batch_size)
+        batch.clear()
+
+    for university in universities.iterator(chunk_size=batch_size):
+        kana = to_kana(university.name)
+        if not kana or kana == university.name_kana:
+            stats['skipped'] += 1
+            continue
+
+        old_kana = university.name_kana
+        university.name_kana = kana
+        batch.append(university)
+        stats['updated'] += 1
+        if on_update:
+            on_update(university, old_kana)
+
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    return stats
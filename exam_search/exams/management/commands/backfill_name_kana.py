@@ -0,0 +1,83 @@
+"""
+Django管理コマンド: 学校名のかな表記の一括生成
+
+かな表記が空の学校に、学校名から生成したかな表記をまとめて設定します。
+変換器は1つだけ作成して使い回し、batch_size 件ごとに bulk_update で書き込みます。
+
+新しく保存される学校には University の pre_save で自動設定されるため、
+このコマンドは既存データの補完や、変換辞書の更新後の再生成に使います。
+
+使用例:
+    # かな表記が空の学校に設定
+    python manage.py backfill_name_kana
+
+    # すべての学校のかな表記を生成し直す
+    python manage.py backfill_name_kana --overwrite
+
+    # 変換結果を確認するだけ（DBに保存しない）
+    python manage.py backfill_name_kana --dry-run
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.kana import KAKASI_AVAILABLE, backfill_name_kana
+
+
+class Command(BaseCommand):
+    help = '学校名からかな表記をまとめて生成します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='1回の書き込み件数（デフォルト: 500）'
+        )
+
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help='かな表記がある学校も生成し直す'
+        )
+
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='DRY RUNモード（変換結果を表示するのみでデータベースに保存しない）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        if not KAKASI_AVAILABLE:
+            raise CommandError('pykakasi がインストールされていません（pip install pykakasi）')
+
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        self.stdout.write(self.style.SUCCESS('学校名のかな表記を生成します'))
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN モード: データベースには保存しません'))
+
+        verbosity = options['verbosity']
+
+        def on_update(university, old_kana):
+            if verbosity >= 2 or options['dry_run']:
+                before = f' (旧: {old_kana})' if old_kana else ''
+                self.stdout.write(f'  ✓ {university.name} → {university.name_kana}{before}')
+
+        started = time.monotonic()
+        stats = backfill_name_kana(
+            batch_size=max(1, options['batch_size']),
+            overwrite=options['overwrite'],
+            dry_run=options['dry_run'],
+            on_update=on_update,
+        )
+        elapsed = time.monotonic() - started
+
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(f"更新{'予定' if options['dry_run'] else ''}: {stats['updated']}校")
+        self.stdout.write(f"スキップ（変更なし・変換不可）: {stats['skipped']}校")
+        self.stdout.write(f'処理時間: {elapsed:.1f}秒')
@@ -0,0 +1,224 @@
+"""
+Django管理コマンド: 公式サイトの過去問掲載チェック
+
+university_list.py の大学について、公式サイトから過去問ページを探し、
+掲載状況（has_official_pastpaper / pastpaper_url / pastpaper_years / pastpaper_checked_at）を
+まとめて更新します。
+
+大学ごとのチェックはスレッドで並列に行い、同じホストへのリクエスト間隔・robots.txt は
+クローラー共通の方針（RetryPolicy）に従います。DBへの書き込みは最後に bulk_update で行います。
+
+使用例:
+    # 国立大学をチェック
+    python manage.py check_official_pastpapers
+
+    # 公立大学も含める
+    python manage.py check_official_pastpapers --include-public
+
+    # 特定の大学のみ、結果を表示するだけ（DBに保存しない）
+    python manage.py check_official_pastpapers --university 東京 --dry-run
+
+    # 同時に8大学、各大学3階層・50ページまで探す
+    python manage.py check_official_pastpapers --workers 8 --max-depth 3 --max-pages 50
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from exams.models import University
+from exams.university_index import get_university_index
+
+# crawlersディレクトリをパスに追加
+CRAWLERS_DIR = os.path.join(settings.BASE_DIR, 'crawlers')
+if CRAWLERS_DIR not in sys.path:
+    sys.path.insert(0, CRAWLERS_DIR)
+
+try:
+    from pastpaper_checker import PastpaperChecker
+    from crawler_config import PASTPAPER_CHECK_CONFIG
+    from crawler_metrics import export_metrics
+    from university_list import NATIONAL_UNIVERSITIES, PUBLIC_UNIVERSITIES
+    CRAWLERS_AVAILABLE = True
+except ImportError as e:
+    CRAWLERS_AVAILABLE = False
+    IMPORT_ERROR = str(e)
+
+
+def pastpaper_note(result):
+    """
+    チェック結果の備考（import_pastpaper_results と同じ表記）
+    """
+    if not result['found']:
+        return '過去問ページ未発見'
+    if len(result['years']) >= 3:
+        return '過去3年分以上掲載'
+    if result['years']:
+        return f"{len(result['years'])}年分掲載"
+    return '過去問ページあり（年度不明）'
+
+
+class Command(BaseCommand):
+    help = '大学公式サイトの過去問掲載状況をチェックしてデータベースを更新します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-public',
+            action='store_true',
+            help='公立大学（PUBLIC_UNIVERSITIES）もチェックする'
+        )
+
+        parser.add_argument(
+            '--university',
+            type=str,
+            help='大学名に指定した文字列を含む大学のみチェック'
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='同時にチェックする大学数（デフォルト: PASTPAPER_CHECK_CONFIG）'
+        )
+
+        parser.add_argument(
+            '--max-depth',
+            type=int,
+            default=None,
+            help='トップページからたどるリンクの深さ（デフォルト: PASTPAPER_CHECK_CONFIG）'
+        )
+
+        parser.add_argument(
+            '--max-pages',
+            type=int,
+            default=None,
+            help='1大学あたりの最大取得ページ数（デフォルト: PASTPAPER_CHECK_CONFIG）'
+        )
+
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='DRY RUNモード（結果を表示するのみでデータベースに保存しない）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        if not CRAWLERS_AVAILABLE:
+            raise CommandError(f'クローラーモジュールが見つかりません: {IMPORT_ERROR}')
+
+        targets = dict(NATIONAL_UNIVERSITIES)
+        if options['include_public']:
+            targets.update(PUBLIC_UNIVERSITIES)
+        if options['university']:
+            targets = {name: url for name, url in targets.items() if options['university'] in name}
+        if not targets:
+            raise CommandError('チェック対象の大学がありません')
+
+        workers = max(1, options['workers'] or PASTPAPER_CHECK_CONFIG['workers'])
+        dry_run = options['dry_run']
+
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        self.stdout.write(self.style.SUCCESS(f'公式サイトの過去問掲載チェック（{len(targets)}校, {workers}並列）'))
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN モード: データベースには保存しません'))
+
+        def check(name, homepage):
+            # requests.Session はスレッド間で共有しないよう、大学ごとに作る
+            checker = PastpaperChecker(max_depth=options['max_depth'], max_pages=options['max_pages'])
+            return checker.check(name, homepage)
+
+        started = time.monotonic()
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(check, name, homepage): name
+                for name, homepage in targets.items()
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                name = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'[{i}/{len(targets)}] ✗ {name}: {e}'))
+                    continue
+
+                results.append(result)
+                if result['error']:
+                    self.stdout.write(self.style.ERROR(f"[{i}/{len(targets)}] ✗ {name}: {result['error']}"))
+                elif result['found']:
+                    years = ', '.join(str(year) for year in result['years']) or '年度不明'
+                    self.stdout.write(f"[{i}/{len(targets)}] ✓ {name}: {result['url']} ({years})")
+                else:
+                    self.stdout.write(f"[{i}/{len(targets)}] × {name}: 過去問ページ未発見 ({result['pages']}ページ)")
+
+        stats = self.save_results(results, dry_run)
+        elapsed = time.monotonic() - started
+        export_metrics()
+
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(f"過去問ページあり: {stats['found']}校 / {len(targets)}校")
+        self.stdout.write(f"取得エラー: {stats['errors']}校")
+        self.stdout.write(f"更新{'予定' if dry_run else ''}: {stats['updated']}校")
+        self.stdout.write(f"データベースに未登録: {stats['not_registered']}校")
+        self.stdout.write(f'処理時間: {elapsed:.1f}秒')
+
+    def save_results(self, results, dry_run=False):
+        """
+        チェック結果をまとめてデータベースに保存
+
+        トップページを取得できなかった大学は、前回の結果を残すため更新しません。
+
+        Returns:
+            dict: found, errors, updated, not_registered
+        """
+        stats = {'found': 0, 'errors': 0, 'updated': 0, 'not_registered': 0}
+
+        # 大学は別名の索引（学校名・公式サイトのドメイン）から解決し、まとめて読み込む
+        university_index = get_university_index()
+        resolved = []
+        for result in results:
+            if result['found']:
+                stats['found'] += 1
+            if result['error']:
+                stats['errors'] += 1
+                continue
+
+            university_id = university_index.resolve(name=result['name'], url=result['homepage'])
+            if university_id is None:
+                stats['not_registered'] += 1
+                self.stdout.write(self.style.WARNING(f"⚠ {result['name']}: データベースに未登録"))
+                continue
+            resolved.append((university_id, result))
+
+        universities = University.objects.in_bulk([university_id for university_id, _ in resolved])
+        checked_at = timezone.now()
+        updated = {}
+
+        for university_id, result in resolved:
+            university = universities[university_id]
+            university.has_official_pastpaper = result['found']
+            university.pastpaper_url = result['url']
+            university.pastpaper_years = ', '.join(str(year) for year in result['years'])
+            university.pastpaper_checked_at = checked_at
+            university.pastpaper_note = pastpaper_note(result)
+            if not university.official_url:
+                university.official_url = result['homepage']
+            # bulk_update では auto_now が働かないため明示的に設定
+            university.updated_at = checked_at
+            updated[university_id] = university
+
+        stats['updated'] = len(updated)
+        if not dry_run:
+            University.objects.bulk_update(updated.values(), [
+                'has_official_pastpaper', 'pastpaper_url', 'pastpaper_years', 'pastpaper_checked_at',
+                'pastpaper_note', 'official_url', 'updated_at',
+            ], batch_size=500)
+
+        return stats
@@ -15,21 +15,35 @@
     python manage.py crawl_exam_data --year 2024 --dry-run
 """
 
+import os
+import sys
 import time
 import requests
 from bs4 import BeautifulSoup
 from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
-from exams.models import University, Exam, AnswerSource
+from exams.models import Exam, AnswerSource
+from exams.subject_classifier import classify_subject
+from exams.canonical import canonicalize_exam
+from exams.university_index import get_university_index
 from datetime import datetime
 
+# crawlersディレクトリをパスに追加
+CRAWLERS_DIR = os.path.join(settings.BASE_DIR, 'crawlers')
+if CRAWLERS_DIR not in sys.path:
+    sys.path.insert(0, CRAWLERS_DIR)
+
+from http_policy import RetryPolicy
+
 
 class ExamCrawler:
     
 
     def __init__(self, verbose=False):
         self.verbose = verbose
+        self.retry_policy = RetryPolicy()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -40,26 +54,31 @@ class ExamCrawler:
         if self.verbose:
             print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
 
-    def fetch_page(self, url, max_retries=3):
-        
-        
-        for attempt in range(max_retries):
-            try:
-                self.log(f"Fetching: {url}")
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
+    def fetch_page(self, url, max_retries=None):
+        """
+        URLからHTMLを取得（リトライ・ホストごとの停止・間隔調整は RetryPolicy が行う）
 
-                response.encoding = response.apparent_encoding
+        Args:
+            url (str): 取得するURL
+            max_retries (int): 最大リトライ回数（省略時は ERROR_HANDLING の設定値）
 
-                return BeautifulSoup(response.text, 'html.parser')
+        Returns:
+            BeautifulSoup: パースされたHTML
 
-            except requests.RequestException as e:
-                self.log(f"Error fetching {url} (attempt {attempt + 1}/{max_retries}): {e}")
-                if attempt == max_retries - 1:
-                    raise
-                time.sleep(2 ** attempt)  
+        Raises:
+            requests.RequestException: リトライしても取得できなかった場合
+        """
+        try:
+            self.log(f"Fetching: {url}")
+            response = self.retry_policy.request(self.session, 'GET', url, max_retries=max_retries)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            self.log(f"Error fetching {url}: {e}")
+            raise
 
-        return None
+        response.encoding = response.apparent_encoding
+
+        return BeautifulSoup(response.text, 'html.parser')
 
     def crawl_sample_university_list(self):
         
@@ -313,14 +332,16 @@ class Command(BaseCommand):
 
             self.stdout.write(self.style.SUCCESS(f'   {len(universities_data)}件の大学を取得'))
 
-            # 各大学について処理
+            # 各大学について処理（旧名称や公式サイトのドメインからも大学を解決）
+            university_index = None if dry_run else get_university_index()
             for uni_data in universities_data:
                 self.stdout.write(f'\n2. {uni_data["name"]} の過去問を取得中...')
 
                 # 大学の作成または更新
                 if not dry_run:
-                    university, created = University.objects.get_or_create(
-                        name=uni_data['name'],
+                    university_id, created = university_index.get_or_create(
+                        uni_data['name'],
+                        url=uni_data['official_url'],
                         defaults={
                             'name_kana': uni_data['name_kana'],
                             'school_type': uni_data['school_type'],
@@ -330,13 +351,13 @@ class Command(BaseCommand):
 
                     if created:
                         stats['universities_created'] += 1
-                        self.stdout.write(self.style.SUCCESS(f'   ✓ 大学を新規作成: {university.name}'))
+                        self.stdout.write(self.style.SUCCESS(f'   ✓ 大学を新規作成: {uni_data["name"]}'))
                     else:
                         stats['universities_updated'] += 1
-                        self.stdout.write(f'   - 大学は既に存在: {university.name}')
+                        self.stdout.write(f'   - 大学は既に存在: {uni_data["name"]}')
                 else:
                     self.stdout.write(f'   [DRY RUN] 大学: {uni_data["name"]}')
-                    university = None
+                    university_id = None
 
                 # 過去問を取得
                 exams_data = crawler.crawl_sample_exams(uni_data['name'], year_filter)
@@ -344,11 +365,16 @@ class Command(BaseCommand):
 
                 # 各過去問について処理
                 for exam_data in exams_data:
+                    # 科目名をSUBJECT_CHOICESのコードに揃える（例: mathematics → math）
+                    exam_data['subject'] = classify_subject(exam_data['subject']).subject
+                    # 試験種別の表記をそろえる（例: general → 一般入試）
+                    canonicalize_exam(exam_data)
+
                     try:
                         if not dry_run:
                             # 過去問の作成または更新
                             exam, created = Exam.objects.get_or_create(
-                                university=university,
+                                university_id=university_id,
                                 year=exam_data['year'],
                                 subject=exam_data['subject'],
                                 exam_type=exam_data['exam_type'],
@@ -392,7 +418,6 @@ class Command(BaseCommand):
                                         defaults={
                                             'answer_url': source_data['answer_url'],
                                             'has_detailed_explanation': source_data['has_detailed_explanation'],
-                                            'has_video_explanation': source_data['has_video_explanation'],
                                             'reliability_score': source_data['reliability_score'],
                                             'notes': source_data['notes'],
                                             'last_checked_at': timezone.now(),
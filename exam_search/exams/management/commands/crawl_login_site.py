@@ -9,42 +9,145 @@
     --no-headless: ブラウザを表示して実行（デバッグ用）
     --year: 特定の年度のみをクローリング
     --dry-run: データベースに保存せずに表示のみ
+    --concurrency: 大学ページを同時に開くタブ数（2以上で非同期モード）
+    --request-interval: ページ遷移の最小間隔（秒、全タブ共通）
+    --no-block-resources: 画像・フォント・CSSなども読み込む
+    --storage-state: ログイン状態の保存先（有効期限内ならログインを省略）
+    --fresh-login: 保存済みのログイン状態を破棄してログインし直す
+    --no-store-pages: 描画したページをページストアに保存しない
+
+大学ページの取得 → 過去問データの抽出 → 正規化 → 重複除去 → 保存 は
+ingest_pipeline のパイプラインでつながっており、大学ページを取得するごとに
+バッチ単位でデータベースに保存します（すべての大学の取得を待ちません）。
 
 例:
     python manage.py crawl_login_site
     python manage.py crawl_login_site --no-headless
     python manage.py crawl_login_site --year 2024 --dry-run
+    python manage.py crawl_login_site --concurrency 4
 
 必要なパッケージ:
     pip install playwright
     playwright install chromium
 """
 
+import asyncio
+import json
+import logging
+import queue
+import threading
+import re
 import time
 import os
+import sys
 from datetime import datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from django.utils import timezone
 from django.conf import settings
-from exams.models import University, Exam, AnswerSource
+from exams.models import Exam, AnswerSource
+from exams.subject_classifier import classify_subject
+from exams.canonical import canonicalize, canonicalize_exam
+from exams.university_index import get_university_index
+
+logger = logging.getLogger(__name__)
+
+# crawlersディレクトリをパスに追加
+CRAWLERS_DIR = os.path.join(settings.BASE_DIR, 'crawlers')
+if CRAWLERS_DIR not in sys.path:
+    sys.path.insert(0, CRAWLERS_DIR)
+
+from crawler_metrics import get_metrics, export_metrics, host_of
+from crawler_config import DATABASE_CONFIG, PAGE_STORE_CONFIG
+from ingest_pipeline import Pipeline, BatchSink, map_stage, flat_map_stage, dedupe_stage
+from page_store import PageStore
+from toshin_login_extractor import (
+    MAX_QUESTION_LINKS, PAGE_STORE_PROVIDER, UNIVERSITY_PAGE_EXTRACT_JS, build_university_exam_data
+)
 
 try:
     from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+    from playwright.async_api import async_playwright
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
 
+# 大学ページの描画完了の目安（問題ページへのリンク）
+UNIVERSITY_PAGE_READY_SELECTOR = 'a[href*="/question/"]'
+
+# 読み込みを中止するリソース種別（文書・スクリプト・XHRは描画に必要なため通す）
+BLOCKED_RESOURCE_TYPES = frozenset(['image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest'])
+
+# 読み込みを中止する解析・広告タグのドメイン
+BLOCKED_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'facebook.net',
+)
+
+# 保存したログイン状態（Cookie）の既定の保存先と有効期間（秒）
+DEFAULT_STORAGE_STATE_PATH = os.path.join(settings.BASE_DIR, '.toshin_storage_state.json')
+STORAGE_STATE_MAX_AGE = 12 * 60 * 60
+
+
+class PolitenessLimiter:
+    """
+    ページ遷移の開始間隔を全タブ共通で制限する（非同期モード用）
+    """
+
+    def __init__(self, interval):
+        """
+        Args:
+            interval (float): ページ遷移の最小間隔（秒）
+        """
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next_at = 0.0
+
+    async def wait(self):
+        """前回の遷移から interval 秒経過するまで待機"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+                now = self._next_at
+            self._next_at = now + self.interval
+
 
 class ToshinLoginCrawler:
 
-    def __init__(self, headless=True, verbose=False):
+    def __init__(self, headless=True, verbose=False, concurrency=1, request_interval=1.0,
+                 block_resources=True, storage_state_path=DEFAULT_STORAGE_STATE_PATH,
+                 storage_state_max_age=STORAGE_STATE_MAX_AGE, store_pages=None):
         """
         Args:
             headless (bool): ブラウザをヘッドレスモードで実行するか
             verbose (bool): 詳細ログを出力するか
+            concurrency (int): 大学ページを同時に開くタブ数（2以上で非同期モード）
+            request_interval (float): ページ遷移の最小間隔（秒、全タブ共通）
+            block_resources (bool): 画像・フォント・CSSなどの読み込みを中止するか
+            storage_state_path (str): ログイン状態の保存先（Noneで保存・再利用しない）
+            storage_state_max_age (int): 保存したログイン状態の有効期間（秒）
+            store_pages (bool): 描画した大学ページをページストアに保存するか（省略時は設定値）
         """
         self.headless = headless
         self.verbose = verbose
+        self.concurrency = max(1, concurrency)
+        self.request_interval = request_interval
+        self.block_resources = block_resources
+        self.storage_state_path = storage_state_path
+        self.storage_state_max_age = storage_state_max_age
+        self.metrics = get_metrics()
+        if store_pages is None:
+            store_pages = PAGE_STORE_CONFIG['enabled']
+        self.page_store = PageStore(PAGE_STORE_PROVIDER) if store_pages else None
+        self._page_writer = None
+        self.viewport = {'width': 1920, 'height': 1080}
+        self.user_agent = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         # 東進過去問トップページ
         self.kakomon_url = "https://www.toshin-kakomon.com/"
         # 東進会員ログインページ
@@ -148,133 +251,53 @@ class ToshinLoginCrawler:
 
     #     return exams_data
 
-    def login_and_crawl(self):
+    def iter_university_pages(self):
         """
-        ログインして過去問データをクローリング
+        ログインして各大学のページを順に取得するジェネレーター
 
-        Returns:
-            list: 過去問データの辞書リスト
-        """
-        exams_data = []
+        大学ページを1校描画するごとに問題リンクを返すため、後段の抽出・保存は
+        すべての大学の取得を待たずに始められます（crawl_login_site のパイプラインのソース）。
 
+        Yields:
+            dict: {'name'（大学名）, 'url', 'links'（問題リンクの辞書リスト）}
+        """
         with sync_playwright() as p:
             # ブラウザを起動
             self.log("ブラウザを起動中...")
             browser = p.chromium.launch(headless=self.headless)
 
-            # コンテキストとページを作成
+            # コンテキストとページを作成（保存済みのログイン状態があれば再利用）
+            saved_state = self._load_storage_state()
             context = browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+                viewport=self.viewport,
+                user_agent=self.user_agent,
+                storage_state=saved_state
             )
+            self._block_resources(context)
             page = context.new_page()
+            storage_state = None
+            filtered_links = []
 
             try:
-                # ステップ1: 東進過去問トップページにアクセス
-                self.log(f"東進過去問トップページにアクセス: {self.kakomon_url}")
-                page.goto(self.kakomon_url, wait_until='load', timeout=90000)
-                time.sleep(2)
-
-                if not self.headless:
-                    page.screenshot(path='kakomon_top_before_login.png')
-                    self.log("スクリーンショット保存: kakomon_top_before_login.png")
-
-                # ステップ2: ログインページに遷移
-                self.log(f"ログインページにアクセス: {self.login_url}")
-                page.goto(self.login_url, wait_until='load', timeout=90000)
-                time.sleep(2)
-
-                # ページのスクリーンショットを保存（デバッグ用）
-                if not self.headless:
-                    page.screenshot(path='login_page.png')
-                    self.log("スクリーンショットを保存: login_page.png")
-
-                # ステップ3: ログインフォームを入力
-                self.log("ログイン情報を入力中...")
-
-                
-                try:
-                    # メールアドレス/ユーザーIDの入力欄を探す
-                    # 複数の可能性があるセレクタを試す
-                    email_selectors = [
-                        'input[name="email"]',
-                        
-                    ]
-
-                    email_input = None
-                    for selector in email_selectors:
-                        try:
-                            email_input = page.wait_for_selector(selector, timeout=5000)
-                            if email_input:
-                                self.log(f"ユーザーID入力欄を検出: {selector}")
-                                break
-                        except PlaywrightTimeoutError:
-                            continue
-
-                    if not email_input:
-                        raise Exception("ユーザーID入力欄が見つかりません")
-
-                    email_input.fill(self.username)
-                    self.log(f"ユーザーIDを入力: {self.username}")
-
-                    
-                    password_selectors = [
-                        'input[name="password"]',
-                        
-                    ]
-
-                    password_input = None
-                    for selector in password_selectors:
-                        try:
-                            password_input = page.wait_for_selector(selector, timeout=5000)
-                            if password_input:
-                                self.log(f"パスワード入力欄を検出: {selector}")
-                                break
-                        except PlaywrightTimeoutError:
-                            continue
-
-                    if not password_input:
-                        raise Exception("パスワード入力欄が見つかりません")
-
-                    password_input.fill(self.password)
-                    self.log("パスワードを入力")
-
-                    # ログインボタンをクリック
-                    login_button_selectors = [
-                        'button[type="submit"]',
-                        'input[type="submit"]',
-                        'button:has-text("ログイン")',
-                        'button:has-text("Login")',
-                        'a:has-text("ログイン")'
-                    ]
-
-                    login_button = None
-                    for selector in login_button_selectors:
-                        try:
-                            login_button = page.wait_for_selector(selector, timeout=5000)
-                            if login_button:
-                                self.log(f"ログインボタンを検出: {selector}")
-                                break
-                        except PlaywrightTimeoutError:
-                            continue
-
-                    if not login_button:
-                        raise Exception("ログインボタンが見つかりません")
-
-                    # ログインボタンをクリックして待機
-                    self.log("ログインボタンをクリック...")
-                    login_button.click()
-
-                    
-                except Exception as e:
-                    self.log(f"ログイン処理エラー: {e}")
-                    raise
+                # ステップ1〜3: 保存済みのログイン状態がなければログイン
+                if saved_state:
+                    self.log(f"保存済みのログイン状態を使用: {saved_state}")
+                else:
+                    self._login(page)
 
                 # ステップ4: サービス有効化ページに遷移し、データベースリンクをクリック
                 activate_url = "https://www.toshin.com/member/activate?service_id=1"
                 self.log(f"サービス有効化ページに遷移: {activate_url}")
                 page.goto(activate_url, wait_until='domcontentloaded', timeout=90000)
-                time.sleep(5)
+
+                # 保存済みのログイン状態が失効していた場合はログインし直す
+                if saved_state and self._is_login_page(page):
+                    self.log("保存済みのログイン状態が失効しています。再ログインします")
+                    self._login(page)
+                    page.goto(activate_url, wait_until='domcontentloaded', timeout=90000)
+
+                page.wait_for_load_state('networkidle', timeout=30000)
+                self._save_storage_state(context, page)
 
                 self.log(f"有効化後のURL: {page.url}")
                 self.log(f"ページタイトル: {page.title()}")
@@ -308,14 +331,16 @@ class ToshinLoginCrawler:
                 filtered_links = [link for link in university_links if link['name'] in target_universities]
                 self.log(f"対象大学数: {len(filtered_links)}校")
 
-                try:
-                    # 各大学のページから過去問データを抽出
-                    exams_data = self._crawl_universities(page, filtered_links)
+                if self.concurrency > 1:
+                    # 非同期モード: ログイン済みの状態を引き継いで別ブラウザで並列取得
+                    storage_state = context.storage_state()
+                else:
+                    try:
+                        # 各大学のページを順に取得
+                        yield from self._crawl_universities(page, filtered_links)
 
-                except Exception as e:
-                    self.log(f"過去問ページへのアクセスエラー: {e}")
-                    # エラー時は空のリストを返す
-                    exams_data = []
+                    except Exception as e:
+                        self.log(f"過去問ページへのアクセスエラー: {e}")
 
             except Exception as e:
                 self.log(f"クローリングエラー: {e}")
@@ -326,7 +351,225 @@ class ToshinLoginCrawler:
                 self.log("ブラウザを終了中...")
                 browser.close()
 
-        return exams_data
+        if storage_state is not None:
+            yield from self._iter_universities_async(storage_state, filtered_links)
+
+    def _iter_universities_async(self, storage_state, university_links):
+        """
+        非同期モードで取得した大学ページを、取得した順に返すジェネレーター
+
+        イベントループは別スレッドで動かし、取得したページをキューで受け渡します。
+        """
+        pages = queue.Queue()
+
+        def crawl():
+            try:
+                asyncio.run(self._crawl_universities_async(storage_state, university_links, pages.put))
+            except Exception as e:
+                self.log(f"過去問ページへのアクセスエラー: {e}")
+            finally:
+                pages.put(None)
+
+        thread = threading.Thread(target=crawl, name='toshin-login-async', daemon=True)
+        thread.start()
+        while True:
+            university_page = pages.get()
+            if university_page is None:
+                break
+            yield university_page
+        thread.join()
+
+    def _should_block(self, request):
+        """読み込みを中止するリクエストか（画像・フォント・CSS・解析タグなど）"""
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            return True
+        host = urlparse(request.url).hostname or ''
+        return any(host == d or host.endswith('.' + d) for d in BLOCKED_DOMAINS)
+
+    def _block_resources(self, context):
+        """
+        コンテキスト内のリクエストを横取りし、不要なリソースの読み込みを中止
+
+        Args:
+            context: Playwrightのブラウザコンテキスト
+        """
+        if not self.block_resources:
+            return
+
+        def handle(route):
+            if self._should_block(route.request):
+                route.abort()
+            else:
+                route.continue_()
+
+        context.route('**/*', handle)
+
+    async def _block_resources_async(self, context):
+        """_block_resources の非同期版"""
+        if not self.block_resources:
+            return
+
+        async def handle(route):
+            if self._should_block(route.request):
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await context.route('**/*', handle)
+
+    def _load_storage_state(self):
+        """
+        保存済みのログイン状態を読み込み
+
+        Returns:
+            str: 有効な storage_state ファイルのパス、なければNone
+        """
+        path = self.storage_state_path
+        if not path or not os.path.exists(path):
+            return None
+
+        age = time.time() - os.path.getmtime(path)
+        if age > self.storage_state_max_age:
+            self.log(f"保存済みのログイン状態は期限切れです（{age / 3600:.1f}時間前）")
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log(f"ログイン状態の読み込みエラー: {e}")
+            return None
+
+        # 有効期限付きのCookieがすべて期限切れなら使用しない
+        now = time.time()
+        cookies = state.get('cookies', [])
+        if not cookies or all(0 < c.get('expires', -1) < now for c in cookies):
+            self.log("保存済みのログイン状態のCookieが期限切れです")
+            return None
+
+        return path
+
+    def _save_storage_state(self, context, page):
+        """
+        ログイン済みの状態をファイルに保存（ログインページにいる場合は保存しない）
+        """
+        if not self.storage_state_path or self._is_login_page(page):
+            return
+
+        context.storage_state(path=self.storage_state_path)
+        os.chmod(self.storage_state_path, 0o600)
+        self.log(f"ログイン状態を保存: {self.storage_state_path}")
+
+    def _is_login_page(self, page):
+        """ログインページにリダイレクトされているか"""
+        return '/member/login' in page.url
+
+    def _login(self, page):
+        """
+        ログインフォームに認証情報を入力してログイン
+
+        Args:
+            page: Playwrightのページオブジェクト
+        """
+        # ステップ1: 東進過去問トップページにアクセス
+        self.log(f"東進過去問トップページにアクセス: {self.kakomon_url}")
+        page.goto(self.kakomon_url, wait_until='load', timeout=90000)
+        time.sleep(2)
+
+        if not self.headless:
+            page.screenshot(path='kakomon_top_before_login.png')
+            self.log("スクリーンショット保存: kakomon_top_before_login.png")
+
+        # ステップ2: ログインページに遷移
+        self.log(f"ログインページにアクセス: {self.login_url}")
+        page.goto(self.login_url, wait_until='load', timeout=90000)
+        time.sleep(2)
+
+        # ページのスクリーンショットを保存（デバッグ用）
+        if not self.headless:
+            page.screenshot(path='login_page.png')
+            self.log("スクリーンショットを保存: login_page.png")
+
+        # ステップ3: ログインフォームを入力
+        self.log("ログイン情報を入力中...")
+
+        
+        try:
+            # メールアドレス/ユーザーIDの入力欄を探す
+            # 複数の可能性があるセレクタを試す
+            email_selectors = [
+                'input[name="email"]',
+                
+            ]
+
+            email_input = None
+            for selector in email_selectors:
+                try:
+                    email_input = page.wait_for_selector(selector, timeout=5000)
+                    if email_input:
+                        self.log(f"ユーザーID入力欄を検出: {selector}")
+                        break
+                except PlaywrightTimeoutError:
+                    continue
+
+            if not email_input:
+                raise Exception("ユーザーID入力欄が見つかりません")
+
+            email_input.fill(self.username)
+            self.log(f"ユーザーIDを入力: {self.username}")
+
+            
+            password_selectors = [
+                'input[name="password"]',
+                
+            ]
+
+            password_input = None
+            for selector in password_selectors:
+                try:
+                    password_input = page.wait_for_selector(selector, timeout=5000)
+                    if password_input:
+                        self.log(f"パスワード入力欄を検出: {selector}")
+                        break
+                except PlaywrightTimeoutError:
+                    continue
+
+            if not password_input:
+                raise Exception("パスワード入力欄が見つかりません")
+
+            password_input.fill(self.password)
+            self.log("パスワードを入力")
+
+            # ログインボタンをクリック
+            login_button_selectors = [
+                'button[type="submit"]',
+                'input[type="submit"]',
+                'button:has-text("ログイン")',
+                'button:has-text("Login")',
+                'a:has-text("ログイン")'
+            ]
+
+            login_button = None
+            for selector in login_button_selectors:
+                try:
+                    login_button = page.wait_for_selector(selector, timeout=5000)
+                    if login_button:
+                        self.log(f"ログインボタンを検出: {selector}")
+                        break
+                except PlaywrightTimeoutError:
+                    continue
+
+            if not login_button:
+                raise Exception("ログインボタンが見つかりません")
+
+            # ログインボタンをクリックして待機
+            self.log("ログインボタンをクリック...")
+            login_button.click()
+            page.wait_for_load_state('load', timeout=30000)
+
+        except Exception as e:
+            self.log(f"ログイン処理エラー: {e}")
+            raise
 
     def _extract_exam_data(self, page):
         """
@@ -378,7 +621,7 @@ class ToshinLoginCrawler:
                             year = int(year_match.group(1)) if year_match else None
 
                             # 科目のマッピング
-                            subject = self._map_subject(subject_text)
+                            subject = classify_subject(subject_text).subject
 
                             # PDFリンク
                             problem_url = link_element.get_attribute('href') if link_element else ''
@@ -464,41 +707,6 @@ class ToshinLoginCrawler:
 
         return exams_data
 
-    def _map_subject(self, subject_text):
-        """
-        科目名を正規化してモデルのCHOICESにマッピング
-
-        Args:
-            subject_text (str): 元の科目名
-
-        Returns:
-            str: マッピングされた科目コード
-        """
-        subject_text = subject_text.lower()
-
-        if '数学' in subject_text or 'math' in subject_text:
-            return 'math'
-        elif '英語' in subject_text or 'english' in subject_text:
-            return 'english'
-        elif '国語' in subject_text or 'japanese' in subject_text:
-            return 'japanese'
-        elif '物理' in subject_text or 'physics' in subject_text:
-            return 'physics'
-        elif '化学' in subject_text or 'chemistry' in subject_text:
-            return 'chemistry'
-        elif '生物' in subject_text or 'biology' in subject_text:
-            return 'biology'
-        elif '地理' in subject_text or 'geography' in subject_text:
-            return 'geography'
-        elif '歴史' in subject_text or 'history' in subject_text or '日本史' in subject_text or '世界史' in subject_text:
-            return 'history'
-        elif '理科' in subject_text or 'science' in subject_text:
-            return 'science'
-        elif '社会' in subject_text or 'social' in subject_text:
-            return 'social'
-        else:
-            return 'other'
-
     def _extract_university_links(self, all_links):
         """
         ページから大学リンクを抽出
@@ -531,25 +739,29 @@ class ToshinLoginCrawler:
 
     def _crawl_universities(self, page, university_links):
         """
-        各大学のページをクロールして過去問データを抽出
+        各大学のページを順にクロールして問題リンクを収集するジェネレーター
 
         Args:
             page: Playwrightのページオブジェクト
             university_links: 大学名とURLの辞書リスト
 
-        Returns:
-            list: 過去問データの辞書リスト
+        Yields:
+            dict: {'name', 'url', 'links'}
         """
-        all_exams_data = []
+        found = 0
 
         for i, univ in enumerate(university_links, 1):
             try:
                 self.log(f"\n[{i}/{len(university_links)}] {univ['name']} の過去問を取得中...")
                 self.log(f"  URL: {univ['url']}")
 
-                # 大学ページに遷移
-                page.goto(univ['url'], wait_until='domcontentloaded', timeout=30000)
-                time.sleep(2)
+                # 大学ページに遷移し、問題リンクの描画を待機
+                host = host_of(univ['url'])
+                with self.metrics.timer('render', host):
+                    response = page.goto(univ['url'], wait_until='domcontentloaded', timeout=30000)
+                    self._wait_for_university_page(page)
+                if response is not None:
+                    self.metrics.record_response(host, response.status)
 
                 # スクリーンショットを保存（デバッグ用）
                 if not self.headless and i == 1:
@@ -557,28 +769,133 @@ class ToshinLoginCrawler:
                     page.screenshot(path=screenshot_path)
                     self.log(f"  スクリーンショット保存: {screenshot_path}")
 
-                # このページから過去問データを抽出
-                exams_data = self._extract_exam_data_from_university_page(page, univ['name'])
-
-                if exams_data:
-                    self.log(f"  ✓ {len(exams_data)}件の過去問を取得")
-                    all_exams_data.extend(exams_data)
-                else:
-                    self.log(f"  - 過去問データが見つかりませんでした")
-
-                # サーバーに負荷をかけないように待機
-                time.sleep(1)
+                # このページから問題リンクを収集
+                with self.metrics.timer('parse', host):
+                    links = self._read_university_page(page, univ['name'])
 
             except Exception as e:
                 self.log(f"  ✗ エラー: {e}")
                 continue
 
-        self.log(f"\n\n合計 {len(all_exams_data)} 件の過去問データを取得しました")
-        return all_exams_data
+            if links:
+                found += 1
+                yield {'name': univ['name'], 'url': univ['url'], 'links': links}
+            else:
+                self.log(f"  - 問題リンクが見つかりませんでした")
+
+            # サーバーに負荷をかけないように待機
+            time.sleep(self.request_interval)
+
+        self.log(f"\n\n合計 {found} 校の大学ページから問題リンクを取得しました")
+
+    def _wait_for_university_page(self, page):
+        """
+        大学ページの描画完了を待機（固定時間のsleepの代わり）
+
+        問題リンクが現れるまで待ち、現れない場合はネットワークのアイドルを待つ
+
+        Args:
+            page: Playwrightのページオブジェクト
+        """
+        try:
+            page.wait_for_selector(UNIVERSITY_PAGE_READY_SELECTOR, timeout=10000)
+        except PlaywrightTimeoutError:
+            try:
+                page.wait_for_load_state('networkidle', timeout=10000)
+            except PlaywrightTimeoutError:
+                self.log("  警告: ページの描画完了を確認できませんでした")
+
+    async def _crawl_universities_async(self, storage_state, university_links, on_page):
+        """
+        各大学のページを複数タブで並列にクロールして問題リンクを収集
+
+        ログイン済みの storage_state を共有する1つのコンテキスト上に
+        concurrency 個のタブを開き、大学リンクをタブに振り分けます。
+        ページ遷移の開始間隔は全タブ共通で request_interval 秒以上空けます。
+
+        Args:
+            storage_state (dict): ログイン済みコンテキストの storage_state
+            university_links: 大学名とURLの辞書リスト
+            on_page (callable): 大学ページごとに {'name', 'url', 'links'} を受け取る関数（取得した順）
+        """
+        queue = asyncio.Queue()
+        for i, univ in enumerate(university_links, 1):
+            queue.put_nowait((i, univ))
+
+        found = 0
+        limiter = PolitenessLimiter(self.request_interval)
+        total = len(university_links)
+
+        async def worker(page):
+            nonlocal found
+            while True:
+                try:
+                    i, univ = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                try:
+                    self.log(f"\n[{i}/{total}] {univ['name']} の過去問を取得中...")
+                    await limiter.wait()
+                    host = host_of(univ['url'])
+                    with self.metrics.timer('render', host):
+                        response = await page.goto(univ['url'], wait_until='domcontentloaded', timeout=30000)
+                        await self._wait_for_university_page_async(page)
+                    if response is not None:
+                        self.metrics.record_response(host, response.status)
+
+                    with self.metrics.timer('parse', host):
+                        links = await self._collect_university_page_async(page)
+
+                    if self.page_store:
+                        self._store_page(page.url, await page.content(), univ['name'])
+
+                    if links:
+                        found += 1
+                        self.log(f"  ✓ {univ['name']}: 問題リンク {len(links)}件")
+                        on_page({'name': univ['name'], 'url': univ['url'], 'links': links})
+                    else:
+                        self.log(f"  - {univ['name']}: 問題リンクが見つかりませんでした")
+
+                except Exception as e:
+                    self.log(f"  ✗ {univ['name']}: エラー: {e}")
+
+        async with async_playwright() as p:
+            self.log(f"\n非同期モードでブラウザを起動中（タブ数: {self.concurrency}）...")
+            browser = await p.chromium.launch(headless=self.headless)
+
+            try:
+                context = await browser.new_context(
+                    viewport=self.viewport,
+                    user_agent=self.user_agent,
+                    storage_state=storage_state
+                )
+                await self._block_resources_async(context)
+                pages = [
+                    await context.new_page()
+                    for _ in range(min(self.concurrency, max(1, total)))
+                ]
+                await asyncio.gather(*(worker(page) for page in pages))
+
+            finally:
+                self.log("ブラウザを終了中...")
+                await browser.close()
+
+        self.log(f"\n\n合計 {found} 校の大学ページから問題リンクを取得しました")
+
+    async def _wait_for_university_page_async(self, page):
+        """_wait_for_university_page の非同期版"""
+        try:
+            await page.wait_for_selector(UNIVERSITY_PAGE_READY_SELECTOR, timeout=10000)
+        except PlaywrightTimeoutError:
+            try:
+                await page.wait_for_load_state('networkidle', timeout=10000)
+            except PlaywrightTimeoutError:
+                self.log("  警告: ページの描画完了を確認できませんでした")
 
-    def _extract_exam_data_from_university_page(self, page, university_name):
+    def _read_university_page(self, page, university_name):
         """
-        大学ページから過去問データを抽出
+        大学ページから問題リンクを収集し、ページをページストアに保存
 
         東進過去問データベースのページ構造:
         - 年度: 「2025年度 入試問題」などのh2/h3テキスト
@@ -591,184 +908,209 @@ class ToshinLoginCrawler:
             university_name: 大学名
 
         Returns:
-            list: 過去問データの辞書リスト
+            list: {'href', 'text', 'rowText', 'heading'} の辞書リスト
         """
-        exams_data = []
-        import re
+        try:
+            links = self._collect_university_page(page)
+        except Exception as e:
+            self.log(f"  データ抽出エラー: {e}")
+            import traceback
+            self.log(f"  詳細: {traceback.format_exc()}")
+            return []
+
+        if self.page_store:
+            self._store_page(page.url, page.content(), university_name)
 
+        return links
+
+    def _store_page(self, url, html, university_name):
+        """
+        描画した大学ページをページストアに保存（manage.py reextract で再抽出できるように）
+
+        Playwrightの実行中はイベントループが動いておりDjangoのORMを呼べないため、
+        書き込みは専用のスレッドで行います。
+
+        Args:
+            url (str): ページのURL
+            html (str): 描画後のHTML
+            university_name (str): 大学名
+        """
+        if self._page_writer is None:
+            self._page_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='page-store')
+        self._page_writer.submit(self._write_page, url, html, university_name)
+
+    def _write_page(self, url, html, university_name):
         try:
-            # 年度情報を取得（「2025年度 入試問題」など）
-            year_headings = page.query_selector_all('h2:has-text("年度"), h3:has-text("年度"), div:has-text("年度")')
-            years = set()
-
-            for heading in year_headings[:5]:  # 最新5年分まで
-                text = heading.text_content().strip()
-                year_match = re.search(r'(\d{4})', text)
-                if year_match:
-                    years.add(int(year_match.group(1)))
-
-            # 年度が見つからない場合は、ページテキスト全体から探す
-            if not years:
-                page_text = page.inner_text('body')
-                year_matches = re.findall(r'(\d{4})年度', page_text)
-                years = set([int(y) for y in year_matches if 2000 <= int(y) <= 2030])
-
-            # デフォルト年度
-            if not years:
-                years = {2025}
-
-            self.log(f"  検出した年度: {sorted(years, reverse=True)}")
-
-            # テーブル内のすべてのリンクを探す
-            # 東進サイトでは、PDFへの直接リンクではなく中間ページ（/question/、/answer/）へのリンク
-            all_table_links = page.query_selector_all('table a, .table a, tbody a, tr a, td a')
-            self.log(f"  テーブル内の全リンク: {len(all_table_links)}件")
-
-            # 問題リンクを探す（テキストが「問題」を含む、またはhrefに「/question/」を含む）
-            question_links = page.query_selector_all('a[href*="/question/"], a:has-text("問題")')
-            self.log(f"  検出した問題リンク: {len(question_links)}件")
-
-            # 科目コードマッピング（URLの科目コードから日本語名へ）
-            subject_code_map = {
-                'e': 'english',    # 英語
-                'm': 'math',       # 数学
-                'k': 'japanese',   # 国語
-                'j': 'history',    # 日本史
-                'w': 'history',    # 世界史
-                'o': 'geography',  # 地理
-                'p': 'physics',    # 物理
-                'c': 'chemistry',  # 化学
-                'b': 'biology',    # 生物
-                't': 'geography',  # 地学
-                's': 'social'      # 社会
-            }
+            self.page_store.put(url, html, label=university_name)
+        except Exception as e:
+            self.log(f"  警告: ページの保存に失敗しました: {e}")
 
-            # 各問題リンクを処理
-            for i, link in enumerate(question_links[:100]):  # 最大100件
-                try:
-                    href = link.get_attribute('href') or ''
+    def flush_pages(self):
+        """保存待ちのページをすべて書き込む"""
+        if self._page_writer is None:
+            return
+        self._page_writer.submit(connection.close)
+        self._page_writer.shutdown(wait=True)
+        self._page_writer = None
 
-                    # デバッグ: 最初の5リンクを詳細ログ
-                    if i < 3:
-                        self.log(f"  処理中[{i+1}]: href={href}")
+    def _collect_university_page(self, page):
+        """
+        大学ページから問題リンクの情報を収集
 
-                    # 相対URLを絶対URLに変換
-                    if href.startswith('/'):
-                        full_url = f"https://www.toshin-kakomon.com{href}"
-                    elif href.startswith('http'):
-                        full_url = href
-                    else:
-                        if i < 3:
-                            self.log(f"    スキップ: 無効なURL形式")
-                        continue
+        ブラウザとの往復を1回にするため、リンク・テーブル行・見出しの取得は
+        すべて UNIVERSITY_PAGE_EXTRACT_JS の page.evaluate 1回で行います。
 
-                    # リンクテキストを取得
-                    link_text = link.text_content().strip() if link.text_content() else ''
+        Args:
+            page: Playwrightのページオブジェクト
 
-                    # 親要素のテキストを取得（シンプルな方法で）
-                    parent_text = ''
-                    try:
-                        # 親要素のテキストを取得
-                        parent_text = page.evaluate('(el) => el.closest("tr") ? el.closest("tr").textContent : ""', link)
-                    except Exception as e:
-                        if i < 3:
-                            self.log(f"    警告: 親要素取得エラー: {e}")
-                        parent_text = ''
-
-                    # URLから年度と科目コードを抽出
-                    # URL形式: /university/0l/2025/e0l251/question/
-                    # - 2025: 年度
-                    # - e0l251の最初の文字 'e': 科目コード
-                    year = max(years) if years else 2025  # デフォルトは最新年度
-                    subject = 'other'  # デフォルト科目
-
-                    # URLパターンマッチ: /university/{univ_id}/{year}/{subject_code}{rest}/question/
-                    url_match = re.search(r'/university/\w+/(\d{4})/(\w)(\w+)/(question|answer)/', href)
-                    if url_match:
-                        potential_year = int(url_match.group(1))
-                        if 2000 <= potential_year <= 2030:
-                            year = potential_year
-
-                        # 科目コード（URLの3番目のパスセグメントの最初の文字）
-                        subject_code = url_match.group(2).lower()
-                        if subject_code in subject_code_map:
-                            subject = subject_code_map[subject_code]
-
-                        # デバッグ用
-                        # self.log(f"    URL解析: {href[:60]} -> 年度={year}, 科目コード={subject_code}, 科目={subject}")
-
-                    # 学部・試験種別を推定
-                    exam_type = '一般入試'
-                    department = ''
-                    if '前期' in parent_text:
-                        exam_type = '前期'
-                    elif '後期' in parent_text:
-                        exam_type = '後期'
-                    if '文科' in parent_text:
-                        dept_match = re.search(r'文科[一二三]類', parent_text)
-                        if dept_match:
-                            department = dept_match.group(0)
-                    elif '理科' in parent_text:
-                        dept_match = re.search(r'理科[一二三]類', parent_text)
-                        if dept_match:
-                            department = dept_match.group(0)
-
-                    # 科目名の逆引き（表示用）
-                    subject_display_map = {
-                        'english': '英語',
-                        'math': '数学',
-                        'japanese': '国語',
-                        'physics': '物理',
-                        'chemistry': '化学',
-                        'biology': '生物',
-                        'history': '歴史',
-                        'geography': '地理',
-                        'science': '理科',
-                        'social': '社会',
-                        'other': 'その他'
-                    }
+        Returns:
+            list: {'href', 'text', 'rowText', 'heading'} の辞書リスト
+        """
+        links = page.evaluate(UNIVERSITY_PAGE_EXTRACT_JS, MAX_QUESTION_LINKS)
+        self.log(f"  検出した問題リンク: {len(links)}件")
+        return links
 
-                    # 過去問データを追加
-                    exams_data.append({
-                        'year': year,
-                        'subject': subject,
-                        'exam_type': exam_type,
-                        'department': department,
-                        'problem_url': full_url,
-                        'description': f'{university_name} {year}年度 {subject_display_map.get(subject, subject)} {department} {exam_type}',
-                        'source_type': 'yobi_school',
-                        'university_name': university_name
-                    })
+    async def _collect_university_page_async(self, page):
+        """_collect_university_page の非同期版"""
+        return await page.evaluate(UNIVERSITY_PAGE_EXTRACT_JS, MAX_QUESTION_LINKS)
 
-                except Exception as e:
-                    if i < 5:  # 最初の5件のエラーのみログ出力
-                        self.log(f"  問題リンク処理エラー[{i+1}]: {e}")
-                        import traceback
-                        self.log(f"    詳細: {traceback.format_exc()[:200]}")
-                    continue
+    def parse_university_page(self, university_page):
+        """
+        大学ページの問題リンクから過去問データを組み立てる（パイプラインの段階）
 
-            # 解答リンクも探す（青い「解答」リンク）
-            answer_links = page.query_selector_all('a:has-text("解答")')
-            self.log(f"  検出した解答リンク: {len(answer_links)}件")
+        Args:
+            university_page (dict): iter_university_pages が返す {'name', 'url', 'links'}
 
-            # 重複削除（同じ year + subject + exam_type の組み合わせ）
-            seen = set()
-            unique_exams = []
-            for exam in exams_data:
-                key = (exam['year'], exam['subject'], exam['exam_type'], exam['department'])
-                if key not in seen:
-                    seen.add(key)
-                    unique_exams.append(exam)
+        Returns:
+            list: 過去問データの辞書リスト
+        """
+        self.log(f"\n{university_page['name']} の過去問データを抽出中...")
+        return self._build_university_exam_data(university_page['name'], university_page['links'])
 
-            exams_data = unique_exams
-            self.log(f"  抽出した過去問データ: {len(exams_data)}件")
+    def _build_university_exam_data(self, university_name, links):
+        """
+        収集した問題リンクから過去問データを組み立てる（toshin_login_extractor と共通）
 
-        except Exception as e:
-            self.log(f"  データ抽出エラー: {e}")
-            import traceback
-            self.log(f"  詳細: {traceback.format_exc()}")
+        Args:
+            university_name: 大学名
+            links (list): {'href', 'text', 'rowText', 'heading'} の辞書リスト
 
-        return exams_data
+        Returns:
+            list: 過去問データの辞書リスト
+        """
+        return build_university_exam_data(university_name, links, log=self.log)
+
+
+class ToshinLoginWriter:
+    """
+    過去問データをDBに保存する（crawl_login_site と manage.py reextract で共通）
+    """
+
+    def __init__(self, command=None, dry_run=False, default_university=None):
+        """
+        Args:
+            command: Django管理コマンドのインスタンス（省略時はログに出力）
+            dry_run (bool): Trueの場合、データベースに保存しない
+            default_university (str): 大学名を含まない過去問データの大学名
+        """
+        self.command = command
+        self.dry_run = dry_run
+        self.default_university = default_university
+        self.university_index = None if dry_run else get_university_index()
+        self.stats = {
+            'exams_created': 0,
+            'exams_updated': 0,
+            'answer_sources_created': 0,
+            'errors': 0
+        }
+
+    def log(self, message, level='info'):
+        """ログ出力"""
+        if self.command is None:
+            getattr(logger, 'error' if level == 'error' else 'info')(message.strip())
+        elif level == 'error':
+            self.command.stdout.write(self.command.style.ERROR(message))
+        elif level == 'success':
+            self.command.stdout.write(self.command.style.SUCCESS(message))
+        else:
+            self.command.stdout.write(message)
+
+    def write_batch(self, exams_data):
+        """
+        過去問データのバッチを保存
+
+        Args:
+            exams_data (list): 過去問データの辞書リスト
+
+        Returns:
+            int: 新規作成した過去問数
+        """
+        created_before = self.stats['exams_created']
+
+        for exam_data in exams_data:
+            if self.dry_run:
+                self.log(f'   [DRY RUN] 過去問: {exam_data["year"]}年 {exam_data["subject"]}')
+                continue
+
+            try:
+                # 過去問ごとに確定し、失敗した過去問のみを取り消す
+                with transaction.atomic():
+                    self._save_exam(exam_data)
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.log(f'   ✗ 過去問の保存エラー: {e}', level='error')
+
+        return self.stats['exams_created'] - created_before
+
+    def _save_exam(self, exam_data):
+        canonicalize_exam(exam_data)
+        # 大学名がデータに含まれている場合は、それを使用
+        exam_university_id, _ = self.university_index.get_or_create(
+            exam_data.get('university_name') or self.default_university,
+            defaults={
+                'school_type': 'university',
+            }
+        )
+
+        # 過去問の作成または更新
+        exam, created = Exam.objects.get_or_create(
+            university_id=exam_university_id,
+            year=exam_data['year'],
+            subject=exam_data['subject'],
+            exam_type=canonicalize('exam_type', exam_data.get('exam_type')),
+            defaults={
+                'problem_url': exam_data.get('problem_url', ''),
+                'description': exam_data.get('description', ''),
+                'source_type': exam_data.get('source_type', 'yobi_school'),
+                'scraped_at': timezone.now(),
+                'is_verified': False
+            }
+        )
+
+        if created:
+            self.stats['exams_created'] += 1
+            self.log(f'   ✓ 過去問を新規作成: {exam.year}年 {exam.get_subject_display()}', level='success')
+        else:
+            self.stats['exams_updated'] += 1
+            self.log(f'   - 過去問は既に存在: {exam.year}年 {exam.get_subject_display()}')
+
+        # 解答ソースとして東進を追加
+        if exam_data.get('problem_url'):
+            answer_source, created = AnswerSource.objects.get_or_create(
+                exam=exam,
+                provider_name='東進ハイスクール',
+                defaults={
+                    'answer_url': exam_data.get('problem_url', ''),
+                    'has_detailed_explanation': True,
+                    'reliability_score': 8,
+                    'notes': '東進会員サイトから取得',
+                    'last_checked_at': timezone.now(),
+                    'is_active': True
+                }
+            )
+
+            if created:
+                self.stats['answer_sources_created'] += 1
 
 
 class Command(BaseCommand):
@@ -807,6 +1149,45 @@ class Command(BaseCommand):
             help='データベースに保存せずに表示のみ'
         )
 
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='大学ページを同時に開くタブ数（2以上で非同期モード、デフォルト: 1）'
+        )
+
+        parser.add_argument(
+            '--request-interval',
+            type=float,
+            default=1.0,
+            help='ページ遷移の最小間隔（秒、全タブ共通、デフォルト: 1.0）'
+        )
+
+        parser.add_argument(
+            '--no-block-resources',
+            action='store_true',
+            help='画像・フォント・CSSなども読み込む（スクリーンショット確認用）'
+        )
+
+        parser.add_argument(
+            '--storage-state',
+            type=str,
+            default=DEFAULT_STORAGE_STATE_PATH,
+            help='ログイン状態の保存先（保存済みで有効期限内ならログインを省略）'
+        )
+
+        parser.add_argument(
+            '--fresh-login',
+            action='store_true',
+            help='保存済みのログイン状態を破棄してログインし直す'
+        )
+
+        parser.add_argument(
+            '--no-store-pages',
+            action='store_true',
+            help='描画したページをページストアに保存しない（manage.py reextract の対象外になる）'
+        )
+
         parser.add_argument(
             '--use-public-db',
             action='store_true',
@@ -846,48 +1227,33 @@ class Command(BaseCommand):
 
         self.stdout.write(f'対象大学: {university_name}')
         self.stdout.write(f'ヘッドレスモード: {"有効" if headless else "無効"}')
+        self.stdout.write(f'同時タブ数: {options.get("concurrency")}')
 
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN モード: データベースには保存しません'))
 
-        # 統計情報
-        stats = {
-            'exams_created': 0,
-            'exams_updated': 0,
-            'answer_sources_created': 0,
-            'errors': 0
-        }
-
         try:
             # クローラーのインスタンス作成
             self.stdout.write('\n1. クローラーを初期化中...')
-            crawler = ToshinLoginCrawler(headless=headless, verbose=True)
-
-            # データを取得
-            if use_public_db:
-                self.stdout.write('\n2. 公開データベースからデータを取得中...')
-                self.stdout.write('   (ログインは不要です)')
-                exams_data = crawler.crawl_public_kakomon_db()
-            else:
-                self.stdout.write('\n2. ログインしてデータを取得中...')
-                try:
-                    exams_data = crawler.login_and_crawl()
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f'   ログインエラー: {e}'))
-                    self.stdout.write(self.style.WARNING('\n代わりに公開データベースを使用します...'))
-                    self.stdout.write('次回は --use-public-db オプションを使用してください')
-                    exams_data = crawler.crawl_public_kakomon_db()
-
-            if year_filter:
-                exams_data = [e for e in exams_data if e.get('year') == year_filter]
+            crawler = ToshinLoginCrawler(
+                headless=headless,
+                verbose=True,
+                concurrency=options.get('concurrency'),
+                request_interval=options.get('request_interval'),
+                block_resources=not options.get('no_block_resources'),
+                storage_state_path=options.get('storage_state'),
+                store_pages=False if options.get('no_store_pages') else None
+            )
 
-            self.stdout.write(self.style.SUCCESS(f'   {len(exams_data)}件の過去問データを取得'))
+            if options.get('fresh_login') and os.path.exists(crawler.storage_state_path):
+                os.remove(crawler.storage_state_path)
 
             # 大学の取得または作成
             if not dry_run:
-                self.stdout.write(f'\n3. 大学情報を確認中: {university_name}')
-                university, created = University.objects.get_or_create(
-                    name=university_name,
+                self.stdout.write(f'\n2. 大学情報を確認中: {university_name}')
+                university_index = get_university_index()
+                _, created = university_index.get_or_create(
+                    university_name,
                     defaults={
                         'name_kana': 'とうきょうだいがく',
                         'school_type': 'university',
@@ -895,84 +1261,62 @@ class Command(BaseCommand):
                     }
                 )
                 if created:
-                    self.stdout.write(self.style.SUCCESS(f'   ✓ 大学を新規作成: {university.name}'))
+                    self.stdout.write(self.style.SUCCESS(f'   ✓ 大学を新規作成: {university_name}'))
                 else:
-                    self.stdout.write(f'   - 大学は既に存在: {university.name}')
+                    self.stdout.write(f'   - 大学は既に存在: {university_name}')
             else:
-                self.stdout.write(f'\n3. [DRY RUN] 大学: {university_name}')
-                university = None
+                self.stdout.write(f'\n2. [DRY RUN] 大学: {university_name}')
 
-            # 各過去問について処理
-            self.stdout.write('\n4. 過去問データを保存中...')
-            for exam_data in exams_data:
-                try:
-                    if not dry_run:
-                        # 大学名がデータに含まれている場合は、それを使用
-                        exam_univ_name = exam_data.get('university_name', university_name)
-                        exam_university, _ = University.objects.get_or_create(
-                            name=exam_univ_name,
-                            defaults={
-                                'school_type': 'university',
-                            }
-                        )
-
-                        # 過去問の作成または更新
-                        exam, created = Exam.objects.get_or_create(
-                            university=exam_university,
-                            year=exam_data['year'],
-                            subject=exam_data['subject'],
-                            exam_type=exam_data.get('exam_type', '一般入試'),
-                            defaults={
-                                'problem_url': exam_data.get('problem_url', ''),
-                                'description': exam_data.get('description', ''),
-                                'source_type': exam_data.get('source_type', 'yobi_school'),
-                                'scraped_at': timezone.now(),
-                                'is_verified': False
-                            }
-                        )
-
-                        if created:
-                            stats['exams_created'] += 1
-                            self.stdout.write(
-                                self.style.SUCCESS(
-                                    f'   ✓ 過去問を新規作成: {exam.year}年 {exam.get_subject_display()}'
-                                )
-                            )
-                        else:
-                            stats['exams_updated'] += 1
-                            self.stdout.write(
-                                f'   - 過去問は既に存在: {exam.year}年 {exam.get_subject_display()}'
-                            )
-
-                        # 解答ソースとして東進を追加
-                        if exam_data.get('problem_url'):
-                            answer_source, created = AnswerSource.objects.get_or_create(
-                                exam=exam,
-                                provider_name='東進ハイスクール',
-                                defaults={
-                                    'answer_url': exam_data.get('problem_url', ''),
-                                    'has_detailed_explanation': True,
-                                    'has_video_explanation': True,
-                                    'reliability_score': 8,
-                                    'notes': '東進会員サイトから取得',
-                                    'last_checked_at': timezone.now(),
-                                    'is_active': True
-                                }
-                            )
-
-                            if created:
-                                stats['answer_sources_created'] += 1
-
-                    else:
-                        self.stdout.write(
-                            f'   [DRY RUN] 過去問: {exam_data["year"]}年 {exam_data["subject"]}'
-                        )
+            # 取得 → 抽出 → 正規化 → 重複除去 → 保存 をパイプラインでつなぎ、
+            # すべての大学の取得を待たずにバッチ単位で保存する
+            if use_public_db:
+                self.stdout.write('\n3. 公開データベースからデータを取得・保存中...')
+                self.stdout.write('   (ログインは不要です)')
+                # 公開データベースのクローラーは過去問データを直接返す
+                source, stages = crawler.crawl_public_kakomon_db(), []
+            else:
+                self.stdout.write('\n3. ログインしてデータを取得・保存中...')
+                source = crawler.iter_university_pages()
+                stages = [flat_map_stage(crawler.parse_university_page)]
+
+            writer = ToshinLoginWriter(command=self, dry_run=dry_run, default_university=university_name)
+            metrics = get_metrics()
+
+            def normalize(exam_data):
+                if year_filter and exam_data.get('year') != year_filter:
+                    return None
+                exam_data['university_name'] = exam_data.get('university_name') or university_name
+                return canonicalize_exam(exam_data)
+
+            def write_batch(exams_data):
+                started = time.monotonic()
+                created = writer.write_batch(exams_data)
+                metrics.observe(
+                    'crawler_stage_seconds', time.monotonic() - started,
+                    host='www.toshin-kakomon.com', stage='db_write'
+                )
+                return created
+
+            pipeline = Pipeline(
+                source,
+                *stages,
+                map_stage(normalize),
+                # 保存時の過去問のキー（学部は含まない）が同じものは最初の1件のみ保存する
+                dedupe_stage(lambda exam_data: (
+                    exam_data['university_name'], exam_data['year'],
+                    exam_data['subject'], exam_data.get('exam_type'),
+                )),
+                sink=BatchSink(write_batch, batch_size=DATABASE_CONFIG['batch_size']),
+            )
+            try:
+                pipeline_stats = pipeline.run()
+            finally:
+                crawler.flush_pages()
 
-                except Exception as e:
-                    stats['errors'] += 1
-                    self.stdout.write(
-                        self.style.ERROR(f'   ✗ 過去問の保存エラー: {e}')
-                    )
+            stats = writer.stats
+            self.stdout.write(self.style.SUCCESS(
+                f"   {pipeline_stats['records']}件の過去問データを取得（{pipeline_stats['batches']}回に分けて保存）"
+            ))
 
             # 結果サマリーを表示
             self.stdout.write('\n' + '=' * 60)
@@ -992,5 +1336,8 @@ class Command(BaseCommand):
             else:
                 self.stdout.write(self.style.WARNING('\nDRY RUN モードのため、データベースには保存されませんでした'))
 
+            export_metrics()
+            self.stdout.write('メトリクスを出力しました')
+
         except Exception as e:
             raise CommandError(f'クローリング中にエラーが発生しました: {e}')
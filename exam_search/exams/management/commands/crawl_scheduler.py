@@ -0,0 +1,332 @@
+"""
+Django管理コマンド: クロールスケジューラー
+
+crawler_config.SCHEDULE_CONFIG に従って、リンク検証・全クロール・
+レポート生成などのタスクを1つのプロセス内で定期実行します。
+cronでタスクごとにDjangoを起動する必要はありません。
+
+使用例:
+    # デーモンとして起動
+    python manage.py crawl_scheduler
+
+    # ワーカー数を指定（SQLiteでは書き込みが競合するため、デフォルトは1）
+    python manage.py crawl_scheduler --workers 3
+
+    # 実行時刻を過ぎているタスクを1回だけ実行して終了
+    python manage.py crawl_scheduler --once
+
+    # 停止中に実行されなかったタスクを実行せず、スキップとして記録
+    python manage.py crawl_scheduler --no-catch-up
+"""
+
+import calendar
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, close_old_connections, connection
+from django.utils import timezone
+
+from exams.models import ScheduledTaskRun
+from exams.management.commands.run_crawler import CrawlerRunner, CRAWLERS_AVAILABLE
+
+if CRAWLERS_AVAILABLE:
+    from crawler_config import SCHEDULE_CONFIG
+
+WEEKDAYS = {
+    'monday': 0,
+    'tuesday': 1,
+    'wednesday': 2,
+    'thursday': 3,
+    'friday': 4,
+    'saturday': 5,
+    'sunday': 6,
+}
+
+
+def latest_slot(schedule_name, config, now):
+    """
+    現在時刻以前で直近の実行予定日時を計算
+
+    Args:
+        schedule_name (str): daily / weekly / monthly
+        config (dict): SCHEDULE_CONFIGの各設定
+        now (datetime): 現在時刻（タイムゾーン付き）
+
+    Returns:
+        datetime: 直近の実行予定日時（タイムゾーン付き）
+    """
+    local_now = timezone.localtime(now)
+    hour, minute = (int(v) for v in config['time'].split(':'))
+
+    def at(day):
+        return timezone.make_aware(
+            datetime(day.year, day.month, day.day, hour, minute)
+        )
+
+    if schedule_name == 'daily':
+        slot = at(local_now.date())
+        if slot > now:
+            slot = at(local_now.date() - timedelta(days=1))
+
+    elif schedule_name == 'weekly':
+        weekday = WEEKDAYS[config['day'].lower()]
+        days_back = (local_now.weekday() - weekday) % 7
+        slot = at(local_now.date() - timedelta(days=days_back))
+        if slot > now:
+            slot = at(local_now.date() - timedelta(days=days_back + 7))
+
+    elif schedule_name == 'monthly':
+        def monthly_slot(year, month):
+            day = min(config['day'], calendar.monthrange(year, month)[1])
+            return at(datetime(year, month, day))
+
+        slot = monthly_slot(local_now.year, local_now.month)
+        if slot > now:
+            if local_now.month == 1:
+                slot = monthly_slot(local_now.year - 1, 12)
+            else:
+                slot = monthly_slot(local_now.year, local_now.month - 1)
+
+    else:
+        raise ValueError(f'未対応のスケジュール: {schedule_name}')
+
+    return slot
+
+
+class Command(BaseCommand):
+    help = 'SCHEDULE_CONFIGに従ってクロール関連タスクを定期実行します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='同時に実行するタスク数（デフォルト: SQLiteでは1、それ以外は2）'
+        )
+
+        parser.add_argument(
+            '--poll-interval',
+            type=int,
+            default=60,
+            help='実行予定を確認する間隔（秒、デフォルト: 60）'
+        )
+
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='実行時刻を過ぎているタスクを1回だけ実行して終了'
+        )
+
+        parser.add_argument(
+            '--no-catch-up',
+            action='store_true',
+            help='停止中に実行されなかったタスクを実行せず、スキップとして記録'
+        )
+
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='DRY RUNモード（タスクはデータベースを変更しない）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        if not CRAWLERS_AVAILABLE:
+            raise CommandError('クローラーモジュールが見つかりません（python manage.py run_crawler で詳細を確認してください）')
+
+        self.dry_run = options['dry_run']
+        # running_tasks の更新を通知し、--once で実行中のタスクの終了を待てるようにする
+        self.lock = threading.Condition()
+        self.running_tasks = set()
+
+        # SQLiteは同時に1つの書き込みしか受け付けないため、full_crawl と validate_links などを
+        # 並行して実行するとロック待ちでエラーになる
+        workers = options['workers']
+        if workers is None:
+            workers = 1 if connection.vendor == 'sqlite' else 2
+        elif workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                f'SQLiteで{workers}件のタスクを同時に実行します（書き込みが競合する場合は --workers 1 を指定してください）'
+            ))
+
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        self.stdout.write(self.style.SUCCESS('クロールスケジューラー'))
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        for name, config in SCHEDULE_CONFIG.items():
+            status = '有効' if config['enabled'] else '無効'
+            self.stdout.write(f"  {name}: {status} {config['time']} {', '.join(config['tasks'])}")
+
+        # 前回のプロセスが実行中のまま停止した記録を失敗として閉じる
+        interrupted = ScheduledTaskRun.objects.filter(status='running').update(
+            status='failed',
+            finished_at=timezone.now(),
+            error='スケジューラーの停止により中断'
+        )
+        if interrupted:
+            self.stdout.write(self.style.WARNING(f'中断されたタスク: {interrupted}件'))
+
+        if options['no_catch_up']:
+            skipped = self._skip_missed_slots()
+            self.stdout.write(f'スキップとして記録したタスク: {skipped}件')
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+        try:
+            while True:
+                deferred = [
+                    task for schedule_name, task, slot in self._due_tasks()
+                    if not self._submit(executor, schedule_name, task, slot)
+                ]
+
+                if options['once']:
+                    if not deferred:
+                        break
+                    # 次回の確認がないため、実行中の同じタスクの終了を待ってから投入する
+                    self._wait_for_tasks(deferred)
+                    continue
+
+                time.sleep(options['poll_interval'])
+
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nスケジューラーを停止します（実行中のタスクの完了を待機）'))
+
+        finally:
+            executor.shutdown(wait=True)
+
+    def _due_tasks(self):
+        """
+        実行予定日時を過ぎていて、まだ記録がないタスクを列挙
+
+        停止中に複数回の実行枠を過ぎていても、直近の実行枠のみを実行します。
+
+        Returns:
+            list: (スケジュール名, タスク名, 実行予定日時) のリスト
+        """
+        now = timezone.now()
+        due = []
+
+        for schedule_name, config in SCHEDULE_CONFIG.items():
+            if not config['enabled']:
+                continue
+
+            slot = latest_slot(schedule_name, config, now)
+            done = set(
+                ScheduledTaskRun.objects.filter(
+                    schedule=schedule_name, scheduled_for=slot
+                ).values_list('task', flat=True)
+            )
+
+            for task in config['tasks']:
+                if task not in done:
+                    due.append((schedule_name, task, slot))
+
+        return due
+
+    def _skip_missed_slots(self):
+        """直近の実行枠をすべてスキップとして記録"""
+        now = timezone.now()
+        skipped = 0
+
+        for schedule_name, config in SCHEDULE_CONFIG.items():
+            if not config['enabled']:
+                continue
+
+            slot = latest_slot(schedule_name, config, now)
+            for task in config['tasks']:
+                _, created = ScheduledTaskRun.objects.get_or_create(
+                    schedule=schedule_name,
+                    task=task,
+                    scheduled_for=slot,
+                    defaults={'status': 'skipped', 'finished_at': now}
+                )
+                skipped += int(created)
+
+        return skipped
+
+    def _submit(self, executor, schedule_name, task, slot):
+        """
+        タスクをワーカーに投入
+
+        同じタスク（例: weeklyとmonthlyのfull_crawl）が実行中の場合は投入せず、
+        次回の確認時に改めて判定します。
+
+        Returns:
+            bool: 実行中の同じタスクがあり、投入を見送った場合はFalse
+        """
+        with self.lock:
+            if task in self.running_tasks:
+                self.stdout.write(f'実行中のため延期: {schedule_name}/{task}')
+                return False
+            self.running_tasks.add(task)
+
+        try:
+            run = ScheduledTaskRun.objects.create(
+                schedule=schedule_name,
+                task=task,
+                scheduled_for=slot,
+                status='running',
+                started_at=timezone.now(),
+            )
+        except IntegrityError:
+            # 別のスケジューラープロセスが先に記録した
+            with self.lock:
+                self.running_tasks.discard(task)
+                self.lock.notify_all()
+            return True
+
+        self.stdout.write(f'[{timezone.localtime():%Y-%m-%d %H:%M:%S}] 開始: {schedule_name}/{task}')
+        executor.submit(self._run_task, run)
+        return True
+
+    def _wait_for_tasks(self, tasks):
+        """指定したタスクがすべて実行中でなくなるまで待機"""
+        tasks = set(tasks)
+        with self.lock:
+            self.lock.wait_for(lambda: not tasks & self.running_tasks)
+
+    def _run_task(self, run):
+        """ワーカースレッドでタスクを実行して結果を記録"""
+        started = time.monotonic()
+
+        try:
+            close_old_connections()
+            runner = CrawlerRunner(command=self, dry_run=self.dry_run)
+
+            if run.task == 'full_crawl':
+                runner.run_all_crawlers()
+            elif run.task == 'validate_links':
+                runner.validate_all_links()
+            elif run.task == 'remove_duplicates':
+                runner.remove_duplicates()
+            elif run.task == 'generate_report':
+                runner.generate_report()
+            else:
+                raise ValueError(f'未対応のタスク: {run.task}')
+
+            run.status = 'success'
+
+        except Exception as e:
+            run.status = 'failed'
+            run.error = traceback.format_exc()
+            self.stdout.write(self.style.ERROR(f'✗ {run.schedule}/{run.task}: {e}'))
+
+        finally:
+            run.finished_at = timezone.now()
+            run.duration_seconds = time.monotonic() - started
+            run.save(update_fields=['status', 'error', 'finished_at', 'duration_seconds'])
+
+            with self.lock:
+                self.running_tasks.discard(run.task)
+                self.lock.notify_all()
+
+            close_old_connections()
+
+        self.stdout.write(
+            f'[{timezone.localtime():%Y-%m-%d %H:%M:%S}] 終了: {run.schedule}/{run.task} '
+            f'({run.get_status_display()}, {run.duration_seconds:.1f}秒)'
+        )
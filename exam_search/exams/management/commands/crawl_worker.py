@@ -0,0 +1,352 @@
+"""
+Django管理コマンド: クロールワーカー
+
+クロールフロンティア（CrawlFrontierテーブル）を共有の待ち行列として、
+複数のプロセスで並列にクロール・リンク検証を行います。
+
+- 各ワーカーは条件付きUPDATEでURLを1件ずつリースするため、同じURLを二重に処理しません
+- 各ワーカーはプロセスごとに独自のHTTPセッションを持ちます
+- 各ワーカーは定期的にハートビートを記録し（CrawlWorkerテーブル）、保持中のリースを延長します
+- ハートビートが途絶えたワーカーのリースは回収され、他のワーカーが処理します
+
+ジョブの種類:
+    toshin      東進過去問データベースの大学ページ（TARGET_UNIVERSITIES）
+    link_check  過去問PDFリンクの有効性チェック
+
+使用例:
+    # 4プロセスでクロールとリンク検証
+    python manage.py crawl_worker --processes 4
+
+    # 東進のクロールのみ
+    python manage.py crawl_worker --processes 2 --crawler toshin
+
+    # 別のホストから既存の待ち行列の処理に参加（URLの登録はしない）
+    python manage.py crawl_worker --processes 2 --no-seed
+
+    # 待ち行列が空になっても終了せず、60秒ごとに確認する
+    python manage.py crawl_worker --processes 2 --wait 60
+
+注意:
+    SQLiteでは書き込みがデータベース単位でロックされます。
+    多数のプロセスで実行する場合はPostgreSQLの利用、または
+    DATABASES の OPTIONS に timeout を設定することを推奨します。
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+import socket
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connections
+
+from exams.models import Exam, CrawlFrontier
+from exams.worker_process import start_worker
+
+# crawlersディレクトリをパスに追加
+CRAWLERS_DIR = os.path.join(settings.BASE_DIR, 'crawlers')
+if CRAWLERS_DIR not in sys.path:
+    sys.path.insert(0, CRAWLERS_DIR)
+
+try:
+    from toshin_crawler import ToshinExamCrawler
+    from crawler_utils import LinkValidator
+    from crawl_frontier import (
+        CrawlFrontierQueue, WorkerHeartbeat, default_worker_id,
+        reclaim_dead_workers, release_worker_leases
+    )
+    from crawler_config import CRAWLER_CONFIGS, FRONTIER_CONFIG
+    CRAWLERS_AVAILABLE = True
+except ImportError as e:
+    CRAWLERS_AVAILABLE = False
+    IMPORT_ERROR = str(e)
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPES = ['toshin', 'link_check']
+
+
+class JobHandler:
+    """
+    ワーカープロセス内でジョブを処理する（クローラーはプロセスごとに作成）
+    """
+
+    def __init__(self, dry_run=False, full_refresh=False):
+        self.dry_run = dry_run
+        self.full_refresh = full_refresh
+        self._toshin = None
+        self._validator = None
+
+    @property
+    def toshin(self):
+        if self._toshin is None:
+            self._toshin = ToshinExamCrawler(
+                delay=CRAWLER_CONFIGS['toshin']['delay'],
+                skip_unchanged=not self.full_refresh
+            )
+        return self._toshin
+
+    @property
+    def validator(self):
+        if self._validator is None:
+            self._validator = LinkValidator()
+        return self._validator
+
+    def handle(self, entry):
+        """
+        ジョブを1件処理
+
+        Args:
+            entry (CrawlFrontier): リースしたURL
+
+        Returns:
+            str: 処理結果の説明
+        """
+        if entry.crawler == 'toshin':
+            try:
+                exams_data = self.toshin.crawl_university_exams(entry.url, entry.label)
+                if self.dry_run:
+                    self.toshin.fingerprints.discard()
+                    return f"{len(exams_data)}件取得（DRY RUN）"
+                count = self.toshin.save_exams_to_db(exams_data)
+            except Exception:
+                self.toshin.fingerprints.discard()
+                raise
+            return f"{count}件保存"
+
+        if entry.crawler == 'link_check':
+            result = self.validator.check_url(entry.url)
+            if result['skipped']:
+                # ホストへのリクエストが停止中: 失敗として後でリトライさせる
+                raise RuntimeError(result['error'])
+            if not self.dry_run:
+                Exam.objects.filter(problem_url=entry.url).update(is_verified=result['is_valid'])
+            return '有効' if result['is_valid'] else f"無効 ({result['status_code'] or result['error']})"
+
+        raise ValueError(f'未対応のジョブ: {entry.crawler}')
+
+
+def run_worker(crawler_ids, dry_run=False, full_refresh=False, wait=0):
+    """
+    ワーカープロセスのメイン処理
+
+    待ち行列からURLを1件ずつリースして処理します。
+    wait が0なら待ち行列が空になった時点で終了します。
+
+    Args:
+        crawler_ids (list): 処理するジョブの種類
+        dry_run (bool): データベースに保存しない
+        full_refresh (bool): 変化のないページも再処理する
+        wait (int): 待ち行列が空のときに再確認するまでの秒数（0で終了）
+    """
+    # 親プロセスから引き継いだDB接続は使わない
+    connections.close_all()
+
+    worker_id = default_worker_id()
+    heartbeat = WorkerHeartbeat(worker_id, crawler_ids)
+    heartbeat.start()
+    handler = JobHandler(dry_run=dry_run, full_refresh=full_refresh)
+    frontiers = [CrawlFrontierQueue(crawler_id, worker_id=worker_id) for crawler_id in crawler_ids]
+
+    logger.info(f"Worker {worker_id} started: {', '.join(crawler_ids)}")
+
+    try:
+        while True:
+            processed = 0
+
+            for frontier in frontiers:
+                try:
+                    for entry in frontier.iter_leased(limit=1):
+                        processed += 1
+                        try:
+                            message = handler.handle(entry)
+                        except Exception as e:
+                            logger.error(f"[{worker_id}] ✗ {entry.label or entry.url}: {e}")
+                            frontier.fail(entry, e)
+                            heartbeat.record(success=False)
+                            continue
+
+                        if dry_run:
+                            frontier.release(entry)
+                        else:
+                            frontier.complete(entry)
+                        heartbeat.record(success=True)
+                        logger.info(f"[{worker_id}] ✓ {entry.label or entry.url}: {message}")
+
+                except OperationalError as e:
+                    # SQLiteのロック待ちがタイムアウトした場合は少し待って再開
+                    logger.warning(f"[{worker_id}] Database busy: {e}")
+                    close_old_connections()
+                    time.sleep(1)
+
+            if processed:
+                continue
+            if not wait:
+                break
+            time.sleep(wait)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        heartbeat.stop()
+        release_worker_leases([worker_id])
+        connections.close_all()
+        logger.info(f"Worker {worker_id} stopped")
+
+
+class Command(BaseCommand):
+    help = '複数のプロセスでクロールフロンティアのジョブを並列に処理します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=2,
+            help='ワーカープロセス数（デフォルト: 2）'
+        )
+
+        parser.add_argument(
+            '--crawler',
+            action='append',
+            choices=JOB_TYPES,
+            help='処理するジョブの種類（複数指定可、デフォルト: すべて）'
+        )
+
+        parser.add_argument(
+            '--no-seed',
+            action='store_true',
+            help='URLを待ち行列に登録せず、登録済みのジョブのみ処理'
+        )
+
+        parser.add_argument(
+            '--wait',
+            type=int,
+            default=0,
+            help='待ち行列が空のときに再確認する間隔（秒、0で終了、デフォルト: 0）'
+        )
+
+        parser.add_argument(
+            '--full-refresh',
+            action='store_true',
+            help='前回から変化のないページも再パース・再保存する'
+        )
+
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='DRY RUNモード（データベースに保存しない）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        if not CRAWLERS_AVAILABLE:
+            raise CommandError(f'クローラーモジュールが見つかりません: {IMPORT_ERROR}')
+
+        crawler_ids = options['crawler'] or JOB_TYPES
+        processes = max(1, options['processes'])
+
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        self.stdout.write(self.style.SUCCESS('クロールワーカー'))
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        self.stdout.write(f'プロセス数: {processes}')
+        self.stdout.write(f'ジョブ: {", ".join(crawler_ids)}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN モード: データベースには保存しません'))
+
+        reclaimed = reclaim_dead_workers()
+        if reclaimed:
+            self.stdout.write(self.style.WARNING(f'応答のないワーカーから回収したURL: {reclaimed}件'))
+
+        if not options['no_seed']:
+            for crawler_id in crawler_ids:
+                created = self._seed(crawler_id)
+                self.stdout.write(f'  {crawler_id}: {created}件のURLを新規登録')
+
+        # 子プロセスにDB接続を引き継がない
+        connections.close_all()
+
+        # spawn 方式ではこのモジュールをDjangoの初期化前に読み込めないため、
+        # 初期化してから run_worker を呼び出す start_worker を起動する
+        workers = [
+            multiprocessing.Process(
+                target=start_worker,
+                args=(crawler_ids, options['dry_run'], options['full_refresh'], options['wait']),
+                name=f'crawl-worker-{i}',
+            )
+            for i in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            self._monitor(workers)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\n停止中（処理中のジョブは待ち行列に戻します）...'))
+            for worker in workers:
+                worker.join()
+
+        self._print_stats(crawler_ids)
+
+    def _seed(self, crawler_id):
+        """
+        ジョブを待ち行列に登録
+
+        Returns:
+            int: 新規登録されたURL数
+        """
+        if crawler_id == 'toshin':
+            from exams.management.commands.run_crawler import CrawlerRunner
+            runner = CrawlerRunner(command=self)
+            before = CrawlFrontier.objects.filter(crawler='toshin').count()
+            runner._seed_frontier('toshin', CRAWLER_CONFIGS['toshin'])
+            return CrawlFrontier.objects.filter(crawler='toshin').count() - before
+
+        frontier = CrawlFrontierQueue(crawler_id)
+        frontier.start_cycle()
+        urls = (
+            Exam.objects.exclude(problem_url='')
+            .order_by().values_list('problem_url', flat=True).distinct()
+        )
+        return frontier.seed({'url': url, 'label': '過去問PDF'} for url in urls)
+
+    def _monitor(self, workers):
+        """
+        ワーカーの終了を待ちながら、応答のないワーカーのリースを回収する
+        """
+        hostname = socket.gethostname()
+        interval = FRONTIER_CONFIG['heartbeat_interval']
+        finished = set()
+
+        while len(finished) < len(workers):
+            time.sleep(min(interval, 5))
+            close_old_connections()
+
+            for worker in workers:
+                if worker.pid in finished or worker.is_alive():
+                    continue
+                finished.add(worker.pid)
+
+                if worker.exitcode != 0:
+                    # 異常終了したワーカーのリースはすぐに回収する
+                    reclaimed = release_worker_leases([f'{hostname}:{worker.pid}'], status='dead')
+                    self.stdout.write(self.style.ERROR(
+                        f'✗ {worker.name} (pid {worker.pid}) が異常終了しました '
+                        f'(終了コード {worker.exitcode}, 回収したURL {reclaimed}件)'
+                    ))
+
+            # 他のホストのワーカーを含め、ハートビートが途絶えたワーカーのリースを回収
+            reclaim_dead_workers()
+
+    def _print_stats(self, crawler_ids):
+        """待ち行列の状態を表示"""
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(self.style.SUCCESS('実行結果'))
+        self.stdout.write('=' * 60)
+        for crawler_id in crawler_ids:
+            self.stdout.write(f'{crawler_id}: {CrawlFrontierQueue(crawler_id).stats()}')
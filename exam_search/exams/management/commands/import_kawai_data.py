@@ -0,0 +1,382 @@
+"""
+Django管理コマンド: 河合塾の解答速報データの登録
+
+extract_all_pdfs.py が出力したPDFリンクのCSV（pdf_links.csv）を読み込み、
+大学・過去問・解答ソースとして登録します。登録済みのものは登録しないため、
+同じCSVを何度インポートしても結果は変わりません。
+
+使用例:
+    # ./outputs/pdf_links.csv をインポート
+    python manage.py import_kawai_data
+
+    # CSVを指定
+    python manage.py import_kawai_data outputs/pdf_links.csv
+"""
+
+import csv
+import os
+import re
+from collections import Counter
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from exams.canonical import canonicalize
+from exams.models import Exam, AnswerSource
+from exams.university_index import get_university_index
+from exams.subject_classifier import classify_subject
+
+# crawlersディレクトリをパスに追加
+CRAWLERS_DIR = os.path.join(settings.BASE_DIR, 'crawlers')
+if CRAWLERS_DIR not in sys.path:
+    sys.path.insert(0, CRAWLERS_DIR)
+
+from ingest_pipeline import Pipeline, BatchSink, map_stage, dedupe_stage
+
+# 大学名とコードのマッピング
+UNIVERSITY_MAPPING = {
+    't01': '東京大学',
+    'k01': '京都大学',
+    'n01': '名古屋大学',
+    'hr1': '広島大学',
+    'ky1': '九州大学',
+    'ho1': '北海道大学',
+    'th1': '東北大学',
+    'gk1': '東京科学大学',  # 医歯学系
+    'gk2': '東京科学大学',  # 理工学系
+    'ht1': '一橋大学',
+    'ha1': '大阪大学',
+    'kb1': '神戸大学',
+    'k11': '慶應義塾大学',  # 文学部
+    'k12': '慶應義塾大学',  # 法学部
+    'k14': '慶應義塾大学',  # 経済学部
+    'k15': '慶應義塾大学',  # 商学部
+    'k16': '慶應義塾大学',  # 理工学部
+    'k17': '慶應義塾大学',  # 医学部
+    'w01': '早稲田大学',  # 文学部
+    'w02': '早稲田大学',  # 文科構想学部
+    'w06': '早稲田大学',  # 法学部
+    'w09': '早稲田大学',  # 理工学部
+    'd01': '同志社大学',
+    'd02': '同志社大学',
+    'rt1': '立命館大学',
+    'ks1': '関西大学',
+    'kg1': '関西学院大学',
+}
+
+# 学部・学科のマッピング
+DEPARTMENT_MAPPING = {
+    'gk1': '医歯学系',
+    'gk2': '理工学系',
+    'k11': '文学部',
+    'k12': '法学部',
+    'k14': '経済学部',
+    'k15': '商学部',
+    'k16': '理工学部',
+    'k17': '医学部',
+    'w01': '文学部',
+    'w02': '文科構想学部',
+    'w06': '法学部',
+    'w09': '基幹理工・創造理工・先進理工学部',
+    'd01': '全学部日程（文系）',
+    'd02': '全学部日程（理系）',
+    'rt1': '全学統一方式',
+    'ks1': '全学部日程',
+    'kg1': '全学部日程',
+}
+
+# 解答速報のURLに含まれる年度（例: /nyushi/honshi/25/t01/ → 2025）
+HONSHI_YEAR_PATTERN = re.compile(r'/honshi/(\d{2})/')
+
+EXAM_TYPE = canonicalize('exam_type', '一般入試')
+
+# 大学コードの提供元（UniversityAlias.provider）
+PROVIDER = 'kawai'
+
+
+def infer_year(url):
+    """
+    URLの /honshi/NN/ から年度を取得
+
+    Returns:
+        int: 年度、URLに含まれない場合はNone
+    """
+    match = HONSHI_YEAR_PATTERN.search(url)
+    return 2000 + int(match.group(1)) if match else None
+
+
+def extract_subject_from_filename(pdf_url, code):
+    """
+    PDFファイル名から科目を推測
+    """
+    # ファイル名から科目コードを抽出（例: t01-11c.pdf -> 11）
+    match = re.search(r'[-/](\d{2})[ac]\.pdf', pdf_url)
+    subject_code = match.group(1) if match else None
+    return classify_subject(pdf_url, provider='kawai', code=subject_code).subject
+
+
+def read_rows(csv_file):
+    """
+    CSVファイルを1行ずつ読み込む
+    """
+    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def normalize_row(row, log=print):
+    """
+    CSVの行を取り込み用のレコードに変換（年度が分からない行はNone）
+    """
+    code = row['code']
+    link_text = row['link_text']
+
+    year = infer_year(row['pdf_url'])
+    if year is None:
+        log(f"  ✗ 年度が分からないためスキップ: {row['pdf_url']}")
+        return None
+
+    return {
+        'code': code,
+        'year': year,
+        'department': canonicalize('department', DEPARTMENT_MAPPING.get(code, '')),
+        'subject': extract_subject_from_filename(row['pdf_url'], code),
+        'pdf_url': row['pdf_url'],
+        'link_text': link_text,
+        # 解答例か分析かを判定
+        'has_analysis': '分析' in link_text,
+    }
+
+
+class KawaiWriter:
+    """
+    レコードのバッチをDBに書き込む
+
+    登録済みの大学・過去問・解答ソースのキーを最初にまとめて読み込み、
+    未登録のものだけを bulk_create で追加します。再インポート時は書き込みが発生しません。
+    """
+
+    def __init__(self, log=print):
+        """
+        Args:
+            log (callable): 進捗を出力する関数
+        """
+        self.log = log
+        # 大学は別名の索引（河合塾の大学コード・学校名）から解決する
+        self.university_index = get_university_index()
+        # 大学コード → 大学ID
+        self.universities = {}
+        # (大学ID, 年度, 科目, 試験種別, 学部) → 過去問ID
+        self.exams = {
+            key[:-1]: key[-1]
+            for key in Exam.objects.filter(exam_type=EXAM_TYPE).values_list(
+                'university_id', 'year', 'subject', 'exam_type', 'department', 'id'
+            )
+        }
+        # (過去問ID, 解答URL)
+        self.answer_keys = set(
+            AnswerSource.objects.filter(exam__exam_type=EXAM_TYPE).values_list(
+                'exam_id', 'answer_url'
+            )
+        )
+        self.used_universities = set()
+        self.total_exams = 0
+        self.total_links = 0
+
+    def _university_name(self, code):
+        return UNIVERSITY_MAPPING.get(code, f'Unknown ({code})')
+
+    def _exam_key(self, record):
+        university_id = self.universities[record['code']]
+        return (university_id, record['year'], record['subject'], EXAM_TYPE, record['department'])
+
+    def _create_universities(self, records):
+        for record in records:
+            code = record['code']
+            if code in self.universities:
+                continue
+
+            # 未登録の大学のみDBに登録し、コードは次回から索引で解決できるよう別名として登録する
+            name = self._university_name(code)
+            self.universities[code], created = self.university_index.get_or_create(
+                name,
+                code=code,
+                provider=PROVIDER,
+                defaults={
+                    'school_type': 'university',
+                    'official_url': (
+                        f"https://www.kawai-juku.ac.jp/nyushi/honshi/{record['year'] % 100:02d}/{code}/"
+                    ),
+                },
+            )
+            if created:
+                self.log(f"✓ 大学を登録: {name}")
+
+    def _create_exams(self, records):
+        missing = {}
+        for record in records:
+            key = self._exam_key(record)
+            if key not in self.exams and key not in missing:
+                missing[key] = Exam(
+                    university_id=key[0],
+                    year=record['year'],
+                    subject=record['subject'],
+                    exam_type=EXAM_TYPE,
+                    department=record['department'],
+                    source_type='yobi_school',
+                    is_verified=True,
+                    scraped_at=timezone.now(),
+                    description='河合塾 解答速報より',
+                )
+
+        if not missing:
+            return
+
+        # Examには一意制約がない（重複は merge_duplicate_exams で統合する）ため、
+        # 登録済みのキーは self.exams で除外し、ignore_conflicts は使わない
+        Exam.objects.bulk_create(missing.values())
+        for key, exam in missing.items():
+            self.exams[key] = exam.pk
+
+        names = {
+            self.universities[code]: self._university_name(code)
+            for code in {record['code'] for record in records}
+        }
+        for university_id, year, subject, _, department in missing:
+            self.log(f"  ✓ 過去問登録: {names[university_id]} {year}年度 {department} {subject}")
+        self.total_exams += len(missing)
+
+    def write_batch(self, records):
+        """
+        レコードのバッチを書き込む
+
+        Returns:
+            int: 新規登録したPDFリンク数
+        """
+        self._create_universities(records)
+        self._create_exams(records)
+
+        answer_sources = []
+        now = timezone.now()
+        for record in records:
+            self.used_universities.add(record['code'])
+            key = (self.exams[self._exam_key(record)], record['pdf_url'])
+            if key in self.answer_keys:
+                continue
+
+            # 各リンクをAnswerSourceとして登録
+            self.answer_keys.add(key)
+            answer_sources.append(AnswerSource(
+                exam_id=key[0],
+                answer_url=record['pdf_url'],
+                provider_name='河合塾',
+                has_detailed_explanation=record['has_analysis'],
+                reliability_score=9,
+                notes=record['link_text'],
+                is_active=True,
+                last_checked_at=now,
+            ))
+
+        # (過去問, 解答URL) の一意制約により、他のプロセスが先に登録したものは無視される
+        AnswerSource.objects.bulk_create(answer_sources, ignore_conflicts=True)
+        self.total_links += len(answer_sources)
+        return len(answer_sources)
+
+
+def import_pdf_links(csv_file, batch_size=500, log=print):
+    """
+    CSVファイルからPDFリンクをインポート
+
+    CSVは1行ずつ読み込み、batch_size 件ごとにDBへ書き込みます。
+    インポート全体を1トランザクションで実行するため、途中で失敗した場合は何も登録されません。
+
+    Args:
+        csv_file (str): PDFリンクのCSV
+        batch_size (int): 1回の書き込み件数
+        log (callable): 進捗を出力する関数
+    """
+    log("=" * 80)
+    log("河合塾 解答速報データをインポートします...")
+    log("=" * 80)
+
+    # 段階ごとの入出力の件数（途中で失われたレコードがないか照合する）
+    counts = Counter()
+    unique_urls = set()
+
+    def rows():
+        for row in read_rows(csv_file):
+            counts['read'] += 1
+            yield row
+
+    def normalize(row):
+        counts['normalize_in'] += 1
+        record = normalize_row(row, log)
+        if record is not None:
+            counts['normalize_out'] += 1
+        return record
+
+    def dedupe_key(record):
+        counts['dedupe_in'] += 1
+        unique_urls.add(record['pdf_url'])
+        return record['pdf_url']
+
+    def passed(record):
+        counts['dedupe_out'] += 1
+        return record
+
+    with transaction.atomic():
+        writer = KawaiWriter(log)
+        pipeline = Pipeline(
+            rows(),
+            map_stage(normalize),
+            dedupe_stage(dedupe_key),
+            map_stage(passed),
+            # 書き込みは同じトランザクション内のため、時間経過では区切らない
+            sink=BatchSink(writer.write_batch, batch_size=batch_size, flush_interval=float('inf')),
+        )
+        stats = pipeline.run()
+
+        # 段階の間で失われたレコードがあれば、何も登録せずに終了する
+        counts['unique'] = len(unique_urls)
+        if (counts['read'], counts['normalize_out'], counts['unique'], counts['dedupe_out']) != (
+            counts['normalize_in'], counts['dedupe_in'], counts['dedupe_out'], stats['records']
+        ):
+            raise CommandError(f"段階の間でレコードが失われました: {dict(counts)}, 書き込み {stats['records']}件")
+
+    log("\n" + "=" * 80)
+    log(f"インポート完了:")
+    log(f"  - {len(writer.used_universities)} 大学")
+    log(f"  - {writer.total_exams} 過去問（新規）")
+    log(f"  - {writer.total_links} PDFリンク（新規、{counts['read']}行を{stats['batches']}回に分けて書き込み）")
+    log("=" * 80)
+
+
+class Command(BaseCommand):
+    help = '河合塾の解答速報PDFリンク（CSV）をデータベースに登録します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'csv_file',
+            nargs='?',
+            default='outputs/pdf_links.csv',
+            help='extract_all_pdfs.py の出力CSV（デフォルト: outputs/pdf_links.csv）'
+        )
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='1回の書き込み件数（デフォルト: 500）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        csv_file = options['csv_file']
+        if not os.path.exists(csv_file):
+            raise CommandError(f'CSVファイルが見つかりません: {csv_file}')
+
+        import_pdf_links(csv_file, batch_size=max(1, options['batch_size']), log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS('\n✓ データベースへの登録が完了しました！'))
@@ -0,0 +1,121 @@
+"""
+Django管理コマンド: 公式HPの過去問掲載状況の登録
+
+過去問掲載状況のチェック結果（CSV）を読み込み、各大学の掲載情報を更新します。
+大学は学校名・公式サイトのドメインから別名の索引で解決します。
+
+使用例:
+    python manage.py import_pastpaper_results pastpaper_check_results.csv
+"""
+
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from exams.models import University
+from exams.university_index import get_university_index
+
+
+class Command(BaseCommand):
+    help = '過去問掲載状況のチェック結果（CSV）をデータベースに登録します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'csv_file',
+            nargs='?',
+            default='pastpaper_check_results.csv',
+            help='チェック結果のCSV（デフォルト: pastpaper_check_results.csv）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        csv_file = options['csv_file']
+        if not os.path.exists(csv_file):
+            raise CommandError(f'CSVファイルが見つかりません: {csv_file}')
+
+        self.stdout.write("=" * 80)
+        self.stdout.write("過去問掲載状況結果をインポートします...")
+        self.stdout.write("=" * 80)
+
+        updated_count = 0
+        not_found_count = 0
+
+        with open(csv_file, 'r', encoding='utf-8-sig') as f:
+            rows = list(csv.DictReader(f))
+
+        # 大学は別名の索引（学校名・公式サイトのドメイン）から解決し、まとめて読み込む
+        university_index = get_university_index()
+        university_ids = [
+            university_index.resolve(name=row['大学名'], url=row['URL']) for row in rows
+        ]
+        universities = University.objects.in_bulk([i for i in university_ids if i is not None])
+
+        checked_at = timezone.now()
+        updated = {}
+
+        for row, university_id in zip(rows, university_ids):
+            univ_name = row['大学名']
+            has_pastpaper = row['過去問ページ発見'] == 'あり'
+            pastpaper_url = row['過去問ページURL'] if row['過去問ページURL'] else ''
+            pastpaper_years = row['掲載年度'] if row['掲載年度'] else ''
+            has_three_years = row['3年分掲載'] == 'あり'
+            note = row['備考'] if row['備考'] else ''
+
+            university = universities.get(university_id)
+
+            if university:
+                # 過去問掲載情報を更新
+                university.has_official_pastpaper = has_pastpaper
+
+                # official_urlが空の場合は設定
+                if not university.official_url and row['URL']:
+                    university.official_url = row['URL']
+
+                university.pastpaper_url = pastpaper_url
+                university.pastpaper_years = pastpaper_years
+                university.pastpaper_checked_at = checked_at
+                # bulk_update では auto_now が働かないため明示的に設定
+                university.updated_at = checked_at
+
+                # 備考を設定
+                if has_three_years:
+                    university.pastpaper_note = "過去3年分以上掲載"
+                elif has_pastpaper and pastpaper_years:
+                    year_count = len(pastpaper_years.split(','))
+                    university.pastpaper_note = f"{year_count}年分掲載"
+                elif has_pastpaper:
+                    university.pastpaper_note = "過去問ページあり（年度不明）"
+                else:
+                    university.pastpaper_note = note if note else "過去問ページ未発見"
+
+                updated[university.pk] = university
+
+                status = "✓" if has_pastpaper else "×"
+                years_info = f"({pastpaper_years})" if pastpaper_years else ""
+                self.stdout.write(f"{status} {univ_name}: {university.pastpaper_note} {years_info}")
+                updated_count += 1
+            else:
+                self.stdout.write(f"⚠ {univ_name}: データベースに未登録")
+                not_found_count += 1
+
+        University.objects.bulk_update(updated.values(), [
+            'has_official_pastpaper', 'official_url', 'pastpaper_url', 'pastpaper_years',
+            'pastpaper_checked_at', 'pastpaper_note', 'updated_at',
+        ], batch_size=500)
+
+        self.stdout.write("\n" + "=" * 80)
+        self.stdout.write(f"インポート完了:")
+        self.stdout.write(f"  - 更新: {updated_count}校")
+        self.stdout.write(f"  - 未登録: {not_found_count}校")
+        self.stdout.write("=" * 80)
+
+        # 統計を表示
+        self.stdout.write("\n=== 統計 ===")
+        total_with_pastpaper = University.objects.filter(has_official_pastpaper=True).count()
+        total_universities = University.objects.count()
+        self.stdout.write(f"公式HP過去問掲載: {total_with_pastpaper}校 / {total_universities}校")
+
+        self.stdout.write(self.style.SUCCESS("\n✓ データベースへの登録が完了しました！"))
@@ -0,0 +1,122 @@
+"""
+Django管理コマンド: 重複する過去問の統合
+
+大学・年度・科目・試験種別が同じ過去問を、学部の違いも含めて1件に統合します。
+統合処理は exams.exam_merge（SQLの集合演算、1トランザクション）で行います。
+
+使用例:
+    # 統合を実行
+    python manage.py merge_duplicate_exams
+
+    # 変更内容を表示するのみ
+    python manage.py merge_duplicate_exams --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from exams.models import Exam, AnswerSource
+from exams.exam_merge import merge_duplicate_exams
+
+
+class Command(BaseCommand):
+    help = '重複する過去問を統合します（学部違いも含む）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='DRY RUNモード（変更内容を表示するのみでデータベースは変更しない）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        dry_run = options['dry_run']
+
+        self.stdout.write('=' * 80)
+        self.stdout.write('重複する過去問を統合します（学部違いも含む）...')
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN モード: データベースは変更しません'))
+        self.stdout.write('=' * 80)
+
+        # 大学・年度・科目・試験種別ごとにグループ化（学部は無視）
+        result = merge_duplicate_exams(
+            key_fields=('university', 'year', 'subject', 'exam_type'),
+            dry_run=dry_run
+        )
+        self.print_diff(result.groups)
+
+        stats = result.stats
+        self.stdout.write('\n' + '=' * 80)
+        self.stdout.write(f"統合{'予定' if dry_run else '完了'}:")
+        self.stdout.write(f"  - 統合されたグループ: {stats['groups']}")
+        self.stdout.write(f"  - 削除されたExam: {stats['exams_deleted']}")
+        self.stdout.write(f"  - 解答ソース: {stats['sources_moved']}件移動, {stats['sources_dropped']}件削除（重複）")
+        self.stdout.write(f"  - お気に入り: {stats['favorites_moved']}件移動, {stats['favorites_dropped']}件削除（重複）")
+        self.stdout.write(f"  - 問題URL追加: {stats['problem_urls']}")
+        self.stdout.write('=' * 80)
+
+        if not dry_run:
+            self.show_statistics()
+            self.stdout.write(self.style.SUCCESS('\n✓ 過去問の統合が完了しました！'))
+
+    def print_diff(self, groups):
+        """
+        グループごとの変更内容を表示
+        """
+        for group in groups:
+            master = group['master']
+            self.stdout.write(f"\n統合: {master.university.name} {master.year}年度 {master.get_subject_display()}")
+            self.stdout.write(f"  マスター: Exam ID {master.pk} (学部: \"{master.department}\")")
+
+            for loser in group['losers']:
+                exam = loser['exam']
+                self.stdout.write(f"  統合元: Exam ID {exam.pk} (学部: \"{exam.department}\")")
+
+                for source, moved in loser['sources']:
+                    if moved:
+                        self.stdout.write(f"    - 移動: {source.provider_name}")
+                    else:
+                        self.stdout.write(f"    - スキップ（重複）: {source.provider_name}")
+
+                if loser['problem_url']:
+                    self.stdout.write("    - 問題URL追加")
+
+                for favorite, moved in loser['favorites']:
+                    if moved:
+                        self.stdout.write("    - お気に入り移動")
+
+    def show_statistics(self):
+        """
+        統合後の統計を表示
+        """
+        self.stdout.write('\n=== 統合後の統計 ===')
+
+        total_exams = Exam.objects.count()
+        total_sources = AnswerSource.objects.count()
+
+        self.stdout.write(f'総過去問数: {total_exams}')
+        self.stdout.write(f'総解答ソース数: {total_sources}')
+        if not total_exams:
+            return
+        self.stdout.write(f'平均解答ソース数: {total_sources / total_exams:.2f}')
+        self.stdout.write('')
+
+        # 複数の解答ソースを持つ過去問
+        multi_source = Exam.objects.annotate(
+            source_count=Count('answer_sources')
+        ).filter(source_count__gte=2).count()
+
+        self.stdout.write(f'複数の解答ソースを持つ過去問: {multi_source}件 ({multi_source / total_exams * 100:.1f}%)')
+        self.stdout.write('')
+
+        # 重複チェック（大学・年度・科目）
+        duplicates = Exam.objects.values(
+            'university__name', 'year', 'subject'
+        ).annotate(count=Count('id')).filter(count__gt=1).count()
+
+        if duplicates:
+            self.stdout.write(self.style.WARNING(f'\n⚠️  まだ重複あり: {duplicates}グループ'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\n✓ 重複なし'))
@@ -0,0 +1,207 @@
+"""
+Django管理コマンド: 保存済みページからの再抽出
+
+ページストアに保存したページ（StoredPage）に現在の抽出処理を実行し直し、
+結果をデータベースに保存します。セレクターや科目判定を修正した後に、
+サイトを再クロールせずに反映できます。
+
+抽出はプロセスプールで並列に行い、DBへの書き込みはメインプロセスで行います。
+
+使用例:
+    # 東進の保存済みページをURLごとに最新の1件ずつ再抽出
+    python manage.py reextract --provider toshin
+
+    # crawl_login_site（会員サイト）で保存した大学ページを再抽出
+    python manage.py reextract --provider toshin_login
+
+    # 抽出結果を確認するだけ（DBに保存しない）
+    python manage.py reextract --provider toshin --dry-run
+
+    # 指定日時以前に取得したページを対象にする
+    python manage.py reextract --provider toshin --as-of 2026-04-01
+
+    # URLで絞り込み、4プロセスで実行
+    python manage.py reextract --provider toshin --url-filter /university/0l/ --processes 4
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+# crawlersディレクトリをパスに追加
+CRAWLERS_DIR = os.path.join(settings.BASE_DIR, 'crawlers')
+if CRAWLERS_DIR not in sys.path:
+    sys.path.insert(0, CRAWLERS_DIR)
+
+try:
+    from page_store import PageStore
+    from toshin_crawler import ToshinExamCrawler, extract_stored_page as extract_toshin_page
+    from toshin_login_extractor import (
+        PAGE_STORE_PROVIDER as TOSHIN_LOGIN_PROVIDER, extract_stored_page as extract_toshin_login_page
+    )
+    CRAWLERS_AVAILABLE = True
+except ImportError as e:
+    CRAWLERS_AVAILABLE = False
+    IMPORT_ERROR = str(e)
+
+
+def toshin_saver():
+    crawler = ToshinExamCrawler(skip_unchanged=False, store_pages=False)
+    return crawler.save_exams_to_db
+
+
+def toshin_login_saver():
+    # 管理コマンドのモジュールは必要になるまで読み込まない
+    from exams.management.commands.crawl_login_site import ToshinLoginWriter
+    return ToshinLoginWriter().write_batch
+
+
+# 取得元 → (ワーカーで実行する抽出関数, 保存関数を返す関数)
+# 抽出関数はDBにアクセスせず、モジュールのトップレベルに定義されている必要がある（プロセス間で受け渡すため）
+EXTRACTORS = {
+    'toshin': (extract_toshin_page, toshin_saver),
+    TOSHIN_LOGIN_PROVIDER: (extract_toshin_login_page, toshin_login_saver),
+} if CRAWLERS_AVAILABLE else {}
+
+
+class Command(BaseCommand):
+    help = 'ページストアに保存したページから過去問データを再抽出します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--provider',
+            type=str,
+            required=True,
+            help='取得元（例: toshin）'
+        )
+
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='抽出に使うプロセス数（デフォルト: CPU数）'
+        )
+
+        parser.add_argument(
+            '--url-filter',
+            type=str,
+            help='URLの部分一致で対象を絞り込む'
+        )
+
+        parser.add_argument(
+            '--as-of',
+            type=str,
+            help='この日時以前に取得したページを対象にする（例: 2026-04-01 または "2026-04-01 12:00"）'
+        )
+
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='DRY RUNモード（抽出結果を表示するのみでデータベースに保存しない）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        if not CRAWLERS_AVAILABLE:
+            raise CommandError(f'クローラーモジュールが見つかりません: {IMPORT_ERROR}')
+
+        provider = options['provider']
+        if provider not in EXTRACTORS:
+            raise CommandError(f'未対応の取得元です: {provider}（対応: {", ".join(EXTRACTORS)}）')
+
+        extract, saver_factory = EXTRACTORS[provider]
+        store = PageStore(provider)
+        pages = list(store.latest(
+            as_of=self._parse_as_of(options['as_of']),
+            url_filter=options['url_filter']
+        ))
+
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        self.stdout.write(self.style.SUCCESS(f'再抽出: {provider}'))
+        self.stdout.write(self.style.SUCCESS('=' * 60))
+        self.stdout.write(f'対象ページ: {len(pages)}件')
+
+        if not pages:
+            return
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN モード: データベースには保存しません'))
+
+        tasks = [
+            {
+                'path': store.blob_path(page.content_hash),
+                'url': page.final_url or page.url,
+                'label': page.label,
+                'encoding': page.encoding,
+            }
+            for page in pages
+        ]
+
+        save = None if options['dry_run'] else saver_factory()
+        stats = {'pages': 0, 'exams': 0, 'saved': 0, 'errors': 0}
+        started = time.monotonic()
+
+        # 子プロセスにDB接続を引き継がない
+        connections.close_all()
+        processes = max(1, options['processes'])
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(extract, task) for task in tasks]
+
+            for page, future in zip(pages, futures):
+                try:
+                    exams_data = future.result()
+                except Exception as e:
+                    stats['errors'] += 1
+                    self.stdout.write(self.style.ERROR(f'✗ {page.label or page.url}: {e}'))
+                    continue
+
+                stats['pages'] += 1
+                stats['exams'] += len(exams_data)
+
+                if save is None:
+                    self.stdout.write(
+                        f'  {page.label or page.url}: {len(exams_data)}件 '
+                        f'({timezone.localtime(page.fetched_at):%Y-%m-%d %H:%M} 取得)'
+                    )
+                    continue
+
+                count = save(exams_data)
+                stats['saved'] += count
+                self.stdout.write(f'  ✓ {page.label or page.url}: {len(exams_data)}件抽出, {count}件保存')
+
+        elapsed = time.monotonic() - started
+
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(self.style.SUCCESS('実行結果'))
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'処理ページ数: {stats["pages"]} (エラー {stats["errors"]})')
+        self.stdout.write(f'抽出件数: {stats["exams"]}')
+        if save is not None:
+            self.stdout.write(f'保存件数: {stats["saved"]}')
+        self.stdout.write(f'処理時間: {elapsed:.1f}秒 ({processes}プロセス)')
+
+    def _parse_as_of(self, value):
+        """--as-of の値を日時に変換"""
+        if not value:
+            return None
+
+        for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%d'):
+            try:
+                parsed = datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            if fmt == '%Y-%m-%d':
+                # 日付のみの場合はその日の終わりまでを含める
+                parsed = parsed.replace(hour=23, minute=59, second=59)
+            return timezone.make_aware(parsed)
+
+        raise CommandError(f'日時の形式が正しくありません: {value}（例: 2026-04-01）')
@@ -38,8 +38,10 @@ try:
     from exam_crawler import UniversityExamCrawler, YobiSchoolAnswerCrawler
     from toshin_crawler import ToshinExamCrawler
     from crawler_utils import LinkValidator, DuplicateDetector, DataQualityReporter
+    from crawl_frontier import CrawlFrontierQueue
+    from crawler_metrics import export_metrics
     from crawler_config import (
-        CRAWLER_CONFIGS, TARGET_UNIVERSITIES, TARGET_YEARS, LOGGING_CONFIG
+        CRAWLER_CONFIGS, TARGET_UNIVERSITIES, TARGET_YEARS, LOGGING_CONFIG, METRICS_CONFIG
     )
     CRAWLERS_AVAILABLE = True
 except ImportError as e:
@@ -52,20 +54,25 @@ class CrawlerRunner:
     クローラーの実行を管理するクラス
     """
 
-    def __init__(self, command, dry_run=False):
+    def __init__(self, command, dry_run=False, full_refresh=False):
         """
         Args:
             command: Django管理コマンドのインスタンス
             dry_run (bool): Trueの場合、データベースに保存しない
+            full_refresh (bool): Trueの場合、変化のないページも再処理する
         """
         self.command = command
         self.dry_run = dry_run
+        self.full_refresh = full_refresh
         self.stats = {
             'start_time': datetime.now(),
             'universities_processed': 0,
             'exams_saved': 0,
             'answers_saved': 0,
             'errors': 0,
+            'pages_new': 0,
+            'pages_changed': 0,
+            'pages_unchanged': 0,
         }
 
     def log(self, message, level='info'):
@@ -95,26 +102,22 @@ class CrawlerRunner:
             self.log("東進クローラーは無効化されています", 'warning')
             return
 
-        crawler = ToshinExamCrawler(delay=config['delay'])
-
-        # 対象大学をフィルター
-        universities = TARGET_UNIVERSITIES
-        if university_filter:
-            universities = [
-                u for u in universities
-                if university_filter in u['name']
-            ]
+        crawler = ToshinExamCrawler(
+            delay=config['delay'],
+            skip_unchanged=not self.full_refresh
+        )
+        frontier = self._seed_frontier('toshin', config)
 
-        for univ_data in universities:
+        # 優先度順にリースして処理（中断後は未処理のURLから再開）
+        for entry in frontier.iter_leased(label_filter=university_filter):
             try:
-                self.log(f"\n処理中: {univ_data['name']}")
+                self.log(f"\n処理中: {entry.label} (優先度 {entry.priority})")
                 self.stats['universities_processed'] += 1
 
                 # 過去問データを取得
-                exam_url = f"{config['base_url']}/university/{univ_data['name']}"
                 exams_data = crawler.crawl_university_exams(
-                    exam_url,
-                    univ_data['name']
+                    entry.url,
+                    entry.label
                 )
 
                 # データベースに保存（DRY RUNでない場合のみ）
@@ -122,12 +125,46 @@ class CrawlerRunner:
                     count = crawler.save_exams_to_db(exams_data)
                     self.stats['exams_saved'] += count
                     self.log(f"✓ {count}件の過去問を保存", 'success')
+                    frontier.complete(entry)
                 else:
                     self.log(f"[DRY RUN] {len(exams_data)}件の過去問を取得", 'warning')
+                    crawler.fingerprints.discard()
+                    frontier.release(entry)
 
             except Exception as e:
-                self.log(f"✗ Error processing {univ_data['name']}: {e}", 'error')
+                self.log(f"✗ Error processing {entry.label}: {e}", 'error')
                 self.stats['errors'] += 1
+                crawler.fingerprints.discard()
+                frontier.fail(entry, e)
+
+        self.log(f"フロンティア状態: {frontier.stats()}")
+
+        # ページ指紋による判定結果（新規・変更・変化なし）
+        for status, count in crawler.fingerprints.summary().items():
+            self.stats[f'pages_{status}'] += count
+
+    def _seed_frontier(self, crawler_id, config):
+        """
+        TARGET_UNIVERSITIESをクロールフロンティアに登録
+
+        Args:
+            crawler_id (str): CRAWLER_CONFIGSのキー
+            config (dict): クローラー設定
+
+        Returns:
+            CrawlFrontierQueue: 登録済みのフロンティア
+        """
+        frontier = CrawlFrontierQueue(crawler_id)
+        frontier.start_cycle()
+        frontier.seed(
+            {
+                'url': f"{config['base_url']}/university/{univ_data['name']}",
+                'label': univ_data['name'],
+                'priority': univ_data.get('priority', 5),
+            }
+            for univ_data in TARGET_UNIVERSITIES
+        )
+        return frontier
 
     def run_all_crawlers(self, university_filter=None):
         """
@@ -167,7 +204,8 @@ class CrawlerRunner:
         exam_result = validator.validate_exams()
         self.log(
             f"結果: {exam_result['valid']}件有効, "
-            f"{exam_result['invalid']}件無効",
+            f"{exam_result['invalid']}件無効, "
+            f"{exam_result['skipped']}件未確認",
             'success'
         )
 
@@ -176,7 +214,8 @@ class CrawlerRunner:
         answer_result = validator.validate_answer_sources()
         self.log(
             f"結果: {answer_result['active']}件有効, "
-            f"{answer_result['inactive']}件無効",
+            f"{answer_result['inactive']}件無効, "
+            f"{answer_result['skipped']}件未確認",
             'success'
         )
 
@@ -204,52 +243,13 @@ class CrawlerRunner:
         self.command.stdout.write("=" * 80)
 
         reporter = DataQualityReporter()
-        report = reporter.generate_report()
-
-        # レポートを手動で出力
-        self.command.stdout.write("\n" + "=" * 80)
-        self.command.stdout.write("データ品質レポート")
-        self.command.stdout.write("=" * 80)
-        self.command.stdout.write(f"生成日時: {report['timestamp']}")
-        self.command.stdout.write("")
+        # 前回のスナップショットと比較して増減を表示
+        previous = reporter.latest_snapshot()
+        report = reporter.generate_report(save=not self.dry_run)
 
-        self.command.stdout.write("【大学】")
-        self.command.stdout.write(f"  総数: {report['universities']['total']}")
-        self.command.stdout.write(f"  過去問あり: {report['universities']['with_exams']}")
         self.command.stdout.write("")
-
-        self.command.stdout.write("【過去問】")
-        self.command.stdout.write(f"  総数: {report['exams']['total']}")
-        self.command.stdout.write(f"  検証済み: {report['exams']['verified']}")
-        self.command.stdout.write(f"  PDF有り: {report['exams']['with_pdf']}")
-        self.command.stdout.write(f"  解答有り: {report['exams']['with_answers']}")
-        self.command.stdout.write("")
-
-        if report['exams']['by_year']:
-            self.command.stdout.write("  年度別:")
-            for year, count in sorted(report['exams']['by_year'].items()):
-                self.command.stdout.write(f"    {year}年: {count}件")
-            self.command.stdout.write("")
-
-        if report['exams']['by_subject']:
-            self.command.stdout.write("  科目別:")
-            for subject, count in sorted(report['exams']['by_subject'].items()):
-                self.command.stdout.write(f"    {subject}: {count}件")
-            self.command.stdout.write("")
-
-        self.command.stdout.write("【解答ソース】")
-        self.command.stdout.write(f"  総数: {report['answer_sources']['total']}")
-        self.command.stdout.write(f"  有効: {report['answer_sources']['active']}")
-        self.command.stdout.write(f"  詳細解説あり: {report['answer_sources']['with_detailed_explanation']}")
-        self.command.stdout.write(f"  動画解説あり: {report['answer_sources']['with_video']}")
-        self.command.stdout.write("")
-
-        if report['answer_sources']['by_provider']:
-            self.command.stdout.write("  予備校別:")
-            for provider, count in sorted(report['answer_sources']['by_provider'].items()):
-                self.command.stdout.write(f"    {provider}: {count}件")
-
-        self.command.stdout.write("=" * 80)
+        for line in reporter.format_report(report, previous):
+            self.command.stdout.write(line)
 
     def print_stats(self):
         """
@@ -265,9 +265,26 @@ class CrawlerRunner:
         self.command.stdout.write(f"処理大学数: {self.stats['universities_processed']}")
         self.command.stdout.write(f"保存過去問数: {self.stats['exams_saved']}")
         self.command.stdout.write(f"保存解答数: {self.stats['answers_saved']}")
+        self.command.stdout.write(f"ページ: 新規 {self.stats['pages_new']} / 変更 {self.stats['pages_changed']} / 変化なし {self.stats['pages_unchanged']}")
         self.command.stdout.write(f"エラー数: {self.stats['errors']}")
         self.command.stdout.write("=" * 80)
 
+        self.write_metrics()
+
+    def write_metrics(self):
+        """
+        メトリクスを書き出し、ホスト・処理段階ごとの所要時間を表示
+        """
+        summary = export_metrics()
+
+        for histogram in summary['histograms']:
+            labels = histogram['labels']
+            self.command.stdout.write(
+                f"{labels.get('host')} {labels.get('stage')}: "
+                f"{histogram['count']}回 平均 {histogram['avg']}秒 p95 {histogram['p95']}秒"
+            )
+        self.command.stdout.write(f"メトリクス出力: {METRICS_CONFIG['json_file']} {METRICS_CONFIG['prometheus_file']}")
+
 
 class Command(BaseCommand):
     help = '過去問クローラーを実行します'
@@ -298,6 +315,12 @@ class Command(BaseCommand):
             help='DRY RUNモード（データベースに保存しない）'
         )
 
+        parser.add_argument(
+            '--full-refresh',
+            action='store_true',
+            help='前回から変化のないページも再パース・再保存する'
+        )
+
         parser.add_argument(
             '--validate-links',
             action='store_true',
@@ -321,17 +344,17 @@ class Command(BaseCommand):
 
         # クローラーモジュールが利用可能か確認
         if not CRAWLERS_AVAILABLE:
-            self.command.stdout.write(self.style.ERROR('=' * 80))
-            self.command.stdout.write(self.style.ERROR('クローラーモジュールのインポートエラー'))
-            self.command.stdout.write(self.style.ERROR('=' * 80))
-            self.command.stdout.write(self.style.ERROR(f'\nエラー詳細: {IMPORT_ERROR}'))
-            self.command.stdout.write(self.style.WARNING('\n必要なファイルが見つかりません。以下を確認してください:'))
-            self.command.stdout.write('  - crawlers/exam_crawler.py')
-            self.command.stdout.write('  - crawlers/toshin_crawler.py')
-            self.command.stdout.write('  - crawlers/crawler_utils.py')
-            self.command.stdout.write('  - crawlers/crawler_config.py')
-            self.command.stdout.write(self.style.WARNING('\n代わりに以下のコマンドを使用できます:'))
-            self.command.stdout.write('  python manage.py crawl_exam_data')
+            self.stdout.write(self.style.ERROR('=' * 80))
+            self.stdout.write(self.style.ERROR('クローラーモジュールのインポートエラー'))
+            self.stdout.write(self.style.ERROR('=' * 80))
+            self.stdout.write(self.style.ERROR(f'\nエラー詳細: {IMPORT_ERROR}'))
+            self.stdout.write(self.style.WARNING('\n必要なファイルが見つかりません。以下を確認してください:'))
+            self.stdout.write('  - crawlers/exam_crawler.py')
+            self.stdout.write('  - crawlers/toshin_crawler.py')
+            self.stdout.write('  - crawlers/crawler_utils.py')
+            self.stdout.write('  - crawlers/crawler_config.py')
+            self.stdout.write(self.style.WARNING('\n代わりに以下のコマンドを使用できます:'))
+            self.stdout.write('  python manage.py crawl_exam_data')
             raise CommandError('クローラーモジュールが見つかりません')
 
         # 引数チェック
@@ -357,7 +380,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('DRY RUN モード: データベースには保存しません\n'))
 
         # クローラー実行
-        runner = CrawlerRunner(command=self, dry_run=dry_run)
+        runner = CrawlerRunner(command=self, dry_run=dry_run, full_refresh=options.get('full_refresh'))
 
         try:
             if options['all']:
@@ -0,0 +1,146 @@
+"""
+Django管理コマンド: メンテナンスタスクの連続実行
+
+インポート・表記の統一・重複の統合・クロールなどの管理コマンドを、
+1つのプロセス内で順に実行します。Djangoの起動はタスクの数によらず1回です。
+
+タスクは「+」で区切り、各タスクの後ろにそのコマンドの引数を書きます。
+各コマンドのモジュール（requests・BeautifulSoup・Playwright を使うクローラーなど）は
+そのタスクを実行するときに初めて読み込まれるため、--list や軽いタスクはすぐに終わります。
+
+使用例:
+    # 実行できるタスクの一覧
+    python manage.py run_tasks --list
+
+    # 河合塾のデータを登録し、表記をそろえてから重複を統合
+    python manage.py run_tasks import_kawai_data outputs/pdf_links.csv + unify_exam_types + merge_duplicate_exams
+
+    # 失敗したタスクがあっても残りを実行
+    python manage.py run_tasks --keep-going run_crawler --validate-links + run_crawler --report
+
+    # 各タスクのオプションは個別のコマンドと同じ
+    python manage.py import_kawai_data --help
+"""
+
+import argparse
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+# 実行できるタスク（管理コマンド名 → 説明）
+# ここに書いたコマンドのモジュールは、実行するまで読み込まない
+TASKS = {
+    'import_kawai_data': '河合塾の解答速報PDFリンク（CSV）を登録',
+    'import_pastpaper_results': '公式HPの過去問掲載状況（CSV）を登録',
+    'check_official_pastpapers': '大学公式サイトの過去問掲載状況をチェック',
+    'unify_exam_types': '試験種別・学部の表記を統一',
+    'merge_duplicate_exams': '重複する過去問を統合',
+    'backfill_name_kana': '学校名のかな表記を生成',
+    'run_crawler': 'クローラー実行・リンク検証・重複削除・品質レポート',
+    'reextract': '保存済みページから再抽出',
+}
+
+TASK_SEPARATOR = '+'
+
+
+def parse_tasks(tokens):
+    """
+    引数を「+」で区切ってタスクのリストにする
+
+    Args:
+        tokens (list): コマンドラインの引数
+
+    Returns:
+        list: (コマンド名, 引数のリスト) のリスト
+    """
+    tasks = []
+    current = []
+    for token in list(tokens) + [TASK_SEPARATOR]:
+        if token != TASK_SEPARATOR:
+            current.append(token)
+            continue
+        if not current:
+            raise CommandError(f'空のタスクがあります（「{TASK_SEPARATOR}」の前後を確認してください）')
+        tasks.append((current[0], current[1:]))
+        current = []
+    return tasks
+
+
+class Command(BaseCommand):
+    help = 'メンテナンスタスクを1つのプロセス内で順に実行します（タスクは「+」で区切る）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='実行できるタスクの一覧を表示'
+        )
+
+        parser.add_argument(
+            '--keep-going',
+            action='store_true',
+            help='タスクが失敗しても残りのタスクを実行する'
+        )
+
+        parser.add_argument(
+            'tasks',
+            nargs=argparse.REMAINDER,
+            help='タスクと引数（例: unify_exam_types + merge_duplicate_exams --dry-run）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        if options['list'] or not options['tasks']:
+            self.print_tasks()
+            return
+
+        tasks = parse_tasks(options['tasks'])
+
+        # 途中で止まらないよう、実行前にすべてのタスク名を確認する
+        unknown = [name for name, _ in tasks if name not in TASKS]
+        if unknown:
+            raise CommandError(
+                f"不明なタスク: {', '.join(unknown)}（一覧: python manage.py run_tasks --list）"
+            )
+
+        results = []
+        for i, (name, task_args) in enumerate(tasks, 1):
+            label = ' '.join([name] + task_args)
+            self.stdout.write(self.style.SUCCESS(f'\n[{i}/{len(tasks)}] {label}'))
+
+            started = time.monotonic()
+            try:
+                call_command(name, *task_args, stdout=self.stdout, stderr=self.stderr)
+            except CommandError as e:
+                results.append((label, False, time.monotonic() - started))
+                self.stderr.write(self.style.ERROR(f'✗ {name} が失敗しました: {e}'))
+                if not options['keep_going']:
+                    break
+            else:
+                results.append((label, True, time.monotonic() - started))
+
+        self.print_summary(results, len(tasks))
+
+        failed = [label for label, ok, _ in results if not ok]
+        if failed:
+            raise CommandError(f'{len(failed)}件のタスクが失敗しました')
+
+    def print_tasks(self):
+        """実行できるタスクの一覧を表示"""
+        self.stdout.write('実行できるタスク:')
+        for name, description in TASKS.items():
+            self.stdout.write(f'  {name:28s} {description}')
+        self.stdout.write(f'\nタスクは「{TASK_SEPARATOR}」で区切って続けて実行できます')
+
+    def print_summary(self, results, total):
+        """タスクごとの結果と処理時間を表示"""
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write('実行結果')
+        self.stdout.write('=' * 60)
+        for label, ok, elapsed in results:
+            mark = self.style.SUCCESS('✓') if ok else self.style.ERROR('✗')
+            self.stdout.write(f'{mark} {label} ({elapsed:.1f}秒)')
+        if len(results) < total:
+            self.stdout.write(self.style.WARNING(f'未実行: {total - len(results)}件'))
@@ -0,0 +1,101 @@
+"""
+Django管理コマンド: 試験種別・学部の表記の統一
+
+取り込み時と同じ規則（exams.canonical）で既存データを正規化します。
+「一般入試（前期）」「一般入試前期」「general」などは「一般入試」に統一されます。
+登録済みの表記ごとに正規の表記を求め、異なる表記ごとに1回の UPDATE で更新します。
+
+表記をそろえた結果、同じキーの過去問が複数になる場合があるため、
+更新後は merge_duplicate_exams で統合してください。
+
+使用例:
+    # 表記を統一し、重複を統合
+    python manage.py run_tasks unify_exam_types + merge_duplicate_exams
+
+    # 更新内容を表示するのみ
+    python manage.py unify_exam_types --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from exams.canonical import canonicalize
+from exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = '試験種別・学部の表記を統一します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='DRY RUNモード（更新内容を表示するのみでデータベースは変更しない）'
+        )
+
+    def handle(self, *args, **options):
+        """管理コマンドのメイン処理"""
+
+        dry_run = options['dry_run']
+
+        self.stdout.write('=' * 80)
+        self.stdout.write('試験種別・学部の表記を統一します...')
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN モード: データベースは変更しません'))
+        self.stdout.write('=' * 80)
+
+        with transaction.atomic():
+            self.stdout.write('\n--- 試験種別 ---')
+            exam_type_updated = self.unify_field('exam_type', 'exam_type', dry_run)
+            self.stdout.write('\n--- 学部 ---')
+            department_updated = self.unify_field('department', 'department', dry_run)
+
+        total_updated = exam_type_updated + department_updated
+
+        self.stdout.write('\n' + '=' * 80)
+        self.stdout.write(
+            f"{'更新予定' if dry_run else '統一完了'}: {total_updated}件"
+            f"（試験種別 {exam_type_updated}件, 学部 {department_updated}件）"
+        )
+        self.stdout.write('=' * 80)
+
+        if total_updated and not dry_run:
+            self.stdout.write(self.style.WARNING(
+                '\n※ 重複した過去問は merge_duplicate_exams で統合してください'
+            ))
+
+        # 統計を表示
+        self.stdout.write(f"\n=== {'現在' if dry_run else '更新後'}の試験種別 ===")
+        exam_types = Exam.objects.values('exam_type').annotate(count=Count('id')).order_by('-count')
+
+        for et in exam_types:
+            self.stdout.write(f"  {et['exam_type']:30s}: {et['count']}件")
+
+    def unify_field(self, field, kind, dry_run=False):
+        """
+        1つのフィールドの表記を統一
+
+        Args:
+            field (str): Examのフィールド名
+            kind (str): canonicalize の種別
+            dry_run (bool): Trueなら更新しない
+
+        Returns:
+            int: 更新件数（DRY RUNでは予定件数）
+        """
+        total_updated = 0
+        values = Exam.objects.values(field).annotate(count=Count('id')).order_by(field)
+
+        for row in values:
+            old_value = row[field]
+            new_value = canonicalize(kind, old_value)
+            if new_value == old_value:
+                continue
+
+            if not dry_run:
+                Exam.objects.filter(**{field: old_value}).update(**{field: new_value})
+            self.stdout.write(f"✓ '{old_value}' → '{new_value}': {row['count']}件")
+            total_updated += row['count']
+
+        return total_updated
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:28
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0006_alter_university_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlFrontier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crawler', models.CharField(help_text='CRAWLER_CONFIGSのキー（例: toshin）', max_length=50, verbose_name='クローラー')),
+                ('url', models.URLField(max_length=500, verbose_name='URL')),
+                ('host', models.CharField(max_length=200, verbose_name='ホスト')),
+                ('label', models.CharField(blank=True, help_text='大学名など、URLの対象を表す名前', max_length=200, verbose_name='ラベル')),
+                ('priority', models.IntegerField(default=5, help_text='小さいほど優先（TARGET_UNIVERSITIESのpriority）', verbose_name='優先度')),
+                ('state', models.CharField(choices=[('pending', '待機中'), ('leased', '処理中'), ('done', '完了'), ('failed', '失敗')], default='pending', max_length=20, verbose_name='状態')),
+                ('attempts', models.IntegerField(default=0, verbose_name='試行回数')),
+                ('next_eligible_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='次回実行可能日時')),
+                ('leased_by', models.CharField(blank=True, max_length=100, verbose_name='処理中のワーカー')),
+                ('leased_until', models.DateTimeField(blank=True, help_text='期限を過ぎたリースは他のワーカーが再取得できる', null=True, verbose_name='リース期限')),
+                ('last_crawled_at', models.DateTimeField(blank=True, null=True, verbose_name='最終クロール日時')),
+                ('last_error', models.TextField(blank=True, verbose_name='最終エラー')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='登録日時')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+            ],
+            options={
+                'verbose_name': 'クロール対象URL',
+                'verbose_name_plural': 'クロール対象URL一覧',
+                'ordering': ['priority', 'next_eligible_at'],
+                'indexes': [models.Index(fields=['crawler', 'state', 'priority', 'next_eligible_at'], name='exams_frontier_lease_idx')],
+                'unique_together': {('crawler', 'url')},
+            },
+        ),
+    ]
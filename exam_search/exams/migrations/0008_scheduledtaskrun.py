@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0007_crawlfrontier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledTaskRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schedule', models.CharField(help_text='SCHEDULE_CONFIGのキー（daily / weekly / monthly）', max_length=20, verbose_name='スケジュール')),
+                ('task', models.CharField(help_text='例: full_crawl, validate_links', max_length=50, verbose_name='タスク')),
+                ('scheduled_for', models.DateTimeField(help_text='このタスクが実行されるべきだった日時', verbose_name='予定日時')),
+                ('status', models.CharField(choices=[('running', '実行中'), ('success', '成功'), ('failed', '失敗'), ('skipped', 'スキップ')], default='running', max_length=20, verbose_name='結果')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='開始日時')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='終了日時')),
+                ('duration_seconds', models.FloatField(blank=True, null=True, verbose_name='実行時間（秒）')),
+                ('error', models.TextField(blank=True, verbose_name='エラー')),
+            ],
+            options={
+                'verbose_name': 'スケジュール実行履歴',
+                'verbose_name_plural': 'スケジュール実行履歴一覧',
+                'ordering': ['-scheduled_for', 'schedule', 'task'],
+                'unique_together': {('schedule', 'task', 'scheduled_for')},
+            },
+        ),
+    ]
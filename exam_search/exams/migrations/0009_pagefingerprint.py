@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0008_scheduledtaskrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crawler', models.CharField(help_text='CRAWLER_CONFIGSのキー（例: toshin）', max_length=50, verbose_name='クローラー')),
+                ('url', models.URLField(max_length=500, verbose_name='URL')),
+                ('content_hash', models.CharField(help_text='スクリプト・コメント等を除いて正規化したHTMLのSHA-256', max_length=64, verbose_name='ページのハッシュ')),
+                ('records_hash', models.CharField(blank=True, help_text='ページから抽出したレコード集合のSHA-256', max_length=64, verbose_name='抽出結果のハッシュ')),
+                ('record_count', models.IntegerField(default=0, verbose_name='抽出件数')),
+                ('last_checked_at', models.DateTimeField(verbose_name='最終確認日時')),
+                ('last_changed_at', models.DateTimeField(help_text='抽出結果が最後に変化した日時', verbose_name='最終変更日時')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='登録日時')),
+            ],
+            options={
+                'verbose_name': 'ページ指紋',
+                'verbose_name_plural': 'ページ指紋一覧',
+                'ordering': ['crawler', 'url'],
+                'unique_together': {('crawler', 'url')},
+            },
+        ),
+    ]
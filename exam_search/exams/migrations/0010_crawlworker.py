@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0009_pagefingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlWorker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker_id', models.CharField(help_text='ホスト名:プロセスID', max_length=100, unique=True, verbose_name='ワーカーID')),
+                ('crawlers', models.CharField(blank=True, help_text='カンマ区切り（例: toshin,link_check）', max_length=200, verbose_name='担当クローラー')),
+                ('status', models.CharField(choices=[('running', '実行中'), ('stopped', '停止'), ('dead', '応答なし')], default='running', max_length=20, verbose_name='状態')),
+                ('jobs_done', models.IntegerField(default=0, verbose_name='完了ジョブ数')),
+                ('jobs_failed', models.IntegerField(default=0, verbose_name='失敗ジョブ数')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='開始日時')),
+                ('last_heartbeat_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='最終ハートビート')),
+                ('stopped_at', models.DateTimeField(blank=True, null=True, verbose_name='停止日時')),
+            ],
+            options={
+                'verbose_name': 'クロールワーカー',
+                'verbose_name_plural': 'クロールワーカー一覧',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0010_crawlworker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(help_text='CRAWLER_CONFIGSのキー（例: toshin）', max_length=50, verbose_name='取得元')),
+                ('url', models.URLField(max_length=500, verbose_name='URL')),
+                ('final_url', models.URLField(blank=True, help_text='リダイレクト後のURL（相対リンクの解決に使う）', max_length=500, verbose_name='最終URL')),
+                ('label', models.CharField(blank=True, help_text='再抽出時に使う情報（例: 大学名）', max_length=200, verbose_name='ラベル')),
+                ('content_hash', models.CharField(db_index=True, help_text='本文のSHA-256（ページストア内のファイル名）', max_length=64, verbose_name='本文のハッシュ')),
+                ('encoding', models.CharField(blank=True, help_text='HTTPヘッダーで指定された文字コード（未指定なら空）', max_length=30, verbose_name='文字コード')),
+                ('status_code', models.IntegerField(default=200, verbose_name='ステータスコード')),
+                ('size', models.IntegerField(default=0, verbose_name='サイズ（バイト）')),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='取得日時')),
+            ],
+            options={
+                'verbose_name': '保存ページ',
+                'verbose_name_plural': '保存ページ一覧',
+                'ordering': ['-fetched_at'],
+                'indexes': [models.Index(fields=['provider', 'url', '-fetched_at'], name='exams_store_provide_1add6d_idx')],
+            },
+        ),
+    ]
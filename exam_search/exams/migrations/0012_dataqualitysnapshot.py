@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:58
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0011_storedpage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataQualitySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generated_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='生成日時')),
+                ('report', models.JSONField(help_text='DataQualityReporter.generate_report() の結果', verbose_name='レポート')),
+            ],
+            options={
+                'verbose_name': 'データ品質レポート',
+                'verbose_name_plural': 'データ品質レポート一覧',
+                'ordering': ['-generated_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0012_dataqualitysnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UniversityAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias_type', models.CharField(choices=[('name', '学校名'), ('kana', 'かな表記'), ('code', '大学コード'), ('domain', 'ドメイン')], max_length=20, verbose_name='種別')),
+                ('provider', models.CharField(blank=True, help_text='大学コードの提供元（例: kawai）。コード以外は空欄', max_length=50, verbose_name='提供元')),
+                ('value', models.CharField(help_text='例: 東京工業大学, gk1, titech.ac.jp', max_length=200, verbose_name='値')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='登録日時')),
+                ('university', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='exams.university', verbose_name='学校')),
+            ],
+            options={
+                'verbose_name': '学校の別名',
+                'verbose_name_plural': '学校の別名一覧',
+                'ordering': ['university', 'alias_type', 'value'],
+                'unique_together': {('alias_type', 'provider', 'value')},
+            },
+        ),
+    ]
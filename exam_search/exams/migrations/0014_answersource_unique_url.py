@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:36
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def delete_duplicate_answer_sources(apps, schema_editor):
+    # 一意制約を追加する前に、同じ過去問・解答URLの解答ソースを最も古い1件に絞る
+    AnswerSource = apps.get_model('exams', 'AnswerSource')
+    duplicates = (
+        AnswerSource.objects.order_by()
+        .values('exam_id', 'answer_url')
+        .annotate(keep_id=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicates:
+        AnswerSource.objects.filter(
+            exam_id=row['exam_id'], answer_url=row['answer_url']
+        ).exclude(id=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0013_universityalias'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_answer_sources, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='answersource',
+            unique_together={('exam', 'answer_url')},
+        ),
+    ]
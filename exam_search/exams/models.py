@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models.signals import pre_save
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
+
+from exams.kana import fill_name_kana
 
 
 class University(models.Model):
@@ -76,6 +80,10 @@ class University(models.Model):
         return reverse('exams:university_detail', kwargs={'pk': self.pk})
 
 
+# かな表記が空のまま保存された学校（クローラーで登録した学校など）に自動で設定
+pre_save.connect(fill_name_kana, sender=University, dispatch_uid='university_fill_name_kana')
+
+
 class Exam(models.Model):
     """
     過去問情報を管理するモデル
@@ -228,6 +236,8 @@ class AnswerSource(models.Model):
     class Meta:
         verbose_name = "解答ソース"
         verbose_name_plural = "解答ソース一覧"
+        # 同じ過去問に同じ解答URLを重複して登録しない（bulk_create の ignore_conflicts で既存分を無視できる）
+        unique_together = ['exam', 'answer_url']
         ordering = ['-reliability_score', 'provider_name']
 
     def __str__(self):
@@ -301,3 +311,399 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.exam}"
+
+
+class CrawlFrontier(models.Model):
+    """
+    クロール対象URLの待ち行列（フロンティア）
+    プロセスが途中で停止しても、未処理のURLから再開できるようにDBに保持する
+    """
+    STATE_CHOICES = [
+        ('pending', '待機中'),
+        ('leased', '処理中'),
+        ('done', '完了'),
+        ('failed', '失敗'),
+    ]
+
+    crawler = models.CharField(
+        max_length=50,
+        verbose_name="クローラー",
+        help_text="CRAWLER_CONFIGSのキー（例: toshin）"
+    )
+    url = models.URLField(
+        max_length=500,
+        verbose_name="URL"
+    )
+    host = models.CharField(
+        max_length=200,
+        verbose_name="ホスト"
+    )
+    label = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="ラベル",
+        help_text="大学名など、URLの対象を表す名前"
+    )
+    priority = models.IntegerField(
+        default=5,
+        verbose_name="優先度",
+        help_text="小さいほど優先（TARGET_UNIVERSITIESのpriority）"
+    )
+    state = models.CharField(
+        max_length=20,
+        choices=STATE_CHOICES,
+        default='pending',
+        verbose_name="状態"
+    )
+    attempts = models.IntegerField(
+        default=0,
+        verbose_name="試行回数"
+    )
+    next_eligible_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="次回実行可能日時"
+    )
+    leased_by = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="処理中のワーカー"
+    )
+    leased_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="リース期限",
+        help_text="期限を過ぎたリースは他のワーカーが再取得できる"
+    )
+    last_crawled_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="最終クロール日時"
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name="最終エラー"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="登録日時")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新日時")
+
+    class Meta:
+        verbose_name = "クロール対象URL"
+        verbose_name_plural = "クロール対象URL一覧"
+        unique_together = ['crawler', 'url']
+        ordering = ['priority', 'next_eligible_at']
+        indexes = [
+            models.Index(
+                fields=['crawler', 'state', 'priority', 'next_eligible_at'],
+                name='exams_frontier_lease_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"[{self.crawler}] {self.label or self.url} ({self.get_state_display()})"
+
+
+class ScheduledTaskRun(models.Model):
+    """
+    スケジューラー（crawl_scheduler）が実行したタスクの記録
+    SCHEDULE_CONFIGの各実行枠ごとに1件作成し、二重実行と実行漏れの検出に使う
+    """
+    STATUS_CHOICES = [
+        ('running', '実行中'),
+        ('success', '成功'),
+        ('failed', '失敗'),
+        ('skipped', 'スキップ'),
+    ]
+
+    schedule = models.CharField(
+        max_length=20,
+        verbose_name="スケジュール",
+        help_text="SCHEDULE_CONFIGのキー（daily / weekly / monthly）"
+    )
+    task = models.CharField(
+        max_length=50,
+        verbose_name="タスク",
+        help_text="例: full_crawl, validate_links"
+    )
+    scheduled_for = models.DateTimeField(
+        verbose_name="予定日時",
+        help_text="このタスクが実行されるべきだった日時"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='running',
+        verbose_name="結果"
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="開始日時"
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="終了日時"
+    )
+    duration_seconds = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="実行時間（秒）"
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="エラー"
+    )
+
+    class Meta:
+        verbose_name = "スケジュール実行履歴"
+        verbose_name_plural = "スケジュール実行履歴一覧"
+        unique_together = ['schedule', 'task', 'scheduled_for']
+        ordering = ['-scheduled_for', 'schedule', 'task']
+
+    def __str__(self):
+        return f"{self.schedule}/{self.task} {self.scheduled_for} ({self.get_status_display()})"
+
+
+class PageFingerprint(models.Model):
+    """
+    クロールしたページの指紋（正規化したHTMLと抽出結果のハッシュ）
+    前回から変化のないページは、パースとDB書き込みを省略するために使う
+    """
+    crawler = models.CharField(
+        max_length=50,
+        verbose_name="クローラー",
+        help_text="CRAWLER_CONFIGSのキー（例: toshin）"
+    )
+    url = models.URLField(
+        max_length=500,
+        verbose_name="URL"
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        verbose_name="ページのハッシュ",
+        help_text="スクリプト・コメント等を除いて正規化したHTMLのSHA-256"
+    )
+    records_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name="抽出結果のハッシュ",
+        help_text="ページから抽出したレコード集合のSHA-256"
+    )
+    record_count = models.IntegerField(
+        default=0,
+        verbose_name="抽出件数"
+    )
+    last_checked_at = models.DateTimeField(
+        verbose_name="最終確認日時"
+    )
+    last_changed_at = models.DateTimeField(
+        verbose_name="最終変更日時",
+        help_text="抽出結果が最後に変化した日時"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="登録日時")
+
+    class Meta:
+        verbose_name = "ページ指紋"
+        verbose_name_plural = "ページ指紋一覧"
+        unique_together = ['crawler', 'url']
+        ordering = ['crawler', 'url']
+
+    def __str__(self):
+        return f"[{self.crawler}] {self.url}"
+
+
+class CrawlWorker(models.Model):
+    """
+    クロールワーカー（crawl_worker が起動するプロセス）の生存確認
+    ハートビートが途絶えたワーカーのリースは他のワーカーが再取得する
+    """
+    STATUS_CHOICES = [
+        ('running', '実行中'),
+        ('stopped', '停止'),
+        ('dead', '応答なし'),
+    ]
+
+    worker_id = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="ワーカーID",
+        help_text="ホスト名:プロセスID"
+    )
+    crawlers = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="担当クローラー",
+        help_text="カンマ区切り（例: toshin,link_check）"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='running',
+        verbose_name="状態"
+    )
+    jobs_done = models.IntegerField(
+        default=0,
+        verbose_name="完了ジョブ数"
+    )
+    jobs_failed = models.IntegerField(
+        default=0,
+        verbose_name="失敗ジョブ数"
+    )
+    started_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="開始日時"
+    )
+    last_heartbeat_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="最終ハートビート"
+    )
+    stopped_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="停止日時"
+    )
+
+    class Meta:
+        verbose_name = "クロールワーカー"
+        verbose_name_plural = "クロールワーカー一覧"
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.worker_id} ({self.get_status_display()})"
+
+
+class StoredPage(models.Model):
+    """
+    取得したページの保存記録（本文は圧縮してページストアに内容アドレスで保存）
+    セレクターや科目判定を修正した際に、再クロールせずに再抽出するために使う
+    """
+    provider = models.CharField(
+        max_length=50,
+        verbose_name="取得元",
+        help_text="CRAWLER_CONFIGSのキー（例: toshin）"
+    )
+    url = models.URLField(
+        max_length=500,
+        verbose_name="URL"
+    )
+    final_url = models.URLField(
+        max_length=500,
+        blank=True,
+        verbose_name="最終URL",
+        help_text="リダイレクト後のURL（相対リンクの解決に使う）"
+    )
+    label = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="ラベル",
+        help_text="再抽出時に使う情報（例: 大学名）"
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        db_index=True,
+        verbose_name="本文のハッシュ",
+        help_text="本文のSHA-256（ページストア内のファイル名）"
+    )
+    encoding = models.CharField(
+        max_length=30,
+        blank=True,
+        verbose_name="文字コード",
+        help_text="HTTPヘッダーで指定された文字コード（未指定なら空）"
+    )
+    status_code = models.IntegerField(
+        default=200,
+        verbose_name="ステータスコード"
+    )
+    size = models.IntegerField(
+        default=0,
+        verbose_name="サイズ（バイト）"
+    )
+    fetched_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="取得日時"
+    )
+
+    class Meta:
+        verbose_name = "保存ページ"
+        verbose_name_plural = "保存ページ一覧"
+        ordering = ['-fetched_at']
+        indexes = [
+            models.Index(fields=['provider', 'url', '-fetched_at']),
+        ]
+
+    def __str__(self):
+        return f"[{self.provider}] {self.url} ({self.fetched_at:%Y-%m-%d %H:%M})"
+
+
+class DataQualitySnapshot(models.Model):
+    """
+    データ品質レポートのスナップショット
+    生成したレポートをJSONで保存し、再集計せずに過去のレポートと比較するために使う
+    """
+    generated_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name="生成日時"
+    )
+    report = models.JSONField(
+        verbose_name="レポート",
+        help_text="DataQualityReporter.generate_report() の結果"
+    )
+
+    class Meta:
+        verbose_name = "データ品質レポート"
+        verbose_name_plural = "データ品質レポート一覧"
+        ordering = ['-generated_at']
+
+    def __str__(self):
+        return f"データ品質レポート ({self.generated_at:%Y-%m-%d %H:%M})"
+
+
+class UniversityAlias(models.Model):
+    """
+    学校の別名（旧名称・かな表記・予備校の大学コード・公式サイトのドメイン）
+    統合・改称した学校や、予備校ごとのコードを同じ University に解決するために使う
+    （exams.university_index.UniversityIndex を参照）
+    """
+    ALIAS_TYPE_CHOICES = [
+        ('name', '学校名'),
+        ('kana', 'かな表記'),
+        ('code', '大学コード'),
+        ('domain', 'ドメイン'),
+    ]
+
+    university = models.ForeignKey(
+        University,
+        on_delete=models.CASCADE,
+        related_name='aliases',
+        verbose_name="学校"
+    )
+    alias_type = models.CharField(
+        max_length=20,
+        choices=ALIAS_TYPE_CHOICES,
+        verbose_name="種別"
+    )
+    provider = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name="提供元",
+        help_text="大学コードの提供元（例: kawai）。コード以外は空欄"
+    )
+    value = models.CharField(
+        max_length=200,
+        verbose_name="値",
+        help_text="例: 東京工業大学, gk1, titech.ac.jp"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="登録日時")
+
+    class Meta:
+        verbose_name = "学校の別名"
+        verbose_name_plural = "学校の別名一覧"
+        unique_together = ['alias_type', 'provider', 'value']
+        ordering = ['university', 'alias_type', 'value']
+
+    def __str__(self):
+        prefix = f"[{self.provider}] " if self.provider else ""
+        return f"{prefix}{self.value} → {self.university.name}"
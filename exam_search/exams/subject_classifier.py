@@ -0,0 +1,192 @@
+"""
+科目の判定
+
+リンクテキストや科目名、予備校サイトのURL・ファイル名に含まれる科目コードから
+Exam.SUBJECT_CHOICES の科目を判定します。クローラーとインポートスクリプトは
+すべてこのモジュールを使い、同じ入力には同じ結果を返します。
+
+- キーワードは1つの正規表現にまとめてコンパイル済み（テキストの走査は1回）
+- 予備校ごとの科目コード表（東進のURL、河合塾のPDFファイル名）
+- 判定結果は入力ごとにメモ化
+
+使用例:
+    classify_subject('2024年度 数学（理系）')        # SubjectMatch('math', 1.0, '数学')
+    classify_subject('', provider='kawai', code='52')  # SubjectMatch('chemistry', 1.0, '52')
+"""
+
+import re
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+SubjectMatch = namedtuple('SubjectMatch', ['subject', 'confidence', 'matched'])
+
+UNKNOWN = SubjectMatch('other', 0.0, '')
+
+# 科目 → (キーワード, 重み)
+# 重みは判定の確からしさ。理科・社会のような総称は個別科目より低くし、
+# 「理科 物理」のような表記では個別科目を優先する
+SUBJECT_KEYWORDS = {
+    'math': [('数学', 1.0), ('mathematics', 0.9), ('math', 0.9)],
+    'english': [('英語', 1.0), ('english', 0.9)],
+    'japanese': [
+        ('国語', 1.0), ('現代文', 1.0), ('古文', 1.0), ('漢文', 1.0), ('japanese', 0.9),
+    ],
+    'physics': [('物理', 1.0), ('physics', 0.9)],
+    'chemistry': [('化学', 1.0), ('chemistry', 0.9)],
+    'biology': [('生物', 1.0), ('biology', 0.9)],
+    'history': [('日本史', 1.0), ('世界史', 1.0), ('歴史', 1.0), ('history', 0.9)],
+    'geography': [('地理', 1.0), ('地学', 1.0), ('geography', 0.9)],
+    'science': [('理科', 0.6), ('science', 0.5)],
+    'social': [('社会', 0.6), ('social', 0.5)],
+}
+
+# 複数の科目に一致した場合の確からしさの係数
+AMBIGUOUS_PENALTY = 0.7
+
+# 予備校ごとの科目コード表
+PROVIDER_CODES = {
+    # 東進 過去問データベースのURL（/university/0l/2025/e0l251/question/ の先頭1文字）
+    'toshin': {
+        'e': 'english',    # 英語
+        'm': 'math',       # 数学
+        'k': 'japanese',   # 国語
+        'j': 'history',    # 日本史
+        'w': 'history',    # 世界史
+        'o': 'geography',  # 地理
+        'p': 'physics',    # 物理
+        'c': 'chemistry',  # 化学
+        'b': 'biology',    # 生物
+        't': 'geography',  # 地学
+        's': 'social',     # 社会
+    },
+    # 河合塾 解答速報のPDFファイル名（t01-11c.pdf の 11）
+    'kawai': {
+        '11': 'english',   # 英語
+        '21': 'math',      # 数学（文系）
+        '22': 'math',      # 数学（理系）
+        '31': 'japanese',  # 国語
+        '32': 'japanese',  # 国語（第二問）
+        '41': 'history',   # 世界史
+        '42': 'history',   # 日本史
+        '43': 'geography', # 地理
+        '51': 'physics',   # 物理
+        '52': 'chemistry', # 化学
+        '53': 'biology',   # 生物
+    },
+}
+
+
+def _keyword_pattern(keyword):
+    # 英単語は前後が英字でない場合のみ一致させる（例: "mathematics" の中の "math" は別扱い）
+    escaped = re.escape(keyword)
+    if keyword.isascii():
+        return rf'(?<![a-z]){escaped}(?![a-z])'
+    # 「理科一類」などの科類名は理科（科目）として扱わない
+    if keyword in ('理科', '社会'):
+        return rf'(?<!文){escaped}(?![一二三]類)'
+    return escaped
+
+
+# キーワード → (科目, 重み)
+_KEYWORD_INDEX = {
+    keyword: (subject, weight)
+    for subject, keywords in SUBJECT_KEYWORDS.items()
+    for keyword, weight in keywords
+}
+
+# 長いキーワードを先に並べ、「mathematics」が「math」より優先して一致するようにする
+SUBJECT_PATTERN = re.compile('|'.join(
+    f'(?:{_keyword_pattern(keyword)})'
+    for keyword in sorted(_KEYWORD_INDEX, key=len, reverse=True)
+))
+
+
+def normalize_text(text):
+    """
+    判定用にテキストを正規化（全角英数字を半角に、英字を小文字に）
+
+    Args:
+        text (str): 元のテキスト
+
+    Returns:
+        str: 正規化したテキスト
+    """
+    return unicodedata.normalize('NFKC', text or '').casefold()
+
+
+@lru_cache(maxsize=4096)
+def classify_text(text):
+    """
+    テキストのキーワードから科目を判定
+
+    最も重みの大きいキーワードの科目を返します（同じ重みなら先に出現した方）。
+    別の科目のキーワードにも一致した場合は確からしさを下げます。
+
+    Args:
+        text (str): リンクテキスト・科目名・URLなど
+
+    Returns:
+        SubjectMatch: (科目, 確からしさ 0〜1, 一致したキーワード)
+    """
+    best = None
+    subjects = set()
+
+    for match in SUBJECT_PATTERN.finditer(normalize_text(text)):
+        keyword = match.group(0)
+        subject, weight = _KEYWORD_INDEX[keyword]
+        subjects.add(subject)
+        if best is None or weight > best.confidence:
+            best = SubjectMatch(subject, weight, keyword)
+
+    if best is None:
+        return UNKNOWN
+
+    # 総称（理科・社会）と個別科目の組み合わせは曖昧とみなさない
+    specific = {s for s in subjects if s not in ('science', 'social')}
+    if len(specific) > 1:
+        best = best._replace(confidence=round(best.confidence * AMBIGUOUS_PENALTY, 2))
+
+    return best
+
+
+@lru_cache(maxsize=1024)
+def classify_code(provider, code):
+    """
+    予備校の科目コードから科目を判定
+
+    Args:
+        provider (str): PROVIDER_CODESのキー（toshin / kawai）
+        code (str): 科目コード
+
+    Returns:
+        SubjectMatch: 未知のコードの場合は ('other', 0.0, '')
+    """
+    code = (code or '').lower()
+    subject = PROVIDER_CODES.get(provider, {}).get(code)
+    if subject is None:
+        return UNKNOWN
+    return SubjectMatch(subject, 1.0, code)
+
+
+def classify_subject(text='', provider=None, code=None):
+    """
+    科目を判定
+
+    科目コードが分かる場合はコード表を優先し、
+    コードが未知の場合はテキストのキーワードから判定します。
+
+    Args:
+        text (str): リンクテキスト・科目名など
+        provider (str): 予備校（PROVIDER_CODESのキー）
+        code (str): 予備校の科目コード
+
+    Returns:
+        SubjectMatch: (科目, 確からしさ 0〜1, 一致したキーワードまたはコード)
+    """
+    if provider and code:
+        result = classify_code(provider, code)
+        if result.confidence:
+            return result
+
+    return classify_text(text or '')
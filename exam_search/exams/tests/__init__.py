@@ -0,0 +1,9 @@
+import os
+import sys
+
+from django.conf import settings
+
+# crawlersディレクトリをパスに追加（crawlers/ のモジュールのテスト用）
+CRAWLERS_DIR = os.path.join(settings.BASE_DIR, 'crawlers')
+if CRAWLERS_DIR not in sys.path:
+    sys.path.insert(0, CRAWLERS_DIR)
@@ -0,0 +1,84 @@
+from django.test import SimpleTestCase
+
+from exams.canonical import canonicalize, canonicalize_exam
+from exams.subject_classifier import UNKNOWN, classify_subject
+
+
+class CanonicalizeTests(SimpleTestCase):
+    """表記の正規化（exams/canonical.py）"""
+
+    def test_exam_type(self):
+        cases = [
+            ('前期日程', '一般入試'),
+            ('後期', '一般入試（後期）'),
+            ('', '一般入試'),
+            (None, '一般入試'),
+            ('general', '一般入試'),
+            ('AO入試', '総合型選抜'),
+            ('推薦', '推薦入試'),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(canonicalize('exam_type', value), expected)
+
+    def test_department(self):
+        cases = [
+            ('全学部日程 (文系)', '全学部日程（文系）'),
+            ('文科1類', '文科一類'),
+            ('', ''),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(canonicalize('department', value), expected)
+
+    def test_university(self):
+        self.assertEqual(canonicalize('university', '東京 大学'), '東京大学')
+        self.assertEqual(canonicalize('university', '東京大学'), '東京大学')
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            canonicalize('subject', '数学')
+
+    def test_canonicalize_exam_updates_in_place(self):
+        exam_data = {'exam_type': '前期', 'department': '理科2類', 'university_name': '京都 大学'}
+
+        self.assertIs(canonicalize_exam(exam_data), exam_data)
+        self.assertEqual(
+            exam_data,
+            {'exam_type': '一般入試', 'department': '理科二類', 'university_name': '京都大学'},
+        )
+
+
+class ClassifySubjectTests(SimpleTestCase):
+    """科目の判定（exams/subject_classifier.py）"""
+
+    def test_text(self):
+        cases = [
+            ('2024年度 数学（理系）', ('math', 1.0, '数学')),
+            ('Mathematics', ('math', 0.9, 'mathematics')),
+            ('理科 物理', ('physics', 1.0, '物理')),
+            ('数学 物理', ('math', 0.7, '数学')),
+            ('理科一類', UNKNOWN),
+            ('', UNKNOWN),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(tuple(classify_subject(text)), tuple(expected))
+
+    def test_provider_codes(self):
+        cases = [
+            ('kawai', '52', 'chemistry'),
+            ('kawai', '22', 'math'),
+            ('toshin', 'e', 'english'),
+            ('toshin', 'j', 'history'),
+        ]
+        for provider, code, subject in cases:
+            with self.subTest(provider=provider, code=code):
+                self.assertEqual(
+                    tuple(classify_subject('', provider=provider, code=code)), (subject, 1.0, code)
+                )
+
+    def test_unknown_code_falls_back_to_text(self):
+        self.assertEqual(
+            tuple(classify_subject('英語', provider='toshin', code='z')), ('english', 1.0, '英語')
+        )
@@ -0,0 +1,197 @@
+import threading
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from crawl_frontier import (
+    CrawlFrontierQueue, WorkerHeartbeat, reclaim_dead_workers, release_worker_leases,
+)
+from exams.models import CrawlFrontier, CrawlWorker
+
+
+class CrawlFrontierQueueTests(TestCase):
+    """クロールフロンティアのリース（crawlers/crawl_frontier.py）"""
+
+    def setUp(self):
+        self.queue = CrawlFrontierQueue('toshin', worker_id='worker-a')
+        self.queue.seed([
+            {'url': 'https://example.com/1', 'label': '東京大学', 'priority': 1},
+            {'url': 'https://example.com/2', 'label': '京都大学', 'priority': 2},
+            {'url': 'https://example.com/3', 'label': '大阪大学', 'priority': 3},
+        ])
+
+    def entry(self, url):
+        return CrawlFrontier.objects.get(crawler='toshin', url=url)
+
+    def expire(self, url):
+        CrawlFrontier.objects.filter(url=url).update(leased_until=timezone.now() - timedelta(seconds=1))
+
+    def test_seed_ignores_registered_urls_and_updates_priority(self):
+        created = self.queue.seed([
+            {'url': 'https://example.com/1', 'priority': 5},
+            {'url': 'https://example.com/4'},
+        ])
+
+        self.assertEqual(created, 1)
+        self.assertEqual(self.entry('https://example.com/1').priority, 5)
+
+    def test_lease_is_exclusive_and_in_priority_order(self):
+        other = CrawlFrontierQueue('toshin', worker_id='worker-b')
+
+        leased = self.queue.lease(limit=2)
+        rest = other.lease(limit=2)
+
+        self.assertEqual([entry.url for entry in leased], ['https://example.com/1', 'https://example.com/2'])
+        self.assertEqual([entry.url for entry in rest], ['https://example.com/3'])
+        self.assertEqual([entry.leased_by for entry in leased], ['worker-a', 'worker-a'])
+        self.assertEqual([entry.attempts for entry in leased], [1, 1])
+        self.assertEqual(other.lease(), [])
+
+    def test_expired_lease_is_taken_over(self):
+        self.queue.lease(limit=1)
+        self.expire('https://example.com/1')
+
+        other = CrawlFrontierQueue('toshin', worker_id='worker-b')
+        leased = other.lease(limit=1)
+
+        self.assertEqual([entry.url for entry in leased], ['https://example.com/1'])
+        self.assertEqual(leased[0].attempts, 2)
+
+        # 期限切れで取られたリースの完了は記録されない
+        self.queue.complete(leased[0])
+        self.assertEqual(self.entry('https://example.com/1').state, 'leased')
+
+    def test_expired_lease_fails_after_max_attempts(self):
+        self.queue.max_attempts = 1
+        self.queue.lease(limit=1)
+        self.expire('https://example.com/1')
+
+        leased = self.queue.lease(limit=1)
+
+        self.assertEqual([entry.url for entry in leased], ['https://example.com/2'])
+        entry = self.entry('https://example.com/1')
+        self.assertEqual(entry.state, 'failed')
+        self.assertEqual(entry.last_error, 'lease expired')
+
+    def test_fail_backs_off_then_gives_up(self):
+        self.queue.max_attempts = 2
+        self.queue.retry_delay = 10
+        entry, = self.queue.lease(limit=1)
+
+        before = timezone.now()
+        self.queue.fail(entry, 'timeout')
+        entry = self.entry(entry.url)
+        self.assertEqual(entry.state, 'pending')
+        self.assertGreaterEqual(entry.next_eligible_at, before + timedelta(seconds=10))
+        self.assertEqual(entry.last_error, 'timeout')
+
+        # 待ち時間が過ぎるまでは再取得されない
+        self.assertNotIn(entry.url, [leased.url for leased in self.queue.lease()])
+
+        CrawlFrontier.objects.filter(pk=entry.pk).update(next_eligible_at=timezone.now())
+        entry, = self.queue.lease(limit=1, label_filter='東京')
+        self.assertEqual(entry.attempts, 2)
+        self.queue.fail(entry, 'timeout')
+        self.assertEqual(self.entry(entry.url).state, 'failed')
+
+    def test_release_restores_attempts(self):
+        entry, = self.queue.lease(limit=1)
+        self.queue.release(entry)
+
+        entry = self.entry(entry.url)
+        self.assertEqual(entry.state, 'pending')
+        self.assertEqual(entry.attempts, 0)
+
+    def test_start_cycle_requeues_only_previous_cycle(self):
+        old, recent = self.queue.lease(limit=2)
+        self.queue.complete(old)
+        self.queue.complete(recent)
+        CrawlFrontier.objects.filter(pk=old.pk).update(
+            last_crawled_at=timezone.now() - self.queue.cycle_length - timedelta(minutes=1)
+        )
+
+        self.assertEqual(self.queue.start_cycle(), 1)
+        self.assertEqual(self.entry(old.url).state, 'pending')
+        self.assertEqual(self.entry(recent.url).state, 'done')
+
+
+class WorkerReclaimTests(TestCase):
+    """ワーカーのハートビートとリースの回収（crawlers/crawl_frontier.py）"""
+
+    def setUp(self):
+        self.queue = CrawlFrontierQueue('toshin', worker_id='worker-a')
+        self.queue.seed([
+            {'url': 'https://example.com/1'},
+            {'url': 'https://example.com/2'},
+        ])
+        self.leased = self.queue.lease(limit=1)
+
+    def test_reclaim_dead_workers(self):
+        stale = timezone.now() - timedelta(seconds=300)
+        CrawlWorker.objects.create(worker_id='worker-a', last_heartbeat_at=stale)
+        CrawlWorker.objects.create(worker_id='worker-b')
+
+        self.assertEqual(reclaim_dead_workers(timeout=120), 1)
+
+        entry = CrawlFrontier.objects.get(pk=self.leased[0].pk)
+        self.assertEqual((entry.state, entry.leased_by, entry.leased_until), ('pending', '', None))
+        self.assertEqual(CrawlWorker.objects.get(worker_id='worker-a').status, 'dead')
+        self.assertEqual(CrawlWorker.objects.get(worker_id='worker-b').status, 'running')
+
+        # 回収済みのワーカーは再度回収されない
+        self.assertEqual(reclaim_dead_workers(timeout=120), 0)
+
+    def test_live_worker_is_not_reclaimed(self):
+        CrawlWorker.objects.create(worker_id='worker-a')
+
+        self.assertEqual(reclaim_dead_workers(timeout=120), 0)
+        self.assertEqual(CrawlFrontier.objects.get(pk=self.leased[0].pk).state, 'leased')
+
+    def test_release_worker_leases(self):
+        CrawlWorker.objects.create(worker_id='worker-a')
+
+        self.assertEqual(release_worker_leases(['worker-a']), 1)
+        self.assertEqual(CrawlWorker.objects.get(worker_id='worker-a').status, 'stopped')
+        self.assertEqual(CrawlFrontier.objects.get(pk=self.leased[0].pk).state, 'pending')
+
+    def test_beat_extends_own_leases(self):
+        other = CrawlFrontierQueue('toshin', worker_id='worker-b')
+        other_entry, = other.lease(limit=1)
+        soon = timezone.now() + timedelta(seconds=5)
+        CrawlFrontier.objects.update(leased_until=soon)
+        stale = timezone.now() - timedelta(seconds=300)
+        CrawlWorker.objects.create(worker_id='worker-a', last_heartbeat_at=stale)
+
+        heartbeat = WorkerHeartbeat('worker-a', crawlers=['toshin'])
+        heartbeat.beat()
+
+        entry = CrawlFrontier.objects.get(pk=self.leased[0].pk)
+        self.assertGreater(entry.leased_until, soon + timedelta(seconds=heartbeat.lease_seconds - 60))
+        self.assertEqual(CrawlFrontier.objects.get(pk=other_entry.pk).leased_until, soon)
+        self.assertGreater(CrawlWorker.objects.get(worker_id='worker-a').last_heartbeat_at, stale)
+
+
+class WorkerHeartbeatThreadTests(SimpleTestCase):
+    """ハートビートのスレッド（crawlers/crawl_frontier.py）"""
+
+    def test_failed_beat_is_retried(self):
+        heartbeat = WorkerHeartbeat('worker-a', interval=0.01)
+        beats = []
+        retried = threading.Event()
+
+        def beat():
+            beats.append(len(beats))
+            if len(beats) == 1:
+                raise RuntimeError('database is locked')
+            retried.set()
+
+        heartbeat.beat = beat
+        heartbeat._thread = threading.Thread(target=heartbeat._run)
+        with self.assertLogs('crawl_frontier', 'WARNING') as logs:
+            heartbeat._thread.start()
+            self.assertTrue(retried.wait(5))
+            heartbeat._stop.set()
+            heartbeat._thread.join()
+
+        self.assertIn('database is locked', logs.output[0])
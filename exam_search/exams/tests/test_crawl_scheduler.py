@@ -0,0 +1,41 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from exams.management.commands import crawl_scheduler
+from exams.models import ScheduledTaskRun
+
+SCHEDULE_CONFIG = {
+    'weekly': {'enabled': True, 'day': 'sunday', 'time': '02:00', 'tasks': ['generate_report']},
+    'monthly': {'enabled': True, 'day': 1, 'time': '01:00', 'tasks': ['generate_report']},
+}
+
+
+class CrawlSchedulerTests(TransactionTestCase):
+    """クロールスケジューラー（exams/management/commands/crawl_scheduler.py）"""
+
+    def run_scheduler(self, *args):
+        stdout = StringIO()
+        with mock.patch.object(crawl_scheduler, 'SCHEDULE_CONFIG', SCHEDULE_CONFIG, create=True), \
+                mock.patch.object(crawl_scheduler.CrawlerRunner, 'generate_report') as generate_report:
+            call_command('crawl_scheduler', '--once', *args, stdout=stdout)
+        return generate_report, stdout.getvalue()
+
+    def test_once_runs_task_deferred_by_the_same_running_task(self):
+        generate_report, output = self.run_scheduler()
+
+        self.assertIn('実行中のため延期', output)
+        self.assertEqual(generate_report.call_count, 2)
+        self.assertEqual(
+            sorted(ScheduledTaskRun.objects.values_list('schedule', 'task', 'status')),
+            [('monthly', 'generate_report', 'success'), ('weekly', 'generate_report', 'success')],
+        )
+
+    def test_once_with_parallel_workers(self):
+        generate_report, output = self.run_scheduler('--workers', '2')
+
+        self.assertIn('SQLiteで2件のタスクを同時に実行します', output)
+        self.assertEqual(generate_report.call_count, 2)
+        self.assertEqual(ScheduledTaskRun.objects.filter(status='success').count(), 2)
@@ -0,0 +1,63 @@
+from django.test import TestCase
+
+from crawler_utils import DuplicateDetector
+from exams.models import Exam, University
+
+
+class DuplicateDetectorTests(TestCase):
+    """重複する過去問の検出（crawlers/crawler_utils.py）"""
+
+    def create_exam(self, university, **fields):
+        fields.setdefault('year', 2024)
+        fields.setdefault('subject', 'math')
+        return Exam.objects.create(university=university, **fields)
+
+    def groups(self, include_department=False):
+        return [
+            [exam.pk for exam in group]
+            for group in DuplicateDetector.iter_duplicate_groups(include_department)
+        ]
+
+    def test_groups_exams_with_the_same_key(self):
+        tokyo = University.objects.create(name='東京大学')
+        a = self.create_exam(tokyo)
+        b = self.create_exam(tokyo, department='理科一類')
+        self.create_exam(tokyo, year=2023)
+        self.create_exam(tokyo, subject='english')
+        c = self.create_exam(tokyo, subject='english', exam_type='推薦入試')
+        d = self.create_exam(tokyo, subject='english', exam_type='推薦入試')
+
+        # グループはキー（大学・年度・科目・試験種別）の順
+        self.assertEqual(self.groups(), [[c.pk, d.pk], [a.pk, b.pk]])
+
+    def test_department_is_part_of_key_when_included(self):
+        tokyo = University.objects.create(name='東京大学')
+        self.create_exam(tokyo)
+        self.create_exam(tokyo, department='理科一類')
+        c = self.create_exam(tokyo, department='文科一類')
+        d = self.create_exam(tokyo, department='文科一類')
+
+        self.assertEqual(self.groups(include_department=True), [[c.pk, d.pk]])
+
+    def test_same_named_universities_are_separate_groups(self):
+        # 同名の大学（大学と高校など）のExamが1つのグループに混ざらない
+        university = University.objects.create(name='筑波', name_kana='つくば')
+        high_school = University.objects.create(name='筑波', name_kana='つくば', school_type='high_school')
+        exams = [
+            self.create_exam(university),
+            self.create_exam(high_school),
+            self.create_exam(university),
+            self.create_exam(high_school),
+        ]
+
+        self.assertEqual(
+            self.groups(),
+            [[exams[0].pk, exams[2].pk], [exams[1].pk, exams[3].pk]],
+        )
+
+    def test_no_groups_without_duplicates(self):
+        tokyo = University.objects.create(name='東京大学')
+        self.create_exam(tokyo)
+        self.create_exam(tokyo, year=2023)
+
+        self.assertEqual(self.groups(), [])
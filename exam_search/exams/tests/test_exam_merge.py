@@ -0,0 +1,133 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from exams.exam_merge import merge_duplicate_exams
+from exams.models import AnswerSource, Exam, Favorite, University
+
+
+class MergeDuplicateExamsTests(TestCase):
+    """重複する過去問の統合（exams/exam_merge.py）"""
+
+    def setUp(self):
+        self.university = University.objects.create(name='東京大学')
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+
+    def create_exam(self, **fields):
+        fields.setdefault('university', self.university)
+        fields.setdefault('year', 2024)
+        fields.setdefault('subject', 'math')
+        return Exam.objects.create(**fields)
+
+    def create_source(self, exam, answer_url):
+        return AnswerSource.objects.create(exam=exam, provider_name='河合塾', answer_url=answer_url)
+
+    def test_master_prefers_exam_with_department(self):
+        first = self.create_exam()
+        with_department = self.create_exam(department='理科一類')
+        other_year = self.create_exam(year=2023)
+
+        result = merge_duplicate_exams()
+
+        self.assertEqual(result.stats['groups'], 1)
+        self.assertEqual(result.groups[0]['master'], with_department)
+        self.assertEqual([loser['exam'] for loser in result.groups[0]['losers']], [first])
+        self.assertQuerysetEqual(
+            Exam.objects.order_by('id'), [with_department, other_year], transform=lambda exam: exam
+        )
+
+    def test_master_is_lowest_id_without_department(self):
+        first = self.create_exam()
+        self.create_exam()
+        self.create_exam(department='  ')
+
+        merge_duplicate_exams()
+
+        self.assertEqual(list(Exam.objects.all()), [first])
+
+    def test_sources_conflicting_with_master_or_earlier_loser_are_dropped(self):
+        master = self.create_exam()
+        loser1 = self.create_exam()
+        loser2 = self.create_exam()
+        self.create_source(master, 'https://example.com/a.pdf')
+        conflict_with_master = self.create_source(loser1, 'https://example.com/a.pdf')
+        moved = self.create_source(loser1, 'https://example.com/b.pdf')
+        conflict_with_loser = self.create_source(loser2, 'https://example.com/b.pdf')
+        moved_from_loser2 = self.create_source(loser2, 'https://example.com/c.pdf')
+
+        result = merge_duplicate_exams()
+
+        self.assertEqual(result.stats['sources_moved'], 2)
+        self.assertEqual(result.stats['sources_dropped'], 2)
+        self.assertEqual(result.stats['exams_deleted'], 2)
+        losers = {loser['exam']: loser['sources'] for loser in result.groups[0]['losers']}
+        self.assertEqual(losers[loser1], [(conflict_with_master, False), (moved, True)])
+        self.assertEqual(losers[loser2], [(conflict_with_loser, False), (moved_from_loser2, True)])
+
+        self.assertEqual(
+            sorted(master.answer_sources.values_list('answer_url', flat=True)),
+            ['https://example.com/a.pdf', 'https://example.com/b.pdf', 'https://example.com/c.pdf'],
+        )
+        self.assertFalse(
+            AnswerSource.objects.filter(pk__in=[conflict_with_master.pk, conflict_with_loser.pk]).exists()
+        )
+
+    def test_favorites_are_moved_per_user(self):
+        master = self.create_exam()
+        loser = self.create_exam()
+        Favorite.objects.create(user=self.alice, exam=master)
+        Favorite.objects.create(user=self.alice, exam=loser)
+        Favorite.objects.create(user=self.bob, exam=loser)
+
+        result = merge_duplicate_exams()
+
+        self.assertEqual(result.stats['favorites_moved'], 1)
+        self.assertEqual(result.stats['favorites_dropped'], 1)
+        self.assertEqual(
+            sorted(Favorite.objects.filter(exam=master).values_list('user__username', flat=True)),
+            ['alice', 'bob'],
+        )
+
+    def test_problem_url_is_taken_from_lowest_id_loser(self):
+        master = self.create_exam(department='文科一類')
+        self.create_exam(problem_url='https://example.com/first.pdf')
+        self.create_exam(problem_url='https://example.com/second.pdf')
+
+        result = merge_duplicate_exams()
+
+        self.assertEqual(result.stats['problem_urls'], 1)
+        master.refresh_from_db()
+        self.assertEqual(master.problem_url, 'https://example.com/first.pdf')
+
+    def test_master_problem_url_is_kept(self):
+        master = self.create_exam(problem_url='https://example.com/master.pdf')
+        self.create_exam(problem_url='https://example.com/loser.pdf')
+
+        result = merge_duplicate_exams()
+
+        self.assertEqual(result.stats['problem_urls'], 0)
+        master.refresh_from_db()
+        self.assertEqual(master.problem_url, 'https://example.com/master.pdf')
+
+    def test_dry_run_reports_changes_and_rolls_back(self):
+        master = self.create_exam()
+        loser = self.create_exam(problem_url='https://example.com/loser.pdf')
+        source = self.create_source(loser, 'https://example.com/a.pdf')
+        Favorite.objects.create(user=self.alice, exam=loser)
+
+        result = merge_duplicate_exams(dry_run=True)
+
+        self.assertEqual(result.stats['exams_deleted'], 1)
+        self.assertEqual(result.stats['sources_moved'], 1)
+        self.assertEqual(result.stats['favorites_moved'], 1)
+        self.assertTrue(result.groups[0]['losers'][0]['problem_url'])
+
+        self.assertEqual(Exam.objects.count(), 2)
+        source.refresh_from_db()
+        self.assertEqual(source.exam, loser)
+        self.assertTrue(Favorite.objects.filter(exam=loser).exists())
+        master.refresh_from_db()
+        self.assertEqual(master.problem_url, '')
+
+        # 一時テーブルが残っていれば、続けて実行すると失敗する
+        self.assertEqual(merge_duplicate_exams().stats['exams_deleted'], 1)
@@ -0,0 +1,39 @@
+from django.test import SimpleTestCase
+
+from ingest_pipeline import BatchSink, Pipeline, PipelineError, map_stage
+
+
+class PipelineTests(SimpleTestCase):
+    """取り込みパイプライン（crawlers/ingest_pipeline.py）"""
+
+    def run_pipeline(self, records, *stages, queue_size=2, batch_size=7):
+        written = []
+
+        def write_batch(batch):
+            written.extend(batch)
+            return len(batch)
+
+        pipeline = Pipeline(
+            iter(records), *stages,
+            sink=BatchSink(write_batch, batch_size=batch_size),
+            queue_size=queue_size,
+        )
+        return pipeline.run(), written
+
+    def test_all_records_reach_sink_when_queues_fill(self):
+        # キューの上限より多いレコードを流しても、終端の目印でレコードが捨てられない
+        records = list(range(1000))
+        stats, written = self.run_pipeline(records, map_stage(lambda record: record))
+
+        self.assertEqual(written, records)
+        self.assertEqual(stats['records'], 1000)
+        self.assertEqual(stats['written'], 1000)
+
+    def test_stage_error_is_raised(self):
+        def fail_at_50(record):
+            if record == 50:
+                raise ValueError('broken record')
+            return record
+
+        with self.assertRaisesMessage(PipelineError, 'broken record'):
+            self.run_pipeline(range(100), map_stage(fail_at_50), queue_size=100)
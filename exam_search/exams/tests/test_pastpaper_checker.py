@@ -0,0 +1,33 @@
+from datetime import date
+
+from django.test import SimpleTestCase
+
+from pastpaper_checker import extract_years
+
+
+class ExtractYearsTests(SimpleTestCase):
+    """掲載年度の取得（crawlers/pastpaper_checker.py）"""
+
+    def test_western_and_reiwa_years(self):
+        cases = [
+            ('2024年度 入試問題', [2024]),
+            ('2023 年度', [2023]),
+            ('令和5年度', [2023]),
+            ('令和 6 年度', [2024]),
+            ('令和元年度', [2019]),
+            ('令和2年度・令和元年度', [2020, 2019]),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(extract_years(text), expected)
+
+    def test_sorted_newest_first_without_duplicates(self):
+        self.assertEqual(
+            extract_years('2020年度 令和元年度 2024年度 令和2年度 2020年度'),
+            [2024, 2020, 2019],
+        )
+
+    def test_out_of_range_years_are_ignored(self):
+        latest = date.today().year + 1
+        text = f'1999年度 2000年度 {latest}年度 {latest + 1}年度 2024年'
+        self.assertEqual(extract_years(text), [latest, 2000])
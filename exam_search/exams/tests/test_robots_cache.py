@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+
+from robots_cache import RobotsCache
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+
+class RobotsCacheTests(SimpleTestCase):
+    """robots.txt キャッシュ（crawlers/robots_cache.py）"""
+
+    def setUp(self):
+        self.fetched = []
+        self.sessions = []
+        self.slow_origin_started = threading.Event()
+        self.release_slow_origin = threading.Event()
+
+        test = self
+
+        class FakeSession:
+            def __init__(self):
+                test.sessions.append((self, threading.get_ident()))
+
+            def get(self, url, timeout=None):
+                test.fetched.append(url)
+                if url.startswith('https://slow.example.com'):
+                    test.slow_origin_started.set()
+                    test.release_slow_origin.wait(5)
+                return FakeResponse('User-agent: *\nDisallow: /private/\nCrawl-delay: 3\n')
+
+        self.cache = RobotsCache(session_factory=FakeSession)
+
+    def test_rules_and_crawl_delay(self):
+        self.assertTrue(self.cache.is_allowed('https://example.com/exams/'))
+        self.assertFalse(self.cache.is_allowed('https://example.com/private/a.pdf'))
+        self.assertEqual(self.cache.crawl_delay('https://example.com/'), 3.0)
+        self.assertEqual(self.fetched, ['https://example.com/robots.txt'])
+
+    def test_other_hosts_are_not_blocked_by_a_slow_fetch(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            slow = [executor.submit(self.cache.is_allowed, 'https://slow.example.com/') for _ in range(3)]
+            self.assertTrue(self.slow_origin_started.wait(5))
+
+            # slow.example.com の取得中でも、他のホストは確認できる
+            self.assertTrue(self.cache.is_allowed('https://fast.example.com/'))
+
+            self.release_slow_origin.set()
+            self.assertEqual([future.result() for future in slow], [True, True, True])
+
+        # 同じホストを待っていたスレッドは、取得済みの結果を使う
+        self.assertEqual(self.fetched.count('https://slow.example.com/robots.txt'), 1)
+
+    def test_session_per_thread(self):
+        thread = threading.Thread(target=self.cache.is_allowed, args=('https://a.example.com/',))
+        thread.start()
+        thread.join()
+        self.cache.is_allowed('https://b.example.com/')
+
+        threads = [ident for _, ident in self.sessions]
+        self.assertEqual(len(threads), 2)
+        self.assertEqual(len(set(threads)), 2)
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+
+from exams.models import PageFingerprint
+from toshin_crawler import ToshinExamCrawler
+
+UNIVERSITY_URL = 'https://www.toshin-kakomon.com/university/0l/'
+
+PAGE = '''
+<html><body>
+<h2>2024年度 入試問題</h2>
+<table><tr><td>前期</td>
+<td><a href="/university/0l/2024/e0l241/question/">英語 問題</a></td></tr></table>
+</body></html>
+'''.encode('utf-8')
+
+
+class ToshinFingerprintTests(TestCase):
+    """東進クローラーのページ指紋（crawlers/toshin_crawler.py）"""
+
+    def crawl(self, skip_unchanged):
+        crawler = ToshinExamCrawler(
+            delay=0,
+            use_browser_fallback=False,
+            storage_state_path=None,
+            skip_unchanged=skip_unchanged,
+            store_pages=False,
+        )
+        response = SimpleNamespace(content=PAGE, url=UNIVERSITY_URL)
+        with mock.patch.object(crawler, 'fetch_response', return_value=response), \
+                mock.patch.object(crawler, 'response_encoding', return_value='utf-8'):
+            exams_data = crawler.crawl_university_exams(UNIVERSITY_URL, '東京大学')
+        crawler.fingerprints.commit()
+        return exams_data
+
+    def test_unchanged_page_is_skipped(self):
+        self.assertTrue(self.crawl(skip_unchanged=True))
+        self.assertEqual(self.crawl(skip_unchanged=True), [])
+
+    def test_full_refresh_reprocesses_and_records_fingerprint(self):
+        self.assertTrue(self.crawl(skip_unchanged=False))
+        fingerprint = PageFingerprint.objects.get(crawler='toshin', url=UNIVERSITY_URL)
+        self.assertEqual(fingerprint.record_count, 1)
+
+        # 再処理した後も指紋が残り、通常のクロールでは省略される
+        self.assertTrue(self.crawl(skip_unchanged=False))
+        self.assertEqual(self.crawl(skip_unchanged=True), [])
@@ -0,0 +1,275 @@
+"""
+学校の名寄せ（別名からの University の解決）
+
+クローラーやインポートスクリプトは、学校名・かな表記・予備校の大学コード・
+公式サイトのURLなど、取得元ごとに異なる手がかりで学校を指定します。
+UniversityIndex はこれらをキーとした University ID のハッシュ表をメモリ上に作り、
+取り込み中はDBを参照せずに学校を解決します（DBへの問い合わせは未登録の学校のみ）。
+
+キーの元になるもの:
+- University の学校名・かな表記・公式サイトのドメイン
+- UniversityAlias（旧名称・予備校の大学コードなど、管理画面やインポート時に登録）
+- RENAMED_UNIVERSITIES（統合・改称した学校）
+
+使用例:
+    index = get_university_index()
+    university_id = index.resolve(name='東京工業大学')            # 東京科学大学のID
+    university_id = index.resolve(code='gk1', provider='kawai')
+    university_id, created = index.get_or_create('東京大学', url='https://www.u-tokyo.ac.jp/')
+"""
+
+import threading
+from urllib.parse import urlparse
+
+from django.db import transaction
+
+from exams.canonical import canonicalize
+from exams.models import University, UniversityAlias
+
+# 統合・改称した学校（旧名称 → 現在の名称）
+RENAMED_UNIVERSITIES = {
+    '東京工業大学': '東京科学大学',
+    '東京医科歯科大学': '東京科学大学',
+}
+
+# 予備校など、複数の学校の公式サイトURLとして登録されうるドメイン（名寄せに使わない）
+PROVIDER_DOMAINS = {
+    'kawai-juku.ac.jp',
+    'keinet.ne.jp',
+    'toshin.com',
+    'toshin-kakomon.com',
+    'yozemi.ac.jp',
+    'sundai.ac.jp',
+}
+
+# 別名の種別ごとの照合順（上にあるものほど確実）
+RESOLVE_ORDER = ('code', 'name', 'domain', 'kana')
+
+
+def domain_of(url):
+    """
+    URL（またはホスト名）からドメインを取得（小文字、先頭の www. は除く）
+
+    Returns:
+        str: ドメイン、取得できない場合は空文字列
+    """
+    if not url:
+        return ''
+    host = urlparse(url if '//' in url else f'//{url}').hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def normalize_alias(alias_type, value):
+    """
+    別名を照合用の値に正規化
+
+    Args:
+        alias_type (str): name / kana / code / domain
+        value (str): 別名
+
+    Returns:
+        str: 正規化した値
+    """
+    if alias_type in ('name', 'kana'):
+        return canonicalize('university', value)
+    if alias_type == 'domain':
+        return domain_of(value)
+    return (value or '').strip().lower()
+
+
+class UniversityIndex:
+    """
+    別名 → University ID のハッシュ表
+
+    キーは (種別, 提供元, 正規化した値)。学校名・かな表記・ドメインから作るキーのうち、
+    複数の学校に当てはまるものは曖昧なため使いません（UniversityAlias の登録が優先）。
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """
+        DBから索引を作り直す
+        """
+        ids = {}
+        ambiguous = set()
+
+        def add_derived(key, university_id):
+            if not key[2] or key in ambiguous:
+                return
+            if ids.setdefault(key, university_id) != university_id:
+                ambiguous.add(key)
+
+        universities = University.objects.order_by('id').values_list('id', 'name', 'name_kana', 'official_url')
+        for university_id, name, name_kana, official_url in universities:
+            # 同名の学校が複数ある場合はIDの小さい方
+            ids.setdefault(('name', '', normalize_alias('name', name)), university_id)
+            add_derived(('kana', '', normalize_alias('kana', name_kana)), university_id)
+            domain = domain_of(official_url)
+            if domain not in PROVIDER_DOMAINS:
+                add_derived(('domain', '', domain), university_id)
+
+        for key in ambiguous:
+            ids.pop(key, None)
+
+        explicit = set()
+        for university_id, alias_type, provider, value in UniversityAlias.objects.values_list(
+            'university_id', 'alias_type', 'provider', 'value'
+        ):
+            key = (alias_type, provider, normalize_alias(alias_type, value))
+            ids[key] = university_id
+            explicit.add(key)
+
+        for old_name, new_name in RENAMED_UNIVERSITIES.items():
+            old_key = ('name', '', normalize_alias('name', old_name))
+            new_key = ('name', '', normalize_alias('name', new_name))
+            if new_key in ids and old_key not in explicit:
+                ids[old_key] = ids[new_key]
+
+        with self._lock:
+            self._ids = ids
+
+    def _lookup(self, alias_type, value, provider=''):
+        if alias_type != 'domain':
+            return self._ids.get((alias_type, provider, normalize_alias(alias_type, value)))
+
+        # サブドメイン（例: admissions.titech.ac.jp）は上位のドメインでも照合する
+        labels = domain_of(value).split('.')
+        for i in range(len(labels) - 1):
+            university_id = self._ids.get(('domain', '', '.'.join(labels[i:])))
+            if university_id is not None:
+                return university_id
+        return None
+
+    def resolve(self, name=None, code=None, provider='', url=None, kana=None):
+        """
+        手がかりから学校を解決
+
+        Args:
+            name (str): 学校名
+            code (str): 予備校などの大学コード（provider と組み合わせて照合）
+            provider (str): 大学コードの提供元（例: kawai）
+            url (str): 学校の公式サイトのURL
+            kana (str): かな表記
+
+        Returns:
+            int: University ID、解決できない場合はNone
+        """
+        clues = {'code': code, 'name': name, 'domain': url, 'kana': kana}
+        for alias_type in RESOLVE_ORDER:
+            value = clues[alias_type]
+            if not value:
+                continue
+            university_id = self._lookup(alias_type, value, provider if alias_type == 'code' else '')
+            if university_id is not None:
+                return university_id
+        return None
+
+    def get_or_create(self, name, code=None, provider='', url=None, defaults=None):
+        """
+        学校を解決し、見つからなければ登録
+
+        大学コードを指定した場合は、次回からコードで解決できるよう別名として登録します。
+
+        Args:
+            name (str): 学校名（改称した学校は現在の名称で登録）
+            code (str): 大学コード
+            provider (str): 大学コードの提供元
+            url (str): 公式サイトのURL
+            defaults (dict): 登録時に設定する University のフィールド
+
+        Returns:
+            tuple: (University ID, 登録したか)
+        """
+        university_id = self.resolve(name=name, code=code, provider=provider, url=url)
+        created = False
+
+        if university_id is None:
+            name = canonicalize('university', name)
+            name = canonicalize('university', RENAMED_UNIVERSITIES.get(name, name))
+
+            with self._lock:
+                # 索引の作成後に他のプロセスが登録した学校
+                university_id = University.objects.filter(name=name).order_by('id').values_list(
+                    'id', flat=True
+                ).first()
+                created = university_id is None
+                if created:
+                    university_id = University.objects.create(name=name, **(defaults or {})).pk
+
+            self._remember({('name', '', normalize_alias('name', name)): university_id})
+
+        if code:
+            self.add_aliases([(university_id, 'code', code, provider)])
+        return university_id, created
+
+    def add_aliases(self, aliases):
+        """
+        別名をまとめて登録（登録済みのものは無視）
+
+        Args:
+            aliases (iterable): (University ID, 種別, 値, 提供元) のタプル
+
+        Returns:
+            int: 新たに登録した別名の数
+        """
+        new_aliases = {}
+        for university_id, alias_type, value, provider in aliases:
+            provider = provider if alias_type == 'code' else ''
+            key = (alias_type, provider, normalize_alias(alias_type, value))
+            # 登録済みの別名（他の学校を指すものを含む）は上書きしない
+            if key[2] and key not in self._ids:
+                new_aliases[key] = UniversityAlias(
+                    university_id=university_id, alias_type=alias_type,
+                    provider=provider, value=key[2],
+                )
+
+        if not new_aliases:
+            return 0
+
+        UniversityAlias.objects.bulk_create(new_aliases.values(), ignore_conflicts=True)
+        self._remember({key: alias.university_id for key, alias in new_aliases.items()})
+        return len(new_aliases)
+
+    def _remember(self, entries):
+        """
+        登録した学校・別名のキーを索引に追加
+
+        トランザクション内ではコミット後に追加します。ロールバックされた場合は追加されないため、
+        DBに存在しないIDが索引に残りません（コミットまでの解決はDBへの問い合わせで行う）。
+
+        Args:
+            entries (dict): キー → University ID
+        """
+        def add():
+            with self._lock:
+                for key, university_id in entries.items():
+                    self._ids.setdefault(key, university_id)
+
+        transaction.on_commit(add)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_university_index(refresh=False):
+    """
+    共有の索引を取得（初回のみDBから作成）
+
+    Args:
+        refresh (bool): Trueなら索引を作り直す
+
+    Returns:
+        UniversityIndex: 索引
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = UniversityIndex()
+        elif refresh:
+            _index.load()
+        return _index
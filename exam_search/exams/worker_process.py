@@ -0,0 +1,20 @@
+"""
+クロールワーカーの子プロセスの入口
+
+spawn 方式（macOSのデフォルト）で起動した子プロセスは、Djangoの初期化前に
+このモジュールを読み込み直します。モデルを使うモジュールは django.setup() の後に
+読み込む必要があるため、このモジュールの先頭では読み込みません。
+"""
+
+import django
+
+
+def start_worker(*args, **kwargs):
+    """
+    Djangoを初期化してからワーカーを実行（引数は run_worker と同じ）
+    """
+    # fork 方式ではアプリは読み込み済みのため、読み込み直さない
+    django.setup()
+
+    from exams.management.commands.crawl_worker import run_worker
+    run_worker(*args, **kwargs)
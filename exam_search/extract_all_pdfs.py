@@ -1,169 +1,360 @@
 #!/usr/bin/env python3
 """
 各大学の解答速報ページからPDFリンクを抽出するスクリプト
+
+大学ごとのHTMLファイル（{コード}.html）をプロセスプールで並列にパースし、
+抽出したリンクを大学ごとに順次CSV・JSONLへ書き出します。
+
+前回の実行から更新日時とハッシュが変わっていないHTMLファイルはパースせず、
+前回の抽出結果（pdf_links.jsonl）を引き継ぎます。
+
+使用例:
+    # ./university_htmls のHTMLを処理して ./outputs に保存
+    python extract_all_pdfs.py
+
+    # 入力・出力先を指定
+    python extract_all_pdfs.py htmls/ --universities university_links.csv --output-dir outputs/
+
+    # 変更のないファイルも含めてすべて再抽出
+    python extract_all_pdfs.py htmls/ --full
 """
 
-from bs4 import BeautifulSoup
 import os
+import sys
 import csv
 import json
-from collections import defaultdict
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'crawlers'))
 
-def extract_pdf_links_from_page(html_content, university_info):
+from link_extractor import extract_links, href_contains
+
+CSV_FIELDS = ['university', 'code', 'link_text', 'context', 'pdf_url']
+STATE_FILE = '.extract_state.json'
+
+
+def extract_pdf_links_from_page(html_content, university_info, encoding=None):
     """
     各大学ページからPDFリンクを抽出
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    pdf_links = []
-    
+    # 相対パス (../../など) は大学ページのURLを基準に解決する
+    base_url = university_info.get('url') or (
+        f"https://www.kawai-juku.ac.jp/nyushi/honshi/25/{university_info['code']}/"
+    )
+
     # PDFへのリンクを探す (href属性に.pdfを含むもの)
-    for link in soup.find_all('a', href=True):
-        href = link.get('href')
-        if href and '.pdf' in href.lower():
-            # 相対パスを絶対パスに変換
-            if href.startswith('/'):
-                full_url = f"https://www.kawai-juku.ac.jp{href}"
-            elif href.startswith('http'):
-                full_url = href
-            else:
-                # 相対パス (../../など)
-                full_url = f"https://www.kawai-juku.ac.jp/nyushi/honshi/25/{university_info['code']}/{href}"
-            
-            # リンクテキストを取得
-            link_text = link.get_text(strip=True)
-            
-            # 親要素から科目名などのコンテキストを取得
-            context = ""
-            parent = link.find_parent(['td', 'th', 'div', 'li', 'p'])
-            if parent:
-                context = parent.get_text(strip=True)
-            
-            pdf_links.append({
-                'university': university_info['name'],
-                'code': university_info['code'],
-                'link_text': link_text,
-                'context': context[:100],  # 最初の100文字のみ
-                'pdf_url': full_url
-            })
-    
+    links = extract_links(
+        html_content, base_url,
+        href_filter=href_contains('.pdf', ignore_case=True),
+        with_context=True,
+        encoding=encoding
+    )
+
+    pdf_links = []
+    for link in links:
+        pdf_links.append({
+            'university': university_info['name'],
+            'code': university_info['code'],
+            'link_text': link.text,
+            'context': link.context[:100],  # 最初の100文字のみ
+            'pdf_url': link.url
+        })
+
     return pdf_links
 
-def process_all_universities(html_dir='./university_htmls'):
+
+def extract_file(task):
     """
-    全ての大学HTMLファイルを処理
+    HTMLファイル1件からPDFリンクを抽出（ワーカープロセスで実行）
+
+    Args:
+        task (dict): university（大学情報）, path, mtime, previous_hash
+
+    Returns:
+        tuple: (ハッシュ, PDFリンクのリスト)、前回とハッシュが同じ場合はリストの代わりにNone
+    """
+    with open(task['path'], 'rb') as f:
+        content = f.read()
+
+    content_hash = hashlib.sha256(content).hexdigest()
+    if content_hash == task['previous_hash']:
+        return content_hash, None
+
+    return content_hash, extract_pdf_links_from_page(content, task['university'], encoding='utf-8')
+
+
+def load_universities(universities_csv):
+    """
+    大学リスト（番号,大学名,コード,URL）を読み込む
     """
-    # 大学リストを読み込み
     universities = []
-    if os.path.exists('/home/claude/university_links.csv'):
-        with open('/home/claude/university_links.csv', 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                universities.append({
-                    'name': row['大学名'],
-                    'code': row['コード'],
-                    'url': row['URL']
-                })
-    
-    all_pdf_links = []
-    processed_count = 0
-    not_found_count = 0
-    
+    with open(universities_csv, 'r', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            universities.append({
+                'name': row['大学名'],
+                'code': row['コード'],
+                'url': row['URL']
+            })
+    return universities
+
+
+def load_previous_run(output_dir):
+    """
+    前回の実行状態と抽出結果を読み込む
+
+    Returns:
+        tuple: (コード → {'mtime', 'hash'}, コード → PDFリンクのリスト)
+    """
+    state_file = os.path.join(output_dir, STATE_FILE)
+    jsonl_file = os.path.join(output_dir, 'pdf_links.jsonl')
+
+    # 抽出結果がなければ引き継げないため、すべて処理し直す
+    if not os.path.exists(state_file) or not os.path.exists(jsonl_file):
+        return {}, {}
+
+    with open(state_file, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+
+    previous_links = {code: [] for code in state}
+    with open(jsonl_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                link = json.loads(line)
+                if link['code'] in previous_links:
+                    previous_links[link['code']].append(link)
+
+    return state, previous_links
+
+
+class LinkWriter:
+    """
+    PDFリンクをCSV・JSONL・大学別CSVへ順次書き出す
+
+    書き込み中は一時ファイルに出力し、close() で置き換えるため、
+    途中で失敗しても前回の結果は残ります。
+    """
+
+    def __init__(self, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        self.paths = [
+            os.path.join(output_dir, 'pdf_links.csv'),
+            os.path.join(output_dir, 'pdf_links.jsonl'),
+            os.path.join(output_dir, 'pdf_links_by_university.csv'),
+        ]
+        self._files = [
+            open(f'{path}.tmp', 'w', encoding=encoding, newline='')
+            for path, encoding in zip(self.paths, ['utf-8-sig', 'utf-8', 'utf-8-sig'])
+        ]
+        csv_file, self._jsonl, organized_file = self._files
+
+        self._csv = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS)
+        self._csv.writeheader()
+
+        # 大学別CSV（1大学のリンクはまとめて書き出すため、行は大学ごとに連続する）
+        self._organized = csv.writer(organized_file)
+        self._organized.writerow(['大学名', 'コード', 'PDFリンク', 'リンクテキスト', '文脈'])
+
+        self.count = 0
+
+    def write(self, pdf_links):
+        for link in pdf_links:
+            self._csv.writerow(link)
+            self._jsonl.write(json.dumps(link, ensure_ascii=False) + '\n')
+            self._organized.writerow([
+                link['university'],
+                link['code'],
+                link['pdf_url'],
+                link['link_text'],
+                link['context']
+            ])
+        self.count += len(pdf_links)
+
+    def close(self, commit=True):
+        """
+        ファイルを閉じる
+
+        Args:
+            commit (bool): Trueなら出力ファイルを置き換え、Falseなら一時ファイルを削除
+        """
+        for f in self._files:
+            f.close()
+        for path in self.paths:
+            if commit:
+                os.replace(f'{path}.tmp', path)
+            else:
+                os.remove(f'{path}.tmp')
+
+
+def process_all_universities(html_dir, universities_csv, output_dir, processes=None, full=False):
+    """
+    全ての大学HTMLファイルを処理
+
+    Args:
+        html_dir (str): HTMLファイルのディレクトリ
+        universities_csv (str): 大学リストのCSV
+        output_dir (str): 出力先ディレクトリ
+        processes (int): ワーカープロセス数（省略時はCPU数）
+        full (bool): 変更のないファイルも再抽出するか
+
+    Returns:
+        dict: 処理結果の統計
+    """
+    universities = load_universities(universities_csv)
+    state, previous_links = ({}, {}) if full else load_previous_run(output_dir)
+
+    stats = {'processed': 0, 'unchanged': 0, 'not_found': 0, 'links': 0}
+    new_state = {}
+
     print("=" * 80)
     print("PDFリンク抽出を開始します...")
     print("=" * 80)
-    
+
+    # 更新日時が前回と同じファイルはハッシュも計算せずに引き継ぐ
+    tasks = []
     for univ in universities:
         code = univ['code']
         html_file = os.path.join(html_dir, f"{code}.html")
-        
-        if os.path.exists(html_file):
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            pdf_links = extract_pdf_links_from_page(html_content, univ)
-            all_pdf_links.extend(pdf_links)
-            
-            print(f"✓ {univ['name']:30s} ({code}) - {len(pdf_links)} PDFs found")
-            processed_count += 1
-        else:
-            print(f"✗ {univ['name']:30s} ({code}) - HTMLファイルが見つかりません")
-            not_found_count += 1
-    
+
+        if not os.path.exists(html_file):
+            tasks.append((univ, None))
+            continue
+
+        mtime = os.stat(html_file).st_mtime
+        previous = state.get(code)
+        if previous and previous['mtime'] == mtime:
+            tasks.append((univ, previous))
+            continue
+
+        tasks.append((univ, {
+            'university': univ,
+            'path': html_file,
+            'mtime': mtime,
+            'previous_hash': previous['hash'] if previous else None,
+        }))
+
+    writer = LinkWriter(output_dir)
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            # パースが必要なファイルを先にすべて投入し、結果は大学リストの順に書き出す
+            futures = {
+                univ['code']: executor.submit(extract_file, task)
+                for univ, task in tasks
+                if task is not None and 'path' in task
+            }
+
+            for univ, task in tasks:
+                code = univ['code']
+
+                if task is None:
+                    print(f"✗ {univ['name']:30s} ({code}) - HTMLファイルが見つかりません")
+                    stats['not_found'] += 1
+                    continue
+
+                if code in futures:
+                    content_hash, pdf_links = futures.pop(code).result()
+                    new_state[code] = {'mtime': task['mtime'], 'hash': content_hash}
+                else:
+                    pdf_links = None
+                    new_state[code] = task
+
+                if pdf_links is None:
+                    pdf_links = previous_links.get(code, [])
+                    print(f"- {univ['name']:30s} ({code}) - 変更なし ({len(pdf_links)} PDFs)")
+                    stats['unchanged'] += 1
+                else:
+                    print(f"✓ {univ['name']:30s} ({code}) - {len(pdf_links)} PDFs found")
+                    stats['processed'] += 1
+
+                writer.write(pdf_links)
+
+    except BaseException:
+        writer.close(commit=False)
+        raise
+
+    writer.close()
+    stats['links'] = writer.count
+
+    with open(os.path.join(output_dir, STATE_FILE), 'w', encoding='utf-8') as f:
+        json.dump(new_state, f, ensure_ascii=False, indent=2)
+
     print("\n" + "=" * 80)
-    print(f"処理完了: {processed_count}大学 処理済み, {not_found_count}大学 未処理")
-    print(f"合計 {len(all_pdf_links)} 件のPDFリンクを抽出しました")
+    print(
+        f"処理完了: {stats['processed']}大学 処理済み, {stats['unchanged']}大学 変更なし, "
+        f"{stats['not_found']}大学 未処理"
+    )
+    print(f"合計 {stats['links']} 件のPDFリンクを抽出しました")
     print("=" * 80)
-    
-    return all_pdf_links
 
-def save_results(pdf_links, output_dir='/mnt/user-data/outputs'):
-    """
-    結果をCSVとJSONで保存
-    """
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # CSV形式で保存
-    csv_file = os.path.join(output_dir, 'pdf_links.csv')
-    with open(csv_file, 'w', encoding='utf-8-sig', newline='') as f:
-        if pdf_links:
-            writer = csv.DictWriter(f, fieldnames=['university', 'code', 'link_text', 'context', 'pdf_url'])
-            writer.writeheader()
-            writer.writerows(pdf_links)
-    
-    # JSON形式で保存
-    json_file = os.path.join(output_dir, 'pdf_links.json')
-    with open(json_file, 'w', encoding='utf-8', ensure_ascii=False, indent=2) as f:
-        json.dump(pdf_links, f, ensure_ascii=False, indent=2)
-    
-    # 大学ごとに整理したCSVも作成
-    by_university = defaultdict(list)
-    for link in pdf_links:
-        by_university[link['university']].append(link)
-    
-    organized_csv = os.path.join(output_dir, 'pdf_links_by_university.csv')
-    with open(organized_csv, 'w', encoding='utf-8-sig', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['大学名', 'コード', 'PDFリンク', 'リンクテキスト', '文脈'])
-        
-        for univ_name in sorted(by_university.keys()):
-            for link in by_university[univ_name]:
-                writer.writerow([
-                    link['university'],
-                    link['code'],
-                    link['pdf_url'],
-                    link['link_text'],
-                    link['context']
-                ])
-    
     print(f"\n結果を以下のファイルに保存しました:")
-    print(f"  1. {csv_file}")
-    print(f"  2. {json_file}")
-    print(f"  3. {organized_csv}")
-    
-    return csv_file, json_file, organized_csv
+    for i, path in enumerate(writer.paths, 1):
+        print(f"  {i}. {path}")
 
-if __name__ == '__main__':
-    import sys
-    
-    # HTMLファイルが格納されているディレクトリ
-    html_dir = sys.argv[1] if len(sys.argv) > 1 else './university_htmls'
-    
-    if not os.path.exists(html_dir):
-        print(f"エラー: ディレクトリ '{html_dir}' が見つかりません")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='各大学の解答速報ページからPDFリンクを抽出')
+
+    parser.add_argument(
+        'html_dir',
+        nargs='?',
+        default='./university_htmls',
+        help='HTMLファイル（{コード}.html）が格納されているディレクトリ（デフォルト: ./university_htmls）'
+    )
+
+    parser.add_argument(
+        '--universities',
+        default=os.path.join(BASE_DIR, 'university_links.csv'),
+        help='大学リストのCSV（デフォルト: このスクリプトと同じディレクトリの university_links.csv）'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        default='./outputs',
+        help='出力先ディレクトリ（デフォルト: ./outputs）'
+    )
+
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=None,
+        help='ワーカープロセス数（デフォルト: CPU数）'
+    )
+
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='変更のないファイルも含めてすべて再抽出する'
+    )
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.html_dir):
+        print(f"エラー: ディレクトリ '{args.html_dir}' が見つかりません")
         print(f"\n使用方法:")
         print(f"  1. 各大学のHTMLファイルをダウンロード")
-        print(f"  2. '{html_dir}' ディレクトリを作成")
+        print(f"  2. '{args.html_dir}' ディレクトリを作成")
         print(f"  3. HTMLファイルを '{{コード}}.html' の名前で保存")
         print(f"     例: t01.html, k01.html, n01.html...")
         print(f"  4. このスクリプトを実行")
         sys.exit(1)
-    
-    # PDFリンクを抽出
-    pdf_links = process_all_universities(html_dir)
-    
-    # 結果を保存
-    if pdf_links:
-        save_results(pdf_links)
-    else:
+
+    if not os.path.exists(args.universities):
+        print(f"エラー: 大学リスト '{args.universities}' が見つかりません")
+        sys.exit(1)
+
+    stats = process_all_universities(
+        args.html_dir, args.universities, args.output_dir,
+        processes=args.processes, full=args.full
+    )
+
+    if not stats['links']:
         print("\nPDFリンクが見つかりませんでした")
+
+
+if __name__ == '__main__':
+    main()